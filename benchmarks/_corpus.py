@@ -0,0 +1,79 @@
+"""
+Deterministic synthetic traffic: user agents, client IPs, returning devices
+(with a UAD cookie) and logged-in users.
+"""
+import random
+from dataclasses import dataclass
+
+USER_AGENTS = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Safari/605.1.15',
+    'Mozilla/5.0 (X11; Linux x86_64; rv:121.0) Gecko/20100101 Firefox/121.0',
+    'Mozilla/5.0 (iPhone; CPU iPhone OS 17_1 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.1 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.6099.43 Mobile Safari/537.36',
+    'Mozilla/5.0 (iPad; CPU OS 16_6 like Mac OS X) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/16.6 Mobile/15E148 Safari/604.1',
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.2210.61',
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)',
+    'Mozilla/5.0 (compatible; bingbot/2.0; +http://www.bing.com/bingbot.htm)',
+    'curl/8.4.0',
+    'python-requests/2.31.0',
+)
+
+PATHS = ('/items/{}/', '/items/{}/reviews/', '/search/', '/static/app.css')
+
+
+@dataclass(slots=True)
+class Visit:
+    path: str
+    user_agent: str
+    ip: str
+    client: int  # index of the simulated client, stable across its visits
+    user: int | None  # index of the logged-in user, if any
+
+
+def make_visits(count: int, clients: int = 200, user_ratio: float = 0.3, seed: int = 42) -> list[Visit]:
+    """
+    ``count`` visits spread over ``clients`` simulated clients, each with a
+    fixed user agent and IP; ``user_ratio`` of them are logged in.
+    """
+    rng = random.Random(seed)
+    profiles = [
+        (
+            rng.choice(USER_AGENTS),
+            f'10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}',
+            i if rng.random() < user_ratio else None,
+        )
+        for i in range(clients)
+    ]
+    visits = []
+    for _ in range(count):
+        client = rng.randrange(clients)
+        user_agent, ip, user = profiles[client]
+        path = rng.choice(PATHS).format(rng.randrange(1, 10_000))
+        visits.append(Visit(path, user_agent, ip, client, user))
+    return visits
+
+
+def create_devices(count: int, seed: int = 42) -> list:
+    """
+    Insert ``count`` devices with the parsed fields of the corpus user agents.
+    """
+    from user_agents import parse
+
+    from djangouseragents.models import UserAgentDeviceModel
+
+    rng = random.Random(seed)
+    devices = []
+    for i in range(count):
+        ua = parse(rng.choice(USER_AGENTS))
+        obj = UserAgentDeviceModel(
+            key=f'{i:032x}', ip=f'10.0.{i // 256 % 256}.{i % 256}',
+            is_mobile=ua.is_mobile, is_tablet=ua.is_tablet, is_touch_capable=ua.is_touch_capable,
+            is_pc=ua.is_pc, is_bot=ua.is_bot,
+            browser_family=ua.browser.family, browser_version=ua.browser.version_string,
+            os_family=ua.os.family, os_version=ua.os.version_string,
+            device_family=ua.device.family, device_brand=ua.device.brand, device_model=ua.device.model,
+        )
+        obj.fill_key_digest()
+        devices.append(obj)
+    return UserAgentDeviceModel.objects.bulk_create(devices)
@@ -0,0 +1,78 @@
+"""
+Timing statistics and the JSON result format shared by the benchmark scripts.
+Every script accepts ``--json PATH``; compare.py diffs two such files.
+"""
+import json
+import os
+import platform
+import subprocess
+import time
+
+import django
+
+# Metrics where a larger value is better; everything else is a cost
+HIGHER_IS_BETTER = frozenset(('rps', 'rows_per_s', 'lines_per_s'))
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(pct / 100 * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+def latency_stats(latencies_ns: list[int], elapsed_s: float | None = None) -> dict:
+    """
+    p50 / p90 / p99 / max latency in milliseconds, plus requests per second
+    when the wall-clock time of the whole run is given.
+    """
+    values = sorted(latencies_ns)
+    stats = {f'p{p}_ms': percentile(values, p) / 1e6 for p in (50, 90, 99)}
+    stats['max_ms'] = values[-1] / 1e6 if values else 0.0
+    stats['mean_ms'] = sum(values) / len(values) / 1e6 if values else 0.0
+    if elapsed_s:
+        stats['rps'] = len(values) / elapsed_s
+    return stats
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(__file__),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def metadata() -> dict:
+    from django.db import connection
+
+    return {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'revision': _git_revision(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+        'machine': platform.machine(),
+    }
+
+
+def report(benchmark: str, results: dict[str, dict], json_path: str | None = None) -> None:
+    """
+    Print ``{case: {metric: value}}`` as a table and optionally save it as JSON.
+    """
+    metrics = sorted({metric for values in results.values() for metric in values})
+    width = max([len(case) for case in results] + [4])
+    print(f'{"case":<{width}} ' + ' '.join(f'{m:>12}' for m in metrics))
+    for case, values in results.items():
+        cells = ' '.join(
+            f'{values[m]:>12.3f}' if isinstance(values.get(m), float) else f'{values.get(m, ""):>12}'
+            for m in metrics
+        )
+        print(f'{case:<{width}} {cells}')
+
+    if json_path:
+        with open(json_path, 'w') as f:
+            json.dump({'benchmark': benchmark, 'meta': metadata(), 'results': results}, f, indent=2)
+        print(f'Results written to {json_path}')
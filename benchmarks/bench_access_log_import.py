@@ -0,0 +1,78 @@
+"""
+Throughput of import_useragent_access_log: a synthetic gzipped access log in
+the combined format, imported with each number of user-agent parsing
+workers. Every run gets a log of new clients, so it creates its devices.
+
+    python benchmarks/bench_access_log_import.py [--lines 50000] [--workers 1 4] [--json out.json]
+"""
+import argparse
+import gzip
+import io
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+from _corpus import make_visits
+from _django import create_tables, setup_django
+from _results import report
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+parser.add_argument('--lines', type=int, default=50_000, help='lines of the generated log')
+parser.add_argument('--clients', type=int, default=2000, help='distinct (user agent, IP) pairs')
+parser.add_argument('--workers', type=int, nargs='+', default=[1, 4], help='worker counts to measure')
+parser.add_argument('--chunk-size', type=int, default=10_000)
+parser.add_argument('--json', help='write the results to this file')
+args = parser.parse_args()
+
+tmpdir = tempfile.mkdtemp(prefix='bench-access-log-')
+# The command closes the connections before forking its workers, which would
+# drop an in-memory database
+os.environ.setdefault('BENCH_SQLITE_PATH', os.path.join(tmpdir, 'db.sqlite3'))
+setup_django()
+
+from django.core.management import call_command  # noqa: E402
+
+from djangouseragents.models import UserAgentRequestModel  # noqa: E402
+
+
+def write_log(path: str, seed: int) -> None:
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        for i, visit in enumerate(make_visits(args.lines, clients=args.clients, seed=seed)):
+            time_local = (start + timedelta(seconds=i // 5)).strftime('%d/%b/%Y:%H:%M:%S %z')
+            status = rng.choice((200, 200, 200, 304, 404))
+            f.write(
+                f'{visit.ip} - - [{time_local}] "GET {visit.path}?page={rng.randrange(1, 5)} HTTP/1.1" '
+                f'{status} {rng.randrange(200, 20_000)} "-" "{visit.user_agent}"\n'
+            )
+
+
+def bench_import(path: str, workers: int) -> dict:
+    before = UserAgentRequestModel.objects.count()
+    start = time.perf_counter()
+    call_command(
+        'import_useragent_access_log', path,
+        workers=workers, chunk_size=args.chunk_size, stdout=io.StringIO(),
+    )
+    elapsed = time.perf_counter() - start
+    assert UserAgentRequestModel.objects.count() - before == args.lines
+    return {'seconds': elapsed, 'lines_per_s': args.lines / elapsed}
+
+
+def main():
+    create_tables()
+
+    results = {}
+    for seed, workers in enumerate(args.workers):
+        path = os.path.join(tmpdir, f'access-{seed}.log.gz')
+        write_log(path, seed)
+        results[f'workers-{workers}'] = bench_import(path, workers)
+
+    report('access_log_import', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
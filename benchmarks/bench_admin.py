@@ -0,0 +1,120 @@
+"""
+Render time and query count of the admin changelists (devices, requests,
+filtered and searched requests, the traffic dashboard) as the request table
+grows.
+
+    python benchmarks/bench_admin.py [--sizes 1000 100000] [--number 20] [--json out.json]
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from _corpus import create_devices
+from _django import create_tables, setup_django
+from _results import latency_stats, report
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100_000],
+                    help='request table sizes to measure at')
+parser.add_argument('--number', type=int, default=20, help='renders per page and size')
+parser.add_argument('--devices', type=int, default=1000)
+parser.add_argument('--json', help='write the results to this file')
+args = parser.parse_args()
+
+setup_django(
+    ROOT_URLCONF=__name__,
+    MIDDLEWARE=[
+        'django.contrib.sessions.middleware.SessionMiddleware',
+        'django.contrib.auth.middleware.AuthenticationMiddleware',
+        'django.contrib.messages.middleware.MessageMiddleware',
+    ],
+    TEMPLATES=[{
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {'context_processors': [
+            'django.template.context_processors.request',
+            'django.contrib.auth.context_processors.auth',
+            'django.contrib.messages.context_processors.messages',
+        ]},
+    }],
+    STATIC_URL='/static/',
+    USERAGENTS_ANALYTICS_ROLLUPS=True,
+)
+create_tables()
+
+from django.contrib import admin  # noqa: E402
+from django.contrib.auth.models import User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test import Client  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.urls import path  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+
+from djangouseragents.models import UserAgentRequestModel  # noqa: E402
+from djangouseragents.models.user_agent_request import assign_endpoints  # noqa: E402
+from djangouseragents.models.user_agent_rollups import update_rollups  # noqa: E402
+
+urlpatterns = [path('admin/', admin.site.urls)]
+
+rng = random.Random(42)
+
+
+def grow_table(devices, target: int) -> None:
+    """
+    Add a month of history rows (and their rollups) until the table holds ``target``.
+    """
+    missing = target - UserAgentRequestModel.objects.count()
+    start = now() - timedelta(days=30)
+    while missing > 0:
+        batch = []
+        for _ in range(min(missing, 5000)):
+            device = rng.choice(devices)
+            batch.append(UserAgentRequestModel(
+                uad_id=device.pk, endpoint=f'/items/{rng.randrange(1, 500)}/', method='GET',
+                response_status_code=rng.choice((200, 200, 200, 304, 404, 500)),
+                rn=1, rn_ph=rng.randrange(1, 200), rn_24h=1, status=rng.choice(('Normal', 'Busy')),
+                created_dt=start + timedelta(seconds=rng.randrange(30 * 86400)),
+            ))
+        assign_endpoints(batch)
+        UserAgentRequestModel.objects.bulk_create(batch)
+        update_rollups(batch)
+        missing -= len(batch)
+
+
+def bench_page(client, url: str) -> dict:
+    latencies = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(args.number):
+            start = time.perf_counter_ns()
+            response = client.get(url)
+            latencies.append(time.perf_counter_ns() - start)
+            assert response.status_code == 200, (url, response.status_code)
+    stats = latency_stats(latencies)
+    stats['queries_per_render'] = len(ctx.captured_queries) / args.number
+    return stats
+
+
+def main():
+    devices = create_devices(args.devices)
+    client = Client()
+    client.force_login(User.objects.create_superuser('bench', password='bench'))
+    pages = {
+        'devices': '/admin/djangouseragents/useragentdevice/',
+        'requests': '/admin/djangouseragents/useragentrequest/',
+        'requests-filtered': '/admin/djangouseragents/useragentrequest/?status__exact=Busy',
+        'requests-search': f'/admin/djangouseragents/useragentrequest/?q={devices[0].key}',
+        'dashboard': '/admin/djangouseragents/useragenttrafficrollup/?hours=720',
+    }
+
+    results = {}
+    for size in sorted(args.sizes):
+        grow_table(devices, size)
+        for name, url in pages.items():
+            results[f'{name}-{size}'] = bench_page(client, url)
+
+    report('admin', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
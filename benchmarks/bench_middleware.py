@@ -0,0 +1,177 @@
+"""
+Load test of UserAgentDeviceMiddleware: synthetic traffic from returning
+clients (UAD cookie), anonymous and logged-in, run through the middleware
+with one or more threads. Reports latency percentiles, throughput, queries
+per request and the peak memory allocated per request.
+
+    python benchmarks/bench_middleware.py [--requests 5000] [--threads 1 4] [--json out.json]
+
+Runs on SQLite use a temporary file database (set BENCH_SQLITE_PATH to
+choose one): requests run in worker threads, even with one thread, and
+every in-memory connection is private.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from _corpus import make_visits
+from _django import create_tables, setup_django
+from _results import latency_stats, report
+
+SINKS = {
+    'sync': 'djangouseragents.services.request_log_sinks.SyncRequestLogSink',
+    'buffered': 'djangouseragents.services.request_log_sinks.BufferedRequestLogSink',
+    # Writes only the local spool; ingest_useragent_requests is not run
+    'spool': 'djangouseragents.services.request_log_sinks.SpoolRequestLogSink',
+}
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+parser.add_argument('--requests', type=int, default=5000, help='requests per run')
+parser.add_argument('--clients', type=int, default=200, help='distinct simulated clients')
+parser.add_argument('--threads', type=int, nargs='+', default=[1, 4], help='thread counts to run')
+parser.add_argument('--warmup', type=int, default=200)
+parser.add_argument('--sink', choices=SINKS, default='sync')
+parser.add_argument('--signed-cookie', action='store_true', help='enable USERAGENTS_SIGNED_COOKIE')
+parser.add_argument('--allocation-sample', type=int, default=500,
+                    help='requests traced with tracemalloc (0 to skip)')
+parser.add_argument('--json', help='write the results to this file')
+args = parser.parse_args()
+
+if not os.environ.get('BENCH_DATABASE_URL') and not os.environ.get('BENCH_SQLITE_PATH'):
+    os.environ['BENCH_SQLITE_PATH'] = os.path.join(tempfile.mkdtemp(prefix='uad-bench-'), 'db.sqlite3')
+
+setup_django(
+    USERAGENTS_LOG_SINK=SINKS[args.sink],
+    USERAGENTS_LOG_RULES=[{'paths': ['/static/'], 'action': 'exclude'}],
+    USERAGENTS_SIGNED_COOKIE=args.signed_cookie,
+    USERAGENTS_LOG_SPOOL_DIR=tempfile.mkdtemp(prefix='uad-bench-spool-'),
+)
+create_tables()
+
+from django.contrib.auth.models import AnonymousUser, User  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from djangouseragents.services import UserAgentDeviceMiddleware  # noqa: E402
+from djangouseragents.services.request_log_sinks import get_request_log_sink  # noqa: E402
+
+
+def view(request):
+    # Pages use the device data, static files do not
+    if not request.path.startswith('/static/'):
+        request.uad.browser_family
+    return HttpResponse('ok')
+
+
+class Client:
+    """
+    Replays the visits of one thread, keeping the UAD cookie of every client
+    like a browser would.
+    """
+
+    def __init__(self, middleware, users):
+        self.middleware = middleware
+        self.users = users
+        self.factory = RequestFactory()
+        self.cookies = {}
+
+    def request(self, visit):
+        request = self.factory.get(visit.path, HTTP_USER_AGENT=visit.user_agent, REMOTE_ADDR=visit.ip)
+        if visit.client in self.cookies:
+            request.COOKIES['UAD'] = self.cookies[visit.client]
+        request.user = AnonymousUser() if visit.user is None else self.users[visit.user]
+        response = self.middleware(request)
+        if 'UAD' in response.cookies:
+            self.cookies[visit.client] = response.cookies['UAD'].value
+        return response
+
+
+def run(visits, threads: int, users) -> dict:
+    middleware = UserAgentDeviceMiddleware(view)
+    # A client's visits stay on one thread, in order, so its cookie is reused
+    shards = [[v for v in visits if v.client % threads == i] for i in range(threads)]
+    latencies = [[] for _ in range(threads)]
+    queries = [0] * threads
+    errors = [0] * threads
+
+    def worker(index):
+        client = Client(middleware, users)
+
+        def count(execute, sql, params, many, context):
+            queries[index] += 1
+            return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(count):
+                for visit in shards[index]:
+                    start = time.perf_counter_ns()
+                    try:
+                        client.request(visit)
+                    except Exception:
+                        errors[index] += 1
+                        continue
+                    latencies[index].append(time.perf_counter_ns() - start)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    started = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    stats = latency_stats([ns for shard in latencies for ns in shard], elapsed)
+    stats['queries_per_request'] = sum(queries) / len(visits)
+    stats['errors'] = sum(errors)
+    return stats
+
+
+def allocations(visits, users) -> dict:
+    """
+    Mean and max of the peak memory traced while handling a single request.
+    """
+    client = Client(UserAgentDeviceMiddleware(view), users)
+    peaks = []
+    tracemalloc.start()
+    try:
+        for visit in visits:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+            client.request(visit)
+            peaks.append(tracemalloc.get_traced_memory()[1] - base)
+    finally:
+        tracemalloc.stop()
+    return {
+        'alloc_peak_kib_mean': sum(peaks) / len(peaks) / 1024,
+        'alloc_peak_kib_max': max(peaks) / 1024,
+    }
+
+
+def main():
+    users = User.objects.bulk_create(
+        [User(username=f'bench-{i}') for i in range(args.clients)])
+    warmup = Client(UserAgentDeviceMiddleware(view), users)
+    for visit in make_visits(args.warmup, clients=args.clients, seed=0):
+        warmup.request(visit)
+
+    results = {}
+    for threads in args.threads:
+        visits = make_visits(args.requests, clients=args.clients, seed=threads)
+        results[f'{args.sink}-{threads}-threads'] = run(visits, threads, users)
+        get_request_log_sink().flush()
+    if args.allocation_sample:
+        sample = make_visits(args.allocation_sample, clients=args.clients, seed=1)
+        results[f'{args.sink}-allocations'] = allocations(sample, users)
+        get_request_log_sink().flush()
+
+    report('middleware', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Cost of logging a request as the request table grows: UserAgentRequest.save
+(one row) and create_from_entries (a sink batch) at each table size. Both
+should stay flat, as counters come from the per-device counter rows.
+
+    python benchmarks/bench_request_save.py [--sizes 0 10000 100000] [--number 500] [--json out.json]
+"""
+import argparse
+import random
+import time
+from datetime import timedelta
+
+from _corpus import USER_AGENTS, create_devices
+from _django import create_tables, setup_django
+from _results import latency_stats, report
+
+parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+parser.add_argument('--sizes', type=int, nargs='+', default=[0, 10_000, 100_000],
+                    help='request table sizes to measure at')
+parser.add_argument('--number', type=int, default=500, help='saves per size')
+parser.add_argument('--batch-size', type=int, default=500, help='entries per create_from_entries call')
+parser.add_argument('--devices', type=int, default=200)
+parser.add_argument('--rollups', action='store_true', help='enable USERAGENTS_ANALYTICS_ROLLUPS')
+parser.add_argument('--json', help='write the results to this file')
+args = parser.parse_args()
+
+setup_django(USERAGENTS_ANALYTICS_ROLLUPS=args.rollups)
+create_tables()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils.timezone import now  # noqa: E402
+
+from djangouseragents.models import UserAgentRequestModel  # noqa: E402
+
+rng = random.Random(42)
+
+
+def make_entry(device_ids, created_dt) -> dict:
+    return {
+        'uad_id': rng.choice(device_ids),
+        'endpoint': f'/items/{rng.randrange(1, 10_000)}/',
+        'method': 'GET',
+        'response_status_code': rng.choice((200, 200, 200, 304, 404)),
+        'get': {'page': [str(rng.randrange(1, 5))]},
+        'headers': {'User-Agent': rng.choice(USER_AGENTS), 'Accept': 'text/html'},
+        'cookies': {},
+        'created_dt': created_dt,
+    }
+
+
+def grow_table(device_ids, target: int) -> None:
+    """
+    Add history rows with a plain bulk INSERT until the table holds ``target``.
+    """
+    missing = target - UserAgentRequestModel.objects.count()
+    start = now() - timedelta(days=30)
+    while missing > 0:
+        batch = [
+            UserAgentRequestModel(**make_entry(device_ids, start + timedelta(seconds=rng.randrange(30 * 86400))))
+            for _ in range(min(missing, 5000))
+        ]
+        UserAgentRequestModel.objects.bulk_create(batch)
+        missing -= len(batch)
+
+
+def bench_save(device_ids) -> dict:
+    latencies = []
+    with CaptureQueriesContext(connection) as ctx:
+        for _ in range(args.number):
+            obj = UserAgentRequestModel(**make_entry(device_ids, now()))
+            start = time.perf_counter_ns()
+            obj.save()
+            latencies.append(time.perf_counter_ns() - start)
+    stats = latency_stats(latencies)
+    stats['queries_per_save'] = len(ctx.captured_queries) / args.number
+    return stats
+
+
+def bench_batch(device_ids) -> dict:
+    latencies = []
+    for _ in range(max(args.number // args.batch_size, 1)):
+        entries = [make_entry(device_ids, now()) for _ in range(args.batch_size)]
+        start = time.perf_counter_ns()
+        UserAgentRequestModel.objects.create_from_entries(entries)
+        latencies.append(time.perf_counter_ns() - start)
+    stats = latency_stats(latencies)
+    stats['rows_per_s'] = args.batch_size * len(latencies) / (sum(latencies) / 1e9)
+    return stats
+
+
+def main():
+    device_ids = [obj.pk for obj in create_devices(args.devices)]
+
+    results = {}
+    for size in sorted(args.sizes):
+        grow_table(device_ids, size)
+        results[f'save-{size}'] = bench_save(device_ids)
+        results[f'batch-{size}'] = bench_batch(device_ids)
+
+    report('request_save', results, args.json)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Construction cost and memory of the per-request device record:
+pydantic UADSchema versus the slotted UADRecord.
+
+    python benchmarks/bench_uad_record.py [--number 100000]
+"""
+import argparse
+import timeit
+import tracemalloc
+
+from _django import setup_django
+
+setup_django()
+
+from django.utils.timezone import now  # noqa: E402
+
+from djangouseragents.models import UserAgentDeviceModel  # noqa: E402
+from djangouseragents.schemas import UADRecord, UADSchema  # noqa: E402
+
+
+def make_device() -> UserAgentDeviceModel:
+    return UserAgentDeviceModel(
+        id=1, name='bench', key='3ac8d3a2feb7da8f1940c4edb86f5cfd', user_id='42',
+        is_mobile=False, is_tablet=False, is_touch_capable=False, is_pc=True, is_bot=False,
+        browser_family='Chrome', browser_version='120.0', os_family='Windows', os_version='10',
+        device_family='Other', device_brand=None, device_model=None, ip='10.0.0.1',
+        created_dt=now(),
+    )
+
+
+def bytes_per_object(factory, count: int = 10_000) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objs = [factory() for _ in range(count)]
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(stat.size_diff for stat in after.compare_to(before, 'filename'))
+    del objs
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--number', type=int, default=100_000)
+    args = parser.parse_args()
+
+    device = make_device()
+    cases = {
+        'UADSchema.from_model': lambda: UADSchema.from_model(device),
+        'UADRecord.from_model': lambda: UADRecord.from_model(device),
+        'UADSchema.to_dict': (lambda s=UADSchema.from_model(device): s.to_dict()),
+        'UADRecord.to_dict': (lambda r=UADRecord.from_model(device): r.to_dict()),
+    }
+
+    print(f'{"case":<24} {"us/op":>10} {"bytes/obj":>10}')
+    for name, func in cases.items():
+        seconds = timeit.timeit(func, number=args.number)
+        memory = bytes_per_object(func)
+        print(f'{name:<24} {seconds / args.number * 1e6:>10.2f} {memory:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
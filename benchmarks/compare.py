@@ -0,0 +1,70 @@
+"""
+Compare two benchmark result files written with ``--json`` and flag every
+metric that got worse by more than the threshold.
+
+    python benchmarks/compare.py baseline.json current.json [--threshold 10]
+
+Exits with status 1 when a regression is found, so it can gate CI.
+"""
+import argparse
+import json
+import sys
+
+from _results import HIGHER_IS_BETTER
+
+
+def load(path: str) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline: dict, current: dict, threshold: float) -> list[str]:
+    """
+    Print a line per metric present in both files; return the regressions.
+    """
+    regressions = []
+    for case, metrics in current['results'].items():
+        old_metrics = baseline['results'].get(case)
+        if old_metrics is None:
+            continue
+        for metric, new in sorted(metrics.items()):
+            old = old_metrics.get(metric)
+            if not isinstance(old, (int, float)) or not isinstance(new, (int, float)):
+                continue
+            if old:
+                change = (new - old) / old * 100
+            else:
+                change = 0.0 if not new else float('inf') if new > 0 else float('-inf')
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = 'REGRESSION' if worse > threshold else ''
+            line = f'{case:<28} {metric:<22} {old:>12.3f} {new:>12.3f} {change:>+8.1f}% {flag}'
+            print(line)
+            if flag:
+                regressions.append(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('baseline')
+    parser.add_argument('current')
+    parser.add_argument('--threshold', type=float, default=10.0, help='allowed change in percent')
+    args = parser.parse_args()
+
+    baseline, current = load(args.baseline), load(args.current)
+    if baseline['benchmark'] != current['benchmark']:
+        sys.exit(f'Cannot compare {baseline["benchmark"]!r} with {current["benchmark"]!r} results.')
+    for label, data in (('baseline', baseline), ('current', current)):
+        meta = data['meta']
+        print(f'{label}: {meta["revision"]} on {meta["database"]}, Django {meta["django"]}, {meta["timestamp"]}')
+    if baseline['meta']['database'] != current['meta']['database']:
+        print('Warning: the results come from different databases.')
+
+    regressions = compare(baseline, current, args.threshold)
+    if regressions:
+        print(f'\n{len(regressions)} metric(s) regressed by more than {args.threshold:g}%.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -45,10 +45,17 @@ setuptools.setup(
         'DjangoUniqueToolkit>=0.1.0'
     ],
     extras_require={
+        'xxhash': [
+            'xxhash>=3.0',
+        ],
+        'parquet': [
+            'pyarrow>=12.0',
+        ],
         'dev': [
             'tox',
             'pytest',
             'pytest-cov',
+            'pytest-django',
             'flake8',
             'mypy',
         ],
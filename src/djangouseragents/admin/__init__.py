@@ -1,2 +1,3 @@
 from .user_agent_device import UserAgentDeviceModelAdmin
 from .user_agent_request import UserAgentRequestModelAdmin
+from .traffic_dashboard import UserAgentTrafficRollupModelAdmin
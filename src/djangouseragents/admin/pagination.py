@@ -0,0 +1,104 @@
+import json
+
+from django.contrib.admin.views.main import ORDER_VAR, PAGE_VAR, ChangeList
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from djangouseragents.conf import get_setting
+
+CURSOR_VAR = 'cursor'
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that trusts the PostgreSQL planner instead of running COUNT(*)
+    on big tables: ``pg_class.reltuples`` for unfiltered querysets, the
+    EXPLAIN row estimate otherwise. Estimates under
+    USERAGENTS_ADMIN_EXACT_COUNT_THRESHOLD are replaced by an exact count.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimate_count()
+        threshold = get_setting('ADMIN_EXACT_COUNT_THRESHOLD')
+        if estimate is None or estimate < threshold:
+            return super().count
+        return estimate
+
+    def _estimate_count(self) -> int | None:
+        qs = self.object_list
+        connection = connections[qs.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        with connection.cursor() as cursor:
+            if not qs.query.where:
+                # Partitioned tables keep their statistics on the partitions
+                cursor.execute(
+                    'SELECT COALESCE(SUM(c.reltuples), 0) FROM pg_class c '
+                    'WHERE c.oid = %s::regclass OR c.oid IN '
+                    '(SELECT inhrelid FROM pg_inherits '
+                    'WHERE inhparent = %s::regclass)',
+                    [qs.model._meta.db_table] * 2,
+                )
+                estimate = cursor.fetchone()[0]
+            else:
+                sql, params = qs.order_by().query.sql_with_params()
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                if isinstance(plan, str):
+                    plan = json.loads(plan)
+                estimate = plan[0]['Plan']['Plan Rows']
+        # reltuples is -1 on never-analyzed tables
+        return int(estimate) if estimate and estimate > 0 else None
+
+
+class KeysetChangeList(ChangeList):
+    """
+    ChangeList that can continue after a given row
+    (``?cursor=<created_dt>|<id>``) with an index range scan instead of a
+    deep OFFSET. Only applies while the list uses its default
+    ``-created_dt, -id`` ordering.
+    """
+
+    def __init__(self, request, *args, **kwargs):
+        self.cursor = self._parse_cursor(request.GET.get(CURSOR_VAR))
+        self.keyset = ORDER_VAR not in request.GET
+        self.next_cursor_url = None
+        super().__init__(request, *args, **kwargs)
+
+    @staticmethod
+    def _parse_cursor(value: str | None):
+        if not value:
+            return None
+        created_dt, _, pk = value.rpartition('|')
+        created_dt = parse_datetime(created_dt)
+        if created_dt is None or not pk.isdigit():
+            return None
+        return created_dt, int(pk)
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_queryset(self, request, *args, **kwargs):
+        qs = super().get_queryset(request, *args, **kwargs)
+        if self.keyset and self.cursor is not None:
+            created_dt, pk = self.cursor
+            qs = qs.filter(
+                Q(created_dt__lt=created_dt)
+                | Q(created_dt=created_dt, pk__lt=pk)
+            )
+        return qs
+
+    def get_results(self, request):
+        super().get_results(request)
+        if self.keyset and len(self.result_list) >= self.list_per_page:
+            last = self.result_list[len(self.result_list) - 1]
+            cursor = f'{last.created_dt.isoformat()}|{last.pk}'
+            self.next_cursor_url = self.get_query_string(
+                {CURSOR_VAR: cursor}, [PAGE_VAR])
@@ -0,0 +1,82 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.utils.timezone import now as dj_now, timedelta
+from django.utils.translation import gettext_lazy as _
+
+from djangouseragents.analytics import (
+    new_devices_per_day,
+    requests_per_hour,
+    top_endpoints,
+)
+from djangouseragents.models import UserAgentTrafficRollupModel
+
+
+@admin.register(UserAgentTrafficRollupModel)
+class UserAgentTrafficRollupModelAdmin(admin.ModelAdmin):
+    """
+    Replaces the changelist with a traffic dashboard built from the hourly
+    rollups only, so it renders in constant time however large the log grows.
+    """
+    permission_resource = "user_agent_traffic_rollup"
+    dashboard_template = 'admin/djangouseragents/traffic_dashboard.html'
+
+    def changelist_view(self, request, extra_context=None):
+        # The stock changelist checks this itself; the dashboard replaces it
+        if not self.has_view_or_change_permission(request):
+            raise PermissionDenied
+        try:
+            hours = min(max(int(request.GET.get('hours', 24)), 1), 24 * 90)
+        except ValueError:
+            hours = 24
+        now = dj_now()
+        since = now - timedelta(hours=hours)
+        by_browser = requests_per_hour(since, by=('browser_family', 'is_bot'))
+        by_os = requests_per_hour(since, by=('os_family',))
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': _('Traffic'),
+            'hours': hours,
+            'hour_choices': (
+                (24, _('Last 24 hours')),
+                (24 * 7, _('Last 7 days')),
+                (24 * 30, _('Last 30 days')),
+            ),
+            'per_hour': requests_per_hour(since),
+            'by_browser': self._totals(by_browser, 'browser_family'),
+            'by_os': self._totals(by_os, 'os_family'),
+            'top_endpoints': top_endpoints(since, limit=20),
+            # At least 30 days, a single day says little
+            'new_devices': new_devices_per_day(
+                min(since, now - timedelta(days=30))),
+            **(extra_context or {}),
+        }
+        max_requests = max(
+            (row['requests'] for row in context['per_hour']), default=0)
+        for row in context['per_hour']:
+            row['percent'] = (
+                100 * row['requests'] // max_requests if max_requests else 0
+            )
+        return TemplateResponse(request, self.dashboard_template, context)
+
+    @staticmethod
+    def _totals(rows: list[dict], dimension: str) -> list[dict]:
+        totals = {}
+        for row in rows:
+            key = row[dimension] or '-'
+            if 'is_bot' in row and row['is_bot']:
+                key = f'{key} (bot)'
+            totals[key] = totals.get(key, 0) + row['requests']
+        ranked = sorted(totals.items(), key=lambda kv: -kv[1])
+        return [{'name': k, 'requests': v} for k, v in ranked]
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
@@ -1,8 +1,15 @@
 from django.contrib import admin
-from django.utils.timezone import now, timedelta
+from django.utils.timezone import now
 from django.utils.translation import gettext_lazy as _
 
-from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentRequestCounterModel,
+)
+from djangouseragents.models.user_agent_request_counter import (
+    DAY_WINDOW,
+    HOUR_WINDOW,
+)
 
 
 @admin.register(UserAgentDeviceModel)
@@ -74,6 +81,16 @@ class UserAgentDeviceModelAdmin(admin.ModelAdmin):
         }),
     )
 
+    # Request counts come from the precomputed per-device counters,
+    # so a changelist page does not aggregate over the request log
+    def get_queryset(self, request):
+        current = now()
+        counters = UserAgentRequestCounterModel.objects
+        return super().get_queryset(request).annotate(
+            requests_24h_count=counters.window_count(DAY_WINDOW, current),
+            requests_1h_count=counters.window_count(HOUR_WINDOW, current),
+        )
+
     # Disabling any manual change/add/delete in admin panel
     def has_change_permission(self, request, obj=None):
         return False
@@ -127,18 +144,21 @@ class UserAgentDeviceModelAdmin(admin.ModelAdmin):
 
     # Total number of requests for this device
     def total_requests(self, obj):
-        return obj.requests.count()
+        return obj.request_count
 
     total_requests.short_description = _('Total Requests')
+    total_requests.admin_order_field = 'request_count'
 
     # Requests made in the last 24 hours
     def requests_last_24h(self, obj):
-        return obj.requests.filter(created_dt__gte=now() - timedelta(hours=24)).count()
+        return obj.requests_24h_count
 
     requests_last_24h.short_description = _('Requests (24h)')
+    requests_last_24h.admin_order_field = 'requests_24h_count'
 
     # Requests made in the last 1 hour
     def requests_last_hour(self, obj):
-        return obj.requests.filter(created_dt__gte=now() - timedelta(hours=1)).count()
+        return obj.requests_1h_count
 
     requests_last_hour.short_description = _('Requests (1h)')
+    requests_last_hour.admin_order_field = 'requests_1h_count'
@@ -1,31 +1,41 @@
+import json
+
 from django.contrib import admin
 from django.utils.html import format_html
 from django.utils.translation import gettext_lazy as _
 
 from djangouseragents.models import UserAgentRequestModel
+from djangouseragents.utils import key_to_digest
+from .pagination import EstimatedCountPaginator, KeysetChangeList
 
 
 @admin.register(UserAgentRequestModel)
 class UserAgentRequestModelAdmin(admin.ModelAdmin):
-    ordering = ('-created_dt',)
+    ordering = ('-created_dt', '-id')
     permission_resource = "user_agent_request"
 
+    # The request log is too large for COUNT(*) and deep OFFSETs
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    list_select_related = ('uad', 'endpoint_ref')
+    raw_id_fields = ('uad',)
+
     list_display = (
         'uad',
         'created_dt',
         'status_display',
-        'endpoint',
+        'endpoint_display',
         'response_status_code_display',
         'rn',
         'rn_ph',
         'rn_24h',
     )
 
+    # Exact matches use the user_id / ip indexes; icontains cannot. Device keys
+    # are matched through key_digest in get_search_results.
     search_fields = (
-        'uad__id',
-        'uad__user_id',
-        'uad__ip',
-        'uad__key',
+        '=uad__user_id',
+        '=uad__ip',
     )
     list_filter = (
         'status',
@@ -33,16 +43,20 @@ class UserAgentRequestModelAdmin(admin.ModelAdmin):
     )
     readonly_fields = (
         'created_dt',
+        'endpoint_display',
+        'get_display',
+        'headers_display',
+        'cookies_display',
     )
 
     fieldsets = (
         (_('Base Info'), {
             'fields': (
                 'uad',
-                ('method', 'endpoint', 'response_status_code'),
-                'get',
-                'headers',
-                'cookies',
+                ('method', 'endpoint_display', 'response_status_code'),
+                'get_display',
+                'headers_display',
+                'cookies_display',
                 ('rn', 'rn_ph', 'rn_24h'),
                 ('status', 'status_color'),
                 'created_dt',
@@ -50,6 +64,22 @@ class UserAgentRequestModelAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return KeysetChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Device ids are matched separately: '=uad__id' would fail on
+        # non-numeric terms
+        base = queryset
+        queryset, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term)
+        term = search_term.strip()
+        if term.isdigit():
+            queryset |= base.filter(uad_id=int(term))
+        if term:
+            queryset |= base.filter(uad__key_digest=key_to_digest(term))
+        return queryset, may_have_duplicates
+
     def has_change_permission(self, request, obj=None):
         return False
 
@@ -59,6 +89,36 @@ class UserAgentRequestModelAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         return False
 
+    # Logged request data, read from the header set / compressed payload
+    # when used
+    @staticmethod
+    def _json_display(data):
+        if data is None:
+            return '-'
+        return format_html(
+            '<pre>{}</pre>',
+            json.dumps(data, indent=2, sort_keys=True, default=str))
+
+    def endpoint_display(self, obj):
+        return obj.endpoint_path
+
+    endpoint_display.short_description = _('Endpoint')
+
+    def get_display(self, obj):
+        return self._json_display(obj.request_get)
+
+    get_display.short_description = _('GET')
+
+    def headers_display(self, obj):
+        return self._json_display(obj.request_headers)
+
+    headers_display.short_description = _('Headers')
+
+    def cookies_display(self, obj):
+        return self._json_display(obj.request_cookies)
+
+    cookies_display.short_description = _('Cookies')
+
     # Display status with background color
     def status_display(self, obj):
         return format_html(
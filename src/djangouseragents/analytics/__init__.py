@@ -0,0 +1 @@
+from .queries import new_devices_per_day, requests_per_hour, top_endpoints
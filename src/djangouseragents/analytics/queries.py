@@ -0,0 +1,88 @@
+from datetime import datetime, timezone
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDate
+from django.utils.timezone import now as dj_now, timedelta
+
+from djangouseragents.models import (
+    UserAgentEndpointRollupModel,
+    UserAgentTrafficRollupModel,
+)
+
+TRAFFIC_DIMENSIONS = ('browser_family', 'os_family', 'is_bot')
+
+# Every query reads only the hourly rollups, never the raw request log.
+
+
+def _range(
+    qs, since: datetime | None, until: datetime | None, default: timedelta,
+):
+    qs = qs.filter(hour__gte=since or dj_now() - default)
+    if until is not None:
+        qs = qs.filter(hour__lt=until)
+    return qs
+
+
+def requests_per_hour(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    by: tuple[str, ...] = (),
+) -> list[dict]:
+    """
+    Requests per hour (last 24 hours by default), optionally broken down
+    by any of ``browser_family``, ``os_family`` and ``is_bot``.
+    """
+    unknown = set(by) - set(TRAFFIC_DIMENSIONS)
+    if unknown:
+        raise ValueError(
+            f'Cannot group by {", ".join(sorted(unknown))}; '
+            f'choose from {TRAFFIC_DIMENSIONS}.')
+    qs = _range(
+        UserAgentTrafficRollupModel.objects.all(), since, until,
+        timedelta(hours=24))
+    # Rows holding only devices created in an hour without logged requests
+    qs = qs.filter(requests__gt=0)
+    return list(
+        qs.values('hour', *by)
+        .annotate(requests=Sum('requests'))
+        .order_by('hour', *by)
+    )
+
+
+def top_endpoints(
+    since: datetime | None = None,
+    until: datetime | None = None,
+    status_code: int | None = None,
+    limit: int = 10,
+) -> list[dict]:
+    """
+    The busiest endpoints per response status code (last 24 hours by
+    default).
+    """
+    qs = _range(
+        UserAgentEndpointRollupModel.objects.all(), since, until,
+        timedelta(hours=24))
+    if status_code is not None:
+        qs = qs.filter(response_status_code=status_code)
+    return list(
+        qs.values('endpoint__path', 'response_status_code')
+        .annotate(requests=Sum('requests'))
+        .order_by('-requests', 'endpoint__path')[:limit]
+    )
+
+
+def new_devices_per_day(
+    since: datetime | None = None, until: datetime | None = None,
+) -> list[dict]:
+    """
+    Devices created per (UTC) day, last 30 days by default.
+    """
+    qs = _range(
+        UserAgentTrafficRollupModel.objects.all(), since, until,
+        timedelta(days=30))
+    return list(
+        qs.annotate(day=TruncDate('hour', tzinfo=timezone.utc))
+        .values('day')
+        .annotate(new_devices=Sum('new_devices'))
+        .order_by('day')
+    )
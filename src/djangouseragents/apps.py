@@ -6,3 +6,7 @@ class DjangoUseragentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'djangouseragents'
     verbose_name = _('Django User Agents')
+
+    def ready(self):
+        # Connects the device cache invalidation receivers
+        from djangouseragents.services import device_cache  # noqa: F401
@@ -0,0 +1,100 @@
+from django.conf import settings
+
+# Every setting is read as ``USERAGENTS_<NAME>`` from the project settings and
+# falls back to the value below.
+DEFAULTS = {
+    # Width of a rolling request-counter bucket; rn_ph / rn_24h may
+    # over-count by at most one bucket at the start of their window.
+    'COUNTER_BUCKET_SECONDS': 60,
+    # Seconds between the deletes of buckets older than 24h, run by every
+    # process while it logs requests; None leaves them to
+    # prune_useragent_requests
+    'COUNTER_PRUNE_INTERVAL': 300,
+    # Device key hashing: 'md5' (keys stay compatible), 'blake2b' or 'xxhash'
+    'KEY_HASHER': 'md5',
+    'KEY_DIGEST_SIZE': 16,  # blake2b only, in bytes
+    # Default age in days for prune_useragent_requests
+    'REQUEST_RETENTION_DAYS': 90,
+    # Default age in days of the hourly analytics rollups it deletes; None
+    # keeps them
+    'ROLLUP_RETENTION_DAYS': 365,
+    # 'day' or 'month' to range-partition the request log on PostgreSQL, see
+    # djangouseragents.db.PartitionRequestLog
+    'REQUEST_LOG_PARTITIONING': None,
+    # Where request-log entries go; use SyncRequestLogSink in tests
+    'LOG_SINK': (
+        'djangouseragents.services.request_log_sinks.BufferedRequestLogSink'
+    ),
+    'LOG_SINK_OPTIONS': {},
+    # Directory of the SpoolRequestLogSink files, drained by
+    # ingest_useragent_requests
+    'LOG_SPOOL_DIR': None,
+    # Lifetime of the UAD cookie, in seconds
+    'COOKIE_MAX_AGE': 60 * 60 * 24 * 365,
+    # Sign the UAD cookie (device id, key and user, see services.uad_cookie) so
+    # returning devices resolve without a query; it is only re-sent when its
+    # identity changes or it expires within SIGNED_COOKIE_RENEW_WITHIN seconds
+    'SIGNED_COOKIE': False,
+    'SIGNED_COOKIE_RENEW_WITHIN': 60 * 60 * 24 * 30,
+    # Two-tier (in-process LRU + Django cache) device lookup by key
+    'DEVICE_CACHE': True,
+    'DEVICE_CACHE_ALIAS': 'default',  # None keeps the cache in-process only
+    'DEVICE_CACHE_TIMEOUT': 60 * 60,
+    'DEVICE_CACHE_LOCAL_MAXSIZE': 10_000,
+    'DEVICE_CACHE_LOCAL_TIMEOUT': 60,
+    # Distinct User-Agent headers whose parsed fields are kept in memory
+    'USER_AGENT_CACHE_SIZE': 1000,
+    # Request logging rules, see services.request_log_rules.RequestLogRule
+    'LOG_RULES': [],
+    'LOG_SAMPLE_RATE': 1.0,  # for requests no rule matches
+    'LOG_ERROR_STATUS': 500,  # always log responses >= this; None to disable
+    # What is logged as the endpoint: 'path', 'route' (the URL pattern) or the
+    # dotted path of a callable taking the request. Paths with ids in them
+    # make one endpoint (and rollup row) per id: prefer 'route' for analytics
+    'LOG_ENDPOINT_MODE': 'path',
+    # Headers / cookies written to the request log: allow-lists (None = all)
+    # and names whose values are replaced by a marker. None redacts the
+    # session and CSRF cookies.
+    'LOG_HEADERS': None,
+    'LOG_REDACTED_HEADERS': [
+        'Authorization', 'Proxy-Authorization', 'Cookie', 'X-CSRFToken',
+    ],
+    'LOG_COOKIES': None,
+    'LOG_REDACTED_COOKIES': None,
+    # Store each distinct header set once and reference it by hash
+    'LOG_HEADER_SETS': True,
+    # Per-request headers kept on the request row instead of in its header
+    # set, so they do not make every set distinct
+    'LOG_VOLATILE_HEADERS': [
+        'X-Request-Id', 'X-Correlation-Id', 'X-Amzn-Trace-Id', 'Traceparent',
+        'Tracestate', 'Sentry-Trace', 'Baggage', 'X-B3-TraceId', 'X-B3-SpanId',
+        'X-B3-ParentSpanId', 'X-B3-Sampled', 'Cf-Ray', 'X-Forwarded-For',
+        'X-Real-Ip', 'Content-Length', 'If-None-Match', 'If-Modified-Since',
+    ],
+    # Store GET and cookie data as zlib-compressed JSON
+    'LOG_COMPRESS_PAYLOAD': False,
+    # Real-time per-client request rate, checked before the view (None
+    # disables); clients whose status is in RATE_THROTTLE_STATUSES get a 429
+    'RATE_TRACKER': 'djangouseragents.services.rate_tracker.LocMemRateTracker',
+    'RATE_TRACKER_OPTIONS': {},
+    'RATE_THROTTLE_STATUSES': [],
+    # Reverse proxies in front of the site that append to X-Forwarded-For;
+    # without a signed cookie clients are counted by the address the
+    # outermost one saw (0: REMOTE_ADDR, the header is ignored)
+    'RATE_TRUSTED_PROXIES': 0,
+    # Maintain the hourly analytics rollups while writing the request log
+    'ANALYTICS_ROLLUPS': True,
+    # Admin changelists show a planner estimate instead of COUNT(*) above this
+    'ADMIN_EXACT_COUNT_THRESHOLD': 10_000,
+    # Max concurrent log writes scheduled by the middleware under ASGI
+    'ASYNC_LOG_CONCURRENCY': 10,
+    # Middleware metrics backend, see services.metrics (None disables metrics);
+    # metrics_view serves the in-process registry to staff and these client IPs
+    'METRICS_BACKEND': None,
+    'METRICS_BACKEND_OPTIONS': {},
+    'METRICS_ALLOWED_IPS': [],
+}
+
+
+def get_setting(name: str):
+    return getattr(settings, f'USERAGENTS_{name}', DEFAULTS[name])
@@ -0,0 +1,2 @@
+from .fields import FixedBinaryField
+from .partitioning import PartitionRequestLog
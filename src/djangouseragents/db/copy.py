@@ -0,0 +1,37 @@
+from django.db import connections
+
+
+def supports_copy(connection) -> bool:
+    """
+    COPY FROM STDIN needs PostgreSQL through psycopg 3, whose cursors stream
+    rows adapted like query parameters. psycopg2 would need every value
+    rendered to COPY text by hand.
+    """
+    if connection.vendor != 'postgresql':
+        return False
+    from django.db.backends.postgresql.psycopg_any import is_psycopg3
+
+    return is_psycopg3
+
+
+def copy_insert(model, objs: list, using: str) -> None:
+    """
+    Insert unsaved model instances with ``COPY ... FROM STDIN``. Values are
+    prepared as for an INSERT (pre_save, get_db_prep_save); primary keys are
+    not read back.
+    """
+    connection = connections[using]
+    meta = model._meta
+    fields = [f for f in meta.concrete_fields if not f.primary_key]
+    qn = connection.ops.quote_name
+    sql = 'COPY {table} ({columns}) FROM STDIN'.format(
+        table=qn(meta.db_table),
+        columns=', '.join(qn(f.column) for f in fields),
+    )
+    with connection.cursor() as cursor:
+        with cursor.cursor.copy(sql) as copy:
+            for obj in objs:
+                copy.write_row([
+                    f.get_db_prep_save(f.pre_save(obj, add=True), connection)
+                    for f in fields
+                ])
@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class FixedBinaryField(models.BinaryField):
+    """
+    BinaryField stored in a column that can carry a unique index on every
+    backend: ``varbinary(max_length)`` on MySQL, whose BLOB columns cannot be
+    indexed without a prefix length.
+    """
+
+    def db_type(self, connection):
+        if connection.vendor == 'mysql':
+            return f'varbinary({self.max_length})'
+        return super().db_type(connection)
@@ -0,0 +1,287 @@
+import re
+from datetime import datetime, timedelta, timezone
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import migrations
+from django.db.backends.utils import truncate_name
+from django.utils.dateparse import parse_datetime
+
+from djangouseragents.conf import get_setting
+
+INTERVALS = ('day', 'month')
+
+_BOUND_RE = re.compile(
+    r"FROM \((?:'(?P<lower>[^']*)'|MINVALUE)\) TO \('(?P<upper>[^']*)'\)")
+
+
+def period_start(dt: datetime, interval: str) -> datetime:
+    """
+    Start (in UTC) of the day / month partition that ``dt`` falls into.
+    """
+    dt = dt.astimezone(timezone.utc).replace(
+        hour=0, minute=0, second=0, microsecond=0)
+    return dt.replace(day=1) if interval == 'month' else dt
+
+
+def next_period(start: datetime, interval: str) -> datetime:
+    if interval == 'month':
+        return (start.replace(day=1) + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def get_interval(interval: str | None = None) -> str | None:
+    interval = interval or get_setting('REQUEST_LOG_PARTITIONING')
+    if interval is not None and interval not in INTERVALS:
+        raise ImproperlyConfigured(
+            f"USERAGENTS_REQUEST_LOG_PARTITIONING must be one of "
+            f"{INTERVALS} or None, not {interval!r}.")
+    return interval
+
+
+def _name(connection, table: str, suffix: str) -> str:
+    return truncate_name(
+        f'{table}_{suffix}', connection.ops.max_name_length())
+
+
+def partition_name(
+    connection, table: str, start: datetime, interval: str,
+) -> str:
+    suffix = start.strftime('p%Y%m' if interval == 'month' else 'p%Y%m%d')
+    return _name(connection, table, suffix)
+
+
+def is_partitioned(connection, table: str) -> bool:
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table '
+            'WHERE partrelid = to_regclass(%s)',
+            [table],
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions(
+    connection, table: str,
+) -> list[tuple[str, datetime | None, datetime | None]]:
+    """
+    (name, lower bound, upper bound) of every partition of ``table``, ordered
+    by lower bound. The default partition has no bounds; the partition
+    holding the pre-partitioning rows has no lower bound.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) '
+            'FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid '
+            'WHERE i.inhparent = to_regclass(%s)',
+            [table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            partitions.append((name, None, None))
+            continue
+        lower, upper = match.group('lower'), match.group('upper')
+        partitions.append(
+            (name, lower and parse_datetime(lower), parse_datetime(upper)))
+    oldest = datetime.min.replace(tzinfo=timezone.utc)
+    partitions.sort(key=lambda p: (p[2] is not None, p[1] or oldest))
+    return partitions
+
+
+def _bounds(start: datetime | None, end: datetime) -> str:
+    lower = f"'{start.isoformat()}'" if start is not None else 'MINVALUE'
+    return f"FOR VALUES FROM ({lower}) TO ('{end.isoformat()}')"
+
+
+def create_partition(
+    connection, table: str, start: datetime, interval: str,
+) -> str | None:
+    """
+    Create and attach the partition starting at ``start``. Rows of that
+    range already in the default partition are moved into it. Returns the
+    name of the new partition, or None when it already exists.
+    """
+    qn = connection.ops.quote_name
+    name = partition_name(connection, table, start, interval)
+    partitions = list_partitions(connection, table)
+    if any(p[0] == name for p in partitions):
+        return None
+    end = next_period(start, interval)
+    default = next((p[0] for p in partitions if p[2] is None), None)
+
+    with connection.cursor() as cursor:
+        # Built standalone and attached, which only needs a SHARE UPDATE
+        # EXCLUSIVE lock on the parent instead of blocking inserts.
+        cursor.execute(
+            f'CREATE TABLE {qn(name)} (LIKE {qn(table)} '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        if default is not None:
+            cursor.execute(
+                f'WITH moved AS (DELETE FROM {qn(default)} '
+                f'WHERE created_dt >= %s AND created_dt < %s RETURNING *) '
+                f'INSERT INTO {qn(name)} SELECT * FROM moved',
+                [start, end],
+            )
+        cursor.execute(
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} '
+            f'{_bounds(start, end)}')
+    return name
+
+
+class PartitionRequestLog(migrations.operations.base.Operation):
+    """
+    Convert the UserAgentRequest table into a table range-partitioned on
+    created_dt by ``interval`` (``'day'`` or ``'month'``, default:
+    USERAGENTS_REQUEST_LOG_PARTITIONING).
+
+    Existing rows stay where they are: the old table is attached as the
+    partition of everything before the next period, a default partition
+    catches rows no partition covers, and ``ahead`` partitions are created
+    after it. The primary key becomes ``(id, created_dt)`` since PostgreSQL
+    requires the partition key in it. A no-op on other databases or when no
+    interval is configured. Not reversible.
+    """
+
+    reversible = False
+
+    def __init__(self, interval: str | None = None, ahead: int = 2):
+        self.interval = interval
+        self.ahead = ahead
+
+    def deconstruct(self):
+        kwargs = {}
+        if self.interval is not None:
+            kwargs['interval'] = self.interval
+        if self.ahead != 2:
+            kwargs['ahead'] = self.ahead
+        return self.__class__.__qualname__, [], kwargs
+
+    def state_forwards(self, app_label, state):
+        pass
+
+    def database_forwards(
+        self, app_label, schema_editor, from_state, to_state,
+    ):
+        connection = schema_editor.connection
+        interval = get_interval(self.interval)
+        if interval is None or connection.vendor != 'postgresql':
+            return
+        model = to_state.apps.get_model(
+            'djangouseragents', 'UserAgentRequest')
+        table = model._meta.db_table
+        if is_partitioned(connection, table):
+            return
+
+        qn = connection.ops.quote_name
+        legacy = _name(connection, table, 'legacy')
+        sequence = _name(connection, table, 'id_seq')
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT COALESCE(MAX(id), 0), MAX(created_dt) '
+                f'FROM {qn(table)}')
+            max_id, max_created_dt = cursor.fetchone()
+            cursor.execute(
+                'SELECT con.conname, pg_get_constraintdef(con.oid) '
+                'FROM pg_constraint con '
+                "WHERE con.conrelid = %s::regclass AND con.contype = 'f'",
+                [table],
+            )
+            foreign_keys = cursor.fetchall()
+            cursor.execute(
+                'SELECT con.conname FROM pg_constraint con '
+                "WHERE con.conrelid = %s::regclass AND con.contype = 'p'",
+                [table],
+            )
+            primary_key = cursor.fetchone()[0]
+            cursor.execute(
+                'SELECT c.relname, pg_get_indexdef(i.indexrelid) '
+                'FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid '
+                'WHERE i.indrelid = %s::regclass AND NOT i.indisprimary',
+                [table],
+            )
+            indexes = cursor.fetchall()
+
+        now = datetime.now(timezone.utc)
+        latest = max(filter(None, [now, max_created_dt]))
+        boundary = next_period(period_start(latest, interval), interval)
+
+        statements = [
+            f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}',
+            f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(primary_key)}',
+            # Frees the id sequence name; the parent gets its own sequence
+            # below
+            f'ALTER TABLE {qn(legacy)} '
+            f'ALTER COLUMN id DROP IDENTITY IF EXISTS',
+            f'ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP DEFAULT',
+            f'DROP SEQUENCE IF EXISTS {qn(sequence)}',
+        ]
+        statements += [
+            f'ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}'
+            for name, _ in foreign_keys
+        ]
+        statements += [
+            f'ALTER INDEX {qn(name)} '
+            f'RENAME TO {qn(_name(connection, name, "legacy"))}'
+            for name, _ in indexes
+        ]
+        statements += [
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} '
+            f'INCLUDING DEFAULTS INCLUDING CONSTRAINTS '
+            f'INCLUDING STORAGE INCLUDING COMMENTS) '
+            f'PARTITION BY RANGE (created_dt)',
+            f'CREATE SEQUENCE {qn(sequence)} AS bigint '
+            f'START WITH {max_id + 1} OWNED BY {qn(table)}.id',
+            f'ALTER TABLE {qn(table)} '
+            f"ALTER COLUMN id SET DEFAULT nextval('{sequence}')",
+            f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(primary_key)} '
+            f'PRIMARY KEY (id, created_dt)',
+        ]
+        statements += [
+            f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}'
+            for name, definition in foreign_keys
+        ]
+        # "CREATE [UNIQUE] INDEX name ON [ONLY] schema.table USING ..."
+        # -> same index on the parent
+        statements += [
+            re.sub(
+                r' ON (ONLY )?\S+ USING ', f' ON {qn(table)} USING ',
+                definition, count=1,
+            )
+            for _, definition in indexes
+        ]
+        default = _name(connection, table, 'default')
+        statements += [
+            f'ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} '
+            f'{_bounds(None, boundary)}',
+            f'CREATE TABLE {qn(default)} PARTITION OF {qn(table)} DEFAULT',
+        ]
+        start = boundary
+        for _ in range(self.ahead):
+            end = next_period(start, interval)
+            name = partition_name(connection, table, start, interval)
+            statements.append(
+                f'CREATE TABLE {qn(name)} '
+                f'PARTITION OF {qn(table)} {_bounds(start, end)}'
+            )
+            start = end
+
+        for sql in statements:
+            schema_editor.execute(sql, params=None)
+
+    def database_backwards(
+        self, app_label, schema_editor, from_state, to_state,
+    ):
+        raise NotImplementedError('PartitionRequestLog cannot be reversed.')
+
+    def describe(self):
+        return 'Partition the request log table by created_dt'
+
+    @property
+    def migration_name_fragment(self):
+        return 'partition_request_log'
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from djangouseragents.models import (
+    UserAgentEndpointModel,
+    UserAgentRequestModel,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Point request-log rows written before endpoints were interned at "
+        "their UserAgentEndpoint row, and clear their endpoint text."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Number of requests updated per query.',
+        )
+
+    def handle(self, *args, batch_size, **options):
+        requests = UserAgentRequestModel.objects
+        qs = requests.filter(endpoint__isnull=False).order_by('pk')
+
+        last_pk = 0
+        updated = 0
+        while True:
+            batch = list(
+                qs.filter(pk__gt=last_pk).only('pk', 'endpoint')[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            ids = UserAgentEndpointModel.objects.intern(
+                obj.endpoint for obj in batch)
+            for obj in batch:
+                obj.endpoint_ref_id = ids[obj.endpoint]
+                obj.endpoint = None
+            requests.bulk_update(batch, ['endpoint_ref', 'endpoint'])
+            updated += len(batch)
+            self.stdout.write(f'Updated {updated} requests')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {updated} requests linked to endpoints.'))
@@ -0,0 +1,101 @@
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+
+from djangouseragents.models.user_agent_request import StatusChoices
+from djangouseragents.services.export import (
+    DATASETS,
+    FORMATS,
+    export,
+    get_export_queryset,
+    iter_rows,
+    parse_bound,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream UserAgentDevice or UserAgentRequest rows as CSV, NDJSON or "
+        "Parquet in primary-key order with bounded memory. The last exported "
+        "id is reported so an interrupted export can continue with "
+        "--after-id."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=list(DATASETS))
+        parser.add_argument(
+            '--format', dest='fmt', choices=list(FORMATS), default='csv',
+            help='Output format; parquet needs pyarrow.',
+        )
+        parser.add_argument(
+            '--output', '-o', default='-',
+            help='File to write to (default: stdout).',
+        )
+        parser.add_argument(
+            '--since',
+            help='Only rows created at or after this date / datetime.')
+        parser.add_argument(
+            '--until', help='Only rows created before this date / datetime.')
+        parser.add_argument(
+            '--status', dest='statuses', action='append', default=[],
+            choices=StatusChoices.values,
+            help='Only requests with this status (repeatable).',
+        )
+        parser.add_argument('--device', type=int, help='Only this device id.')
+        parser.add_argument(
+            '--after-id', type=int, help='Resume after this primary key.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Rows fetched per round trip (and per Parquet row group).',
+        )
+
+    def handle(
+        self, *args, dataset, fmt, output, since, until, statuses, device,
+        after_id, chunk_size, **options,
+    ):
+        try:
+            qs = get_export_queryset(
+                dataset,
+                since=parse_bound(since),
+                until=parse_bound(until),
+                statuses=statuses,
+                device=device,
+                after_id=after_id,
+            )
+        except ValueError as e:
+            raise CommandError(e)
+
+        exported = 0
+        last_id = after_id
+
+        def tracked(rows):
+            nonlocal exported, last_id
+            for row in rows:
+                exported += 1
+                last_id = row['id']
+                yield row
+
+        try:
+            rows = tracked(iter_rows(dataset, qs, chunk_size=chunk_size))
+            chunks = export(dataset, rows, fmt, chunk_size)
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+
+        binary = fmt == 'parquet'
+        if output == '-':
+            self._write(chunks, sys.stdout.buffer if binary else sys.stdout)
+        elif binary:
+            with open(output, 'wb') as stream:
+                self._write(chunks, stream)
+        else:
+            with open(output, 'w', newline='', encoding='utf-8') as stream:
+                self._write(chunks, stream)
+
+        self.stderr.write(f'Exported {exported} {dataset}; last id: {last_id}')
+
+    @staticmethod
+    def _write(chunks, stream) -> None:
+        for chunk in chunks:
+            stream.write(chunk)
+        stream.flush()
@@ -0,0 +1,232 @@
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpRequest
+from django.urls import Resolver404, resolve
+
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.schemas.uad_schema import get_device_fields
+from djangouseragents.schemas.user_agent_parser import (
+    USER_AGENT_FIELDS,
+    parse_user_agent_strings,
+)
+from djangouseragents.services.access_log import (
+    COMBINED_PATTERN,
+    TIME_FORMAT,
+    AccessLogParser,
+    open_access_log,
+    parse_query,
+)
+from djangouseragents.services.request_log_endpoints import (
+    get_endpoint_normalizer,
+    path_endpoint,
+)
+from djangouseragents.services.request_log_payload import (
+    get_request_payload_filter,
+)
+from djangouseragents.utils import LRUCache
+
+# Bounds the memory of the caches kept across chunks
+CACHE_SIZE = 100_000
+
+
+class Command(BaseCommand):
+    help = (
+        "Import the history of a service from nginx / gunicorn access logs "
+        "(combined format, plain or gzipped) into the device and request "
+        "tables. Distinct user agents are parsed once, in a process pool; "
+        "devices are upserted and requests inserted in bulk, one chunk of "
+        "lines at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'paths', nargs='+', help='Log files to import; - reads stdin.')
+        parser.add_argument(
+            '--pattern', default=COMBINED_PATTERN,
+            help='Regex with the named groups ip, time, method, target and '
+                 'status (optionally referer and user_agent). Defaults to '
+                 'the combined log format.',
+        )
+        parser.add_argument(
+            '--time-format', default=TIME_FORMAT,
+            help='strptime format of the time group (default: %(default)s).',
+        )
+        parser.add_argument(
+            '--workers', type=int, default=min(4, os.cpu_count() or 1),
+            help='User-agent parsing processes; 1 parses in this process '
+                 '(default: %(default)s).',
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=10_000,
+            help='Lines read, and requests inserted, per transaction.',
+        )
+
+    def handle(
+        self, *args, paths, pattern, time_format, workers, chunk_size,
+        **options,
+    ):
+        try:
+            self.parser = AccessLogParser(pattern, time_format)
+        except Exception as e:
+            raise CommandError(f'Invalid --pattern: {e}')
+        # UA string -> parsed fields
+        self.user_agents = LRUCache(maxsize=CACHE_SIZE)
+        # (UA string, IP) -> device pk
+        self.device_ids = LRUCache(maxsize=CACHE_SIZE)
+        # path -> logged endpoint
+        self.endpoints = LRUCache(maxsize=CACHE_SIZE)
+        self.normalizer = get_endpoint_normalizer()
+        self.payload_filter = get_request_payload_filter()
+
+        self.pool = None
+        if workers > 1:
+            # Forked workers must not share the parent's database connections
+            connections.close_all()
+            self.pool = ProcessPoolExecutor(workers, initializer=django.setup)
+        self.workers = workers
+
+        lines = imported = skipped = 0
+        started = time.monotonic()
+        try:
+            for path in paths:
+                try:
+                    log = open_access_log(path)
+                except OSError as e:
+                    raise CommandError(e)
+                with log:
+                    while chunk := list(islice(log, chunk_size)):
+                        records = [
+                            r for r in map(self.parser.parse, chunk)
+                            if r is not None
+                        ]
+                        skipped += len(chunk) - len(records)
+                        imported += self._import(records)
+                        lines += len(chunk)
+                        self._report(lines, imported, skipped, started)
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown()
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {lines} lines, {imported} requests imported, '
+            f'{skipped} lines skipped in {elapsed:.1f}s '
+            f'({lines / elapsed if elapsed else 0:.0f} lines/s).'
+        ))
+
+    def _report(
+        self, lines: int, imported: int, skipped: int, started: float,
+    ) -> None:
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{lines} lines, {imported} imported, {skipped} skipped, '
+            f'{lines / elapsed if elapsed else 0:.0f} lines/s'
+        )
+
+    def _import(self, records) -> int:
+        if not records:
+            return 0
+        user_agents = self._parse_user_agents({r.user_agent for r in records})
+        device_ids = self._get_device_ids(records, user_agents)
+        entries = []
+        for r in records:
+            headers = [('User-Agent', r.user_agent)]
+            if r.referer and r.referer != '-':
+                headers.append(('Referer', r.referer))
+            entries.append({
+                'uad_id': device_ids[(r.user_agent, r.ip)],
+                'endpoint': self._get_endpoint(r.path),
+                'response_status_code': r.status,
+                'method': r.method,
+                'get': parse_query(r.query),
+                'headers': self.payload_filter.filter_header_items(headers),
+                'cookies': {},
+                'created_dt': r.created_dt,
+            })
+        UserAgentRequestModel.objects.create_from_entries(entries)
+        return len(entries)
+
+    def _parse_user_agents(self, ua_strings: set[str]) -> dict[str, tuple]:
+        """
+        Parsed fields of every distinct user agent of a chunk; those not seen
+        before are parsed by the pool.
+        """
+        parsed = {}
+        missing = []
+        for ua_string in ua_strings:
+            fields = self.user_agents.get(ua_string)
+            if fields is None:
+                missing.append(ua_string)
+            else:
+                parsed[ua_string] = fields
+        if not missing:
+            return parsed
+
+        if self.pool is None:
+            results = parse_user_agent_strings(missing)
+        else:
+            size = math.ceil(len(missing) / (self.workers * 4))
+            batches = self.pool.map(
+                parse_user_agent_strings,
+                [missing[i:i + size] for i in range(0, len(missing), size)],
+            )
+            results = [fields for batch in batches for fields in batch]
+        for ua_string, fields in zip(missing, results):
+            parsed[ua_string] = fields
+            self.user_agents.set(ua_string, fields)
+        return parsed
+
+    def _get_device_ids(
+        self, records, user_agents: dict[str, tuple],
+    ) -> dict[tuple, int]:
+        """
+        Device pk per (user agent, IP) of a chunk, creating the devices not
+        seen before; new devices are dated from their first line.
+        """
+        ids = {}
+        pending = {}
+        for r in records:
+            pair = (r.user_agent, r.ip)
+            if pair in ids or pair in pending:
+                continue
+            pk = self.device_ids.get(pair)
+            if pk is not None:
+                ids[pair] = pk
+                continue
+            parsed = dict(zip(USER_AGENT_FIELDS, user_agents[r.user_agent]))
+            fields = get_device_fields(user_id=None, ip=r.ip, parsed=parsed)
+            fields['created_dt'] = r.created_dt
+            pending[pair] = fields
+
+        if pending:
+            by_key = UserAgentDeviceModel.objects.bulk_get_or_create_by_key(
+                list(pending.values()))
+            for pair, fields in pending.items():
+                ids[pair] = by_key[fields['key']]
+                self.device_ids.set(pair, ids[pair])
+        return ids
+
+    def _get_endpoint(self, path: str) -> str:
+        if self.normalizer is path_endpoint:
+            return path
+        endpoint = self.endpoints.get(path)
+        if endpoint is None:
+            request = HttpRequest()
+            request.path = request.path_info = path
+            try:
+                request.resolver_match = resolve(path)
+            except Resolver404:
+                request.resolver_match = None
+            endpoint = self.normalizer(request)
+            self.endpoints.set(path, endpoint)
+        return endpoint
@@ -0,0 +1,133 @@
+import os
+import time
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, transaction
+
+from djangouseragents.conf import get_setting
+from djangouseragents.models import (
+    UserAgentRequestModel,
+    UserAgentRequestSpoolCheckpointModel,
+)
+from djangouseragents.services.request_log_spool import (
+    ClaimedFile,
+    SpoolDirectory,
+    decode_entry,
+)
+
+# Attempts per batch, e.g. when concurrent ingesters deadlock on counter rows
+ATTEMPTS = 3
+
+
+class Command(BaseCommand):
+    help = (
+        "Load the request-log spool written by SpoolRequestLogSink into "
+        "UserAgentRequest: COPY FROM STDIN on PostgreSQL (psycopg 3), bulk "
+        "INSERTs elsewhere. Every batch commits together with a per-file "
+        "checkpoint, so the command can be killed and restarted at any time, "
+        "and several instances can drain the same directory."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default=None,
+            help='Spool directory (default: USERAGENTS_LOG_SPOOL_DIR).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Records loaded per transaction.',
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Exit when the spool is drained instead of waiting for new '
+                 'files.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=1.0,
+            help='Seconds to wait for new files when the spool is empty.',
+        )
+        parser.add_argument(
+            '--claim-grace', type=float, default=10.0,
+            help='Age in seconds after which the claim of a dead ingester is '
+                 'taken over.',
+        )
+
+    def handle(
+        self, *args, directory, batch_size, once, sleep, claim_grace,
+        **options,
+    ):
+        directory = directory or get_setting('LOG_SPOOL_DIR')
+        if not directory:
+            raise CommandError(
+                'Pass --directory or set USERAGENTS_LOG_SPOOL_DIR.')
+        try:
+            spool = SpoolDirectory(directory, claim_grace=claim_grace)
+        except ImproperlyConfigured as e:
+            raise CommandError(e)
+
+        files = loaded = 0
+        started = time.monotonic()
+        try:
+            while True:
+                spool.release_abandoned()
+                claimed = spool.claim()
+                if claimed is None:
+                    if once:
+                        break
+                    time.sleep(sleep)
+                    continue
+                with claimed.file:
+                    loaded += self._ingest(claimed, batch_size)
+                files += 1
+        except KeyboardInterrupt:
+            pass
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {loaded} requests from {files} spool files '
+            f'in {elapsed:.1f}s.'))
+
+    def _ingest(self, claimed: ClaimedFile, batch_size: int) -> int:
+        checkpoint, _ = (
+            UserAgentRequestSpoolCheckpointModel.objects.get_or_create(
+                name=claimed.name)
+        )
+        claimed.file.seek(checkpoint.offset)
+        loaded = 0
+        while True:
+            start = claimed.file.tell()
+            payloads, end = SpoolDirectory.read(claimed.file, batch_size)
+            if payloads:
+                entries = [decode_entry(p) for p in payloads]
+                self._load(checkpoint, entries, end, claimed, start)
+                loaded += len(payloads)
+            if len(payloads) < batch_size:
+                break
+
+        # The file goes first: a checkpoint left behind is harmless, a file
+        # left without its checkpoint would be loaded again
+        os.remove(claimed.path)
+        checkpoint.delete()
+        self.stdout.write(f'{claimed.name}: {loaded} requests')
+        return loaded
+
+    def _load(
+        self, checkpoint, entries: list[dict], end: int,
+        claimed: ClaimedFile, start: int,
+    ) -> None:
+        checkpoints = UserAgentRequestSpoolCheckpointModel.objects
+        for attempt in range(1, ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    UserAgentRequestModel.objects.create_from_entries(
+                        entries, copy=True)
+                    checkpoints.filter(pk=checkpoint.pk).update(offset=end)
+                checkpoint.offset = end
+                return
+            except DatabaseError as e:
+                where = f'{claimed.name} at offset {start}'
+                if attempt == ATTEMPTS:
+                    raise CommandError(f'{where}: {e}')
+                self.stderr.write(f'{where}: {e}; retrying')
+                time.sleep(attempt)
@@ -0,0 +1,119 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, router, transaction
+from django.utils.timezone import now as dj_now, timedelta
+
+from djangouseragents.db.partitioning import (
+    create_partition,
+    get_interval,
+    is_partitioned,
+    list_partitions,
+    next_period,
+    period_start,
+)
+from djangouseragents.models import (
+    UserAgentRequestDailySummaryModel,
+    UserAgentRequestModel,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming partitions of a partitioned UserAgentRequest "
+        "table and drop (or detach) the ones entirely older than "
+        "--older-than-days, rolling their rows up into "
+        "UserAgentRequestDailySummary first. Run it daily from cron; see "
+        "PartitionRequestLog."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ahead', type=int, default=3,
+            help='Number of future partitions to keep created besides the '
+                 'current one.',
+        )
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help='Remove partitions whose whole range is older than this '
+                 'many days.',
+        )
+        parser.add_argument(
+            '--detach', action='store_true',
+            help='Detach old partitions into standalone tables instead of '
+                 'dropping them.',
+        )
+        parser.add_argument(
+            '--no-rollup', action='store_true',
+            help='Remove old partitions without writing daily summaries.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be created and removed.',
+        )
+
+    def handle(
+        self, *args, ahead, older_than_days, detach, no_rollup, dry_run,
+        **options,
+    ):
+        interval = get_interval()
+        if interval is None:
+            raise CommandError(
+                'USERAGENTS_REQUEST_LOG_PARTITIONING is not set.')
+        using = router.db_for_write(UserAgentRequestModel)
+        connection = connections[using]
+        table = UserAgentRequestModel._meta.db_table
+        if not is_partitioned(connection, table):
+            raise CommandError(
+                f'{table} is not partitioned; add a migration running '
+                f'djangouseragents.db.PartitionRequestLog first.')
+
+        now = dj_now()
+        partitions = list_partitions(connection, table)
+        uppers = [upper for _, _, upper in partitions if upper is not None]
+
+        # Continue after the last partition, filling any periods that were
+        # missed (their rows are moved out of the default partition).
+        start = max(uppers) if uppers else period_start(now, interval)
+        until = period_start(now, interval)
+        for _ in range(ahead + 1):
+            until = next_period(until, interval)
+        while start < until:
+            if dry_run:
+                self.stdout.write(
+                    f'Would create the partition starting {start:%Y-%m-%d}')
+            else:
+                with transaction.atomic(using=using):
+                    name = create_partition(
+                        connection, table, start, interval)
+                if name:
+                    self.stdout.write(f'Created {name}')
+            start = next_period(start, interval)
+
+        if older_than_days is None:
+            return
+        cutoff = now - timedelta(days=older_than_days)
+        qn = connection.ops.quote_name
+        requests = UserAgentRequestModel.objects.using(using)
+        summaries = UserAgentRequestDailySummaryModel.objects.db_manager(using)
+        for name, lower, upper in partitions:
+            if upper is None or upper > cutoff:
+                continue
+            if dry_run:
+                action = 'detach' if detach else 'drop'
+                self.stdout.write(f'Would {action} {name}')
+                continue
+            # One transaction, so an interrupted run neither loses the rows
+            # nor counts them twice
+            with transaction.atomic(using=using):
+                if not no_rollup:
+                    rows = requests.filter(created_dt__lt=upper)
+                    if lower is not None:
+                        rows = rows.filter(created_dt__gte=lower)
+                    summaries.add_requests(rows)
+                with connection.cursor() as cursor:
+                    if detach:
+                        cursor.execute(
+                            f'ALTER TABLE {qn(table)} '
+                            f'DETACH PARTITION {qn(name)}')
+                    else:
+                        cursor.execute(f'DROP TABLE {qn(name)}')
+            self.stdout.write(f'{"Detached" if detach else "Dropped"} {name}')
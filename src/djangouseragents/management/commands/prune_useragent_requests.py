@@ -0,0 +1,196 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Exists, OuterRef, ProtectedError
+from django.utils.timezone import now as dj_now, timedelta
+
+from djangouseragents.conf import get_setting
+from djangouseragents.models import (
+    UserAgentEndpointModel,
+    UserAgentEndpointRollupModel,
+    UserAgentHeaderSetModel,
+    UserAgentRequestCounterModel,
+    UserAgentRequestDailySummaryModel,
+    UserAgentRequestModel,
+    UserAgentTrafficRollupModel,
+)
+from djangouseragents.models.user_agent_request import StatusChoices
+from djangouseragents.models.user_agent_rollups import get_hour
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete old UserAgentRequest rows in bounded primary-key batches, "
+        "rolling them up into UserAgentRequestDailySummary first, then the "
+        "hourly analytics rollups past their retention, and the header sets "
+        "and endpoints nothing uses any more. Every batch is its own "
+        "transaction, so the command can be interrupted and re-run at any "
+        "time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-days', type=int, default=None,
+            help='Age in days after which rows are pruned '
+                 '(default: USERAGENTS_REQUEST_RETENTION_DAYS).',
+        )
+        parser.add_argument(
+            '--rollup-older-than-days', type=int, default=None,
+            help='Age in days after which hourly rollups are pruned '
+                 '(default: USERAGENTS_ROLLUP_RETENTION_DAYS).',
+        )
+        parser.add_argument(
+            '--status', dest='statuses', action='append', default=[],
+            choices=StatusChoices.values,
+            help='Only prune rows with this status (repeatable).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows deleted per transaction.',
+        )
+        parser.add_argument(
+            '--sleep', type=float, default=0.0,
+            help='Seconds to pause between batches.',
+        )
+        parser.add_argument(
+            '--no-rollup', action='store_true',
+            help='Delete without writing daily summaries.',
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Only report what would be pruned.',
+        )
+
+    def handle(
+        self, *args, older_than_days, rollup_older_than_days, statuses,
+        batch_size, sleep, no_rollup, dry_run, **options,
+    ):
+        if older_than_days is None:
+            older_than_days = get_setting('REQUEST_RETENTION_DAYS')
+        if older_than_days is None or older_than_days < 0:
+            raise CommandError(
+                'Pass --older-than-days or set '
+                'USERAGENTS_REQUEST_RETENTION_DAYS.')
+
+        if rollup_older_than_days is None:
+            rollup_older_than_days = get_setting('ROLLUP_RETENTION_DAYS')
+        if rollup_older_than_days is not None and rollup_older_than_days < 0:
+            raise CommandError(
+                '--rollup-older-than-days must not be negative.')
+        rollups = []
+        if rollup_older_than_days is not None:
+            rollup_cutoff = get_hour(
+                dj_now() - timedelta(days=rollup_older_than_days))
+            rollups = [
+                model.objects.filter(hour__lt=rollup_cutoff)
+                for model in (
+                    UserAgentTrafficRollupModel, UserAgentEndpointRollupModel)
+            ]
+
+        cutoff = dj_now() - timedelta(days=older_than_days)
+        requests = UserAgentRequestModel.objects
+        candidates = requests.filter(created_dt__lt=cutoff)
+        if statuses:
+            candidates = candidates.filter(status__in=statuses)
+
+        if dry_run:
+            total = candidates.count()
+            old_rollups = sum(qs.count() for qs in rollups)
+            self.stdout.write(
+                f'Would prune {total} rows older than '
+                f'{cutoff:%Y-%m-%d %H:%M} and {old_rollups} rollup rows.')
+            return
+
+        # Keyset batches: each one starts after the last primary key deleted,
+        # so gaps in the key space cost nothing and no batch is ever empty
+        pruned = 0
+        last_pk = 0
+        while True:
+            pks = _next_batch(candidates, last_pk, batch_size)
+            if not pks:
+                break
+            last_pk = pks[-1]
+            with transaction.atomic():
+                # Locked first: a concurrent run must not roll the same rows
+                # up
+                locked = requests.select_for_update().filter(pk__in=pks)
+                batch = requests.filter(
+                    pk__in=list(locked.values_list('pk', flat=True)))
+                if not no_rollup:
+                    summaries = UserAgentRequestDailySummaryModel.objects
+                    summaries.add_requests(batch)
+                deleted, _ = batch.delete()
+            pruned += deleted
+            self.stdout.write(f'Pruned {pruned} rows (up to pk {last_pk})')
+            if sleep:
+                time.sleep(sleep)
+
+        stale = UserAgentRequestCounterModel.objects.prune()
+        # Before the endpoints: old rollups no longer keep theirs
+        pruned_rollups = sum(
+            self._delete_batches(qs, batch_size) for qs in rollups)
+        header_sets = self._delete_orphans(UserAgentHeaderSetModel, 'hash', [
+            (UserAgentRequestModel, 'header_set'),
+        ], batch_size)
+        endpoints = self._delete_orphans(UserAgentEndpointModel, 'pk', [
+            (UserAgentRequestModel, 'endpoint_ref'),
+            (UserAgentRequestDailySummaryModel, 'endpoint'),
+            (UserAgentEndpointRollupModel, 'endpoint'),
+        ], batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {pruned} requests pruned, {stale} stale counter buckets, '
+            f'{pruned_rollups} rollup rows, {header_sets} header sets and '
+            f'{endpoints} endpoints removed.'))
+
+    def _delete_batches(self, queryset, batch_size: int) -> int:
+        """
+        Delete the rows of ``queryset`` in keyset batches.
+        """
+        deleted = 0
+        last_pk = 0
+        while True:
+            pks = _next_batch(queryset, last_pk, batch_size)
+            if not pks:
+                break
+            last_pk = pks[-1]
+            deleted += queryset.filter(pk__in=pks).delete()[0]
+        return deleted
+
+    def _delete_orphans(
+        self, model, key: str, references: list, batch_size: int,
+    ) -> int:
+        """
+        Delete the rows of ``model`` that no ``(model, foreign key)`` of
+        ``references`` points at, in keyset batches.
+        """
+        orphans = model.objects.all()
+        for related, field in references:
+            uses = related.objects.filter(**{field: OuterRef(key)})
+            orphans = orphans.filter(~Exists(uses))
+
+        deleted = 0
+        last_pk = 0
+        while True:
+            pks = _next_batch(orphans, last_pk, batch_size)
+            if not pks:
+                break
+            last_pk = pks[-1]
+            try:
+                with transaction.atomic():
+                    # Checked again: a request may have been logged meanwhile.
+                    # One logged between that check and the DELETE trips the
+                    # foreign key instead of PROTECT
+                    _, counts = orphans.filter(pk__in=pks).delete()
+            except (ProtectedError, IntegrityError):
+                continue
+            deleted += counts.get(model._meta.label, 0)
+        return deleted
+
+
+def _next_batch(queryset, last_pk, batch_size: int) -> list:
+    # Keyset pagination: the primary keys after ``last_pk``
+    return list(
+        queryset.filter(pk__gt=last_pk).order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
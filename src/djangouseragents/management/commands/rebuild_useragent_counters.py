@@ -0,0 +1,89 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from django.utils.timezone import now as dj_now
+
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentRequestCounterModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.models.user_agent_request_counter import (
+    DAY_WINDOW,
+    get_bucket,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the incremental request counters (device totals and rolling "
+        "1h/24h buckets) from the existing UserAgentRequest rows."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--device', dest='devices', action='append', type=int, default=[],
+            help='Only rebuild the given device id (repeatable).',
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Number of devices processed per transaction.',
+        )
+
+    def handle(self, *args, devices, batch_size, **options):
+        now = dj_now()
+        window_start = get_bucket(now - DAY_WINDOW)
+
+        device_qs = UserAgentDeviceModel.objects.order_by('pk')
+        if devices:
+            device_qs = device_qs.filter(pk__in=devices)
+
+        last_pk = 0
+        rebuilt = 0
+        while True:
+            batch = list(device_qs.filter(pk__gt=last_pk).values_list(
+                'pk', flat=True)[:batch_size])
+            if not batch:
+                break
+            last_pk = batch[-1]
+            self._rebuild(batch, window_start)
+            rebuilt += len(batch)
+            self.stdout.write(f'Rebuilt counters for {rebuilt} devices')
+
+        pruned = UserAgentRequestCounterModel.objects.prune(now)
+        self.stdout.write(self.style.SUCCESS(
+            f'Done: {rebuilt} devices rebuilt, '
+            f'{pruned} stale buckets removed.'))
+
+    def _rebuild(self, device_ids, window_start):
+        requests = UserAgentRequestModel.objects.filter(uad_id__in=device_ids)
+        totals = dict(
+            requests.values_list('uad').annotate(n=Count('pk')).order_by())
+
+        # Only the last 24h matter for the rolling windows, so this scan is
+        # bounded
+        recent = requests.filter(created_dt__gte=window_start).values_list(
+            'uad_id', 'created_dt')
+        buckets = Counter(
+            (uad_id, get_bucket(created_dt))
+            for uad_id, created_dt in recent.iterator()
+        )
+
+        with transaction.atomic():
+            UserAgentDeviceModel.objects.bulk_update(
+                [
+                    UserAgentDeviceModel(
+                        pk=pk, request_count=totals.get(pk, 0))
+                    for pk in device_ids
+                ],
+                ['request_count'],
+            )
+            counters = UserAgentRequestCounterModel.objects
+            counters.filter(uad_id__in=device_ids).delete()
+            counters.bulk_create([
+                UserAgentRequestCounterModel(
+                    uad_id=uad_id, bucket=bucket, count=count)
+                for (uad_id, bucket), count in buckets.items()
+            ])
@@ -0,0 +1,117 @@
+from datetime import timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Count, Min
+from django.db.models.functions import TruncHour
+from django.utils.timezone import now as dj_now, timedelta
+
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentEndpointRollupModel,
+    UserAgentRequestModel,
+    UserAgentTrafficRollupModel,
+)
+from djangouseragents.models.user_agent_rollups import get_hour
+from djangouseragents.services.export import parse_bound
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the hourly analytics rollups from the request log, one day "
+        "per transaction. Use it after enabling USERAGENTS_ANALYTICS_ROLLUPS "
+        "on an existing log."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            help='Only rebuild hours from this date / datetime on '
+                 '(default: the whole log).',
+        )
+
+    def handle(self, *args, since, **options):
+        try:
+            since = parse_bound(since)
+        except ValueError as e:
+            raise CommandError(e)
+        if since is None:
+            firsts = [
+                model.objects.aggregate(first=Min('created_dt'))['first']
+                for model in (UserAgentRequestModel, UserAgentDeviceModel)
+            ]
+            firsts = [first for first in firsts if first is not None]
+            if not firsts:
+                self.stdout.write('Nothing to rebuild.')
+                return
+            since = min(firsts)
+
+        start = get_hour(since)
+        end = get_hour(dj_now()) + timedelta(hours=1)
+        while start < end:
+            stop = min(start + timedelta(days=1), end)
+            with transaction.atomic():
+                requests = self._rebuild(start, stop)
+            self.stdout.write(f'{start:%Y-%m-%d %H:%M}: {requests} requests')
+            start = stop
+
+        self.stdout.write(self.style.SUCCESS('Done.'))
+
+    def _rebuild(self, start, stop) -> int:
+        rollups = (UserAgentTrafficRollupModel, UserAgentEndpointRollupModel)
+        for model in rollups:
+            model.objects.filter(hour__gte=start, hour__lt=stop).delete()
+
+        requests = UserAgentRequestModel.objects.filter(
+            created_dt__gte=start, created_dt__lt=stop,
+        ).annotate(
+            rollup_hour=TruncHour('created_dt', tzinfo=timezone.utc),
+        ).order_by()
+
+        traffic = {}
+        total = 0
+        rows = requests.values(
+            'rollup_hour', 'uad__browser_family', 'uad__os_family',
+            'uad__is_bot',
+        ).annotate(requests=Count('pk'))
+        for row in rows:
+            key = (
+                row['rollup_hour'],
+                row['uad__browser_family'] or '',
+                row['uad__os_family'] or '',
+                bool(row['uad__is_bot']),
+            )
+            amounts = traffic.setdefault(
+                key, {'requests': 0, 'new_devices': 0})
+            amounts['requests'] += row['requests']
+            total += row['requests']
+        # Devices are new in the hour they were created, whether or not any
+        # of their requests was logged
+        devices = UserAgentDeviceModel.objects.filter(
+            created_dt__gte=start, created_dt__lt=stop,
+        ).annotate(
+            rollup_hour=TruncHour('created_dt', tzinfo=timezone.utc),
+        ).order_by().values(
+            'rollup_hour', 'browser_family', 'os_family', 'is_bot',
+        ).annotate(new_devices=Count('pk'))
+        for row in devices:
+            key = (
+                row['rollup_hour'],
+                row['browser_family'] or '',
+                row['os_family'] or '',
+                bool(row['is_bot']),
+            )
+            amounts = traffic.setdefault(
+                key, {'requests': 0, 'new_devices': 0})
+            amounts['new_devices'] += row['new_devices']
+        UserAgentTrafficRollupModel.objects.add(traffic)
+
+        endpoints = {
+            (row['rollup_hour'], row['endpoint_ref'],
+             row['response_status_code']): {'requests': row['requests']}
+            for row in requests.filter(endpoint_ref__isnull=False)
+            .values('rollup_hour', 'endpoint_ref', 'response_status_code')
+            .annotate(requests=Count('pk'))
+        }
+        UserAgentEndpointRollupModel.objects.add(endpoints)
+        return total
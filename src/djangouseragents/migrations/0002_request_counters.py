@@ -0,0 +1,58 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useragentdevice',
+            name='request_count',
+            field=models.BigIntegerField(
+                default=0,
+                editable=False,
+                help_text='Total request count, maintained incrementally',
+                verbose_name='Request Count',
+            ),
+        ),
+        migrations.CreateModel(
+            name='UserAgentRequestCounter',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('bucket', models.DateTimeField(verbose_name='Bucket Start')),
+                ('count', models.IntegerField(
+                    default=0,
+                    verbose_name='Request Count',
+                )),
+                ('uad', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='request_counters',
+                    to='djangouseragents.useragentdevice',
+                    verbose_name='User Agent Device',
+                )),
+            ],
+            options={
+                'verbose_name': 'User Agent Request Counter',
+                'verbose_name_plural': 'User Agent Request Counters',
+                'indexes': [models.Index(
+                    fields=['bucket'],
+                    name='idx_counter_bucket',
+                )],
+                'constraints': [models.UniqueConstraint(
+                    fields=('uad', 'bucket'),
+                    name='uniq_uad_counter_bucket',
+                )],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:34
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0002_request_counters'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useragentrequest',
+            name='created_dt',
+            field=models.DateTimeField(
+                db_index=True,
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name='Created Datetime',
+            ),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:38
+
+import djangouseragents.db.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0003_request_created_dt_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='useragentdevice',
+            name='key_digest',
+            field=djangouseragents.db.fields.FixedBinaryField(
+                blank=True,
+                help_text='Binary form of the key, for a compact unique index',
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name='Key Digest',
+            ),
+        ),
+    ]
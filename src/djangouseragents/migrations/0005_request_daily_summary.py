@@ -0,0 +1,64 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0004_device_key_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgentRequestDailySummary',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('day', models.DateField(verbose_name='Day')),
+                ('endpoint', models.TextField(verbose_name='Endpoint')),
+                ('method', models.CharField(
+                    blank=True,
+                    max_length=64,
+                    null=True,
+                    verbose_name='HTTP Method',
+                )),
+                ('response_status_code', models.IntegerField(
+                    verbose_name='Response Status Code',
+                )),
+                ('count', models.IntegerField(
+                    default=0,
+                    verbose_name='Request Count',
+                )),
+                ('uad', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='daily_summaries',
+                    to='djangouseragents.useragentdevice',
+                    verbose_name='User Agent Device',
+                )),
+            ],
+            options={
+                'verbose_name': 'User Agent Request Daily Summary',
+                'verbose_name_plural': 'User Agent Request Daily Summaries',
+                'indexes': [models.Index(
+                    fields=['day'],
+                    name='idx_daily_summary_day',
+                )],
+                'constraints': [models.UniqueConstraint(
+                    fields=(
+                        'uad',
+                        'day',
+                        'endpoint',
+                        'method',
+                        'response_status_code',
+                    ),
+                    name='uniq_uad_daily_summary',
+                )],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0005_request_daily_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgentHeaderSet',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('hash', models.CharField(
+                    editable=False,
+                    max_length=32,
+                    unique=True,
+                    verbose_name='Hash',
+                )),
+                ('headers', models.JSONField(verbose_name='Headers')),
+            ],
+            options={
+                'verbose_name': 'User Agent Header Set',
+                'verbose_name_plural': 'User Agent Header Sets',
+            },
+        ),
+        migrations.AddField(
+            model_name='useragentrequest',
+            name='payload',
+            field=models.BinaryField(
+                blank=True,
+                help_text='GET and cookie data, zlib-compressed JSON',
+                null=True,
+                verbose_name='Compressed Payload',
+            ),
+        ),
+        migrations.AddField(
+            model_name='useragentrequest',
+            name='header_set',
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='+',
+                to='djangouseragents.useragentheaderset',
+                to_field='hash',
+                verbose_name='Header Set',
+            ),
+        ),
+    ]
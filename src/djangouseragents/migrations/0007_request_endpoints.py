@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:48
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0006_request_header_sets'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgentEndpoint',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('hash', models.CharField(
+                    editable=False,
+                    max_length=32,
+                    unique=True,
+                    verbose_name='Hash',
+                )),
+                ('path', models.TextField(verbose_name='Endpoint')),
+            ],
+            options={
+                'verbose_name': 'User Agent Endpoint',
+                'verbose_name_plural': 'User Agent Endpoints',
+            },
+        ),
+        migrations.AddField(
+            model_name='useragentrequest',
+            name='endpoint_ref',
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='requests',
+                to='djangouseragents.useragentendpoint',
+                verbose_name='Interned Endpoint',
+            ),
+        ),
+    ]
@@ -0,0 +1,89 @@
+# Generated by Django 5.2.18 on 2026-10-17 17:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0007_request_endpoints'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgentTrafficRollup',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('hour', models.DateTimeField(verbose_name='Hour')),
+                ('browser_family', models.CharField(
+                    default='',
+                    max_length=255,
+                    verbose_name='Browser Family',
+                )),
+                ('os_family', models.CharField(
+                    default='',
+                    max_length=255,
+                    verbose_name='OS Family',
+                )),
+                ('is_bot', models.BooleanField(
+                    default=False,
+                    verbose_name='Is Bot',
+                )),
+                ('requests', models.BigIntegerField(
+                    default=0,
+                    verbose_name='Requests',
+                )),
+                ('new_devices', models.IntegerField(
+                    default=0,
+                    verbose_name='New Devices',
+                )),
+            ],
+            options={
+                'verbose_name': 'Traffic Rollup',
+                'verbose_name_plural': 'Traffic Rollups',
+                'constraints': [models.UniqueConstraint(
+                    fields=('hour', 'browser_family', 'os_family', 'is_bot'),
+                    name='uniq_traffic_rollup',
+                )],
+            },
+        ),
+        migrations.CreateModel(
+            name='UserAgentEndpointRollup',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('hour', models.DateTimeField(verbose_name='Hour')),
+                ('response_status_code', models.IntegerField(
+                    verbose_name='Response Status Code',
+                )),
+                ('requests', models.BigIntegerField(
+                    default=0,
+                    verbose_name='Requests',
+                )),
+                ('endpoint', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE,
+                    related_name='rollups',
+                    to='djangouseragents.useragentendpoint',
+                    verbose_name='Endpoint',
+                )),
+            ],
+            options={
+                'verbose_name': 'Endpoint Rollup',
+                'verbose_name_plural': 'Endpoint Rollups',
+                'constraints': [models.UniqueConstraint(
+                    fields=('hour', 'endpoint', 'response_status_code'),
+                    name='uniq_endpoint_rollup',
+                )],
+            },
+        ),
+    ]
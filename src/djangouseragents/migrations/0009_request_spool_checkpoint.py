@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0008_analytics_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserAgentRequestSpoolCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(
+                    auto_created=True,
+                    primary_key=True,
+                    serialize=False,
+                    verbose_name='ID',
+                )),
+                ('name', models.CharField(
+                    max_length=255,
+                    unique=True,
+                    verbose_name='Spool File',
+                )),
+                ('offset', models.BigIntegerField(
+                    default=0,
+                    help_text='Bytes of the file already loaded',
+                    verbose_name='Offset',
+                )),
+                ('updated_dt', models.DateTimeField(
+                    auto_now=True,
+                    verbose_name='Updated DateTime',
+                )),
+            ],
+            options={
+                'verbose_name': 'User Agent Request Spool Checkpoint',
+                'verbose_name_plural': 'User Agent Request Spool Checkpoints',
+            },
+        ),
+    ]
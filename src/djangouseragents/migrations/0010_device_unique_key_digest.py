@@ -0,0 +1,57 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:33
+
+import djangouseragents.db.fields
+from django.db import migrations, models
+
+from djangouseragents.utils import key_to_digest
+
+
+def fill_key_digests(apps, schema_editor):
+    # Devices are unique on key_digest from here on, so every keyed device
+    # needs one before the unique index on key goes away
+    UserAgentDevice = apps.get_model('djangouseragents', 'UserAgentDevice')
+    devices = UserAgentDevice.objects.using(schema_editor.connection.alias)
+    qs = devices.filter(
+        key_digest__isnull=True, key__isnull=False).order_by('pk')
+    last_pk = 0
+    while True:
+        batch = list(qs.filter(pk__gt=last_pk).only('pk', 'key')[:1000])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+        for obj in batch:
+            obj.key_digest = key_to_digest(obj.key)
+        devices.bulk_update(batch, ['key_digest'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0009_request_spool_checkpoint'),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_key_digests, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='useragentdevice',
+            name='key_digest',
+            field=djangouseragents.db.fields.FixedBinaryField(
+                blank=True,
+                help_text='Binary form of the key, devices are unique on it',
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name='Key Digest',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='useragentdevice',
+            name='key',
+            field=models.CharField(
+                blank=True,
+                max_length=255,
+                null=True,
+                verbose_name='Key',
+            ),
+        ),
+    ]
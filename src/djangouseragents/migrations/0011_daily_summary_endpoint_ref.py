@@ -0,0 +1,111 @@
+# Generated by Django 5.2.18 on 2026-10-17 18:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from djangouseragents.models.user_agent_endpoint import hash_endpoint
+
+
+def intern_summary_endpoints(apps, schema_editor):
+    # The summaries are keyed on the interned endpoint from here on; rows
+    # whose new key collides (a NULL and an empty method) are merged
+    alias = schema_editor.connection.alias
+    Endpoint = apps.get_model('djangouseragents', 'UserAgentEndpoint')
+    Summary = apps.get_model(
+        'djangouseragents', 'UserAgentRequestDailySummary')
+    summaries = Summary.objects.using(alias)
+    endpoints = Endpoint.objects.using(alias)
+
+    paths = set(summaries.values_list('endpoint', flat=True).distinct())
+    hashes = {hash_endpoint(path): path for path in paths}
+    endpoints.bulk_create(
+        [Endpoint(hash=h, path=path) for h, path in hashes.items()],
+        ignore_conflicts=True)
+    stored = endpoints.filter(hash__in=list(hashes)).values_list('hash', 'pk')
+    ids = {hashes[h]: pk for h, pk in stored}
+
+    seen = {}
+    for summary in summaries.order_by('pk').iterator():
+        summary.endpoint_ref_id = ids[summary.endpoint]
+        summary.method = summary.method or ''
+        key = (
+            summary.uad_id, summary.day, summary.endpoint_ref_id,
+            summary.method, summary.response_status_code,
+        )
+        if key in seen:
+            summaries.filter(pk=seen[key]).update(
+                count=models.F('count') + summary.count)
+            summary.delete()
+        else:
+            seen[key] = summary.pk
+            summary.save(update_fields=['endpoint_ref', 'method'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0010_device_unique_key_digest'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='useragentrequestdailysummary',
+            name='uniq_uad_daily_summary',
+        ),
+        migrations.AddField(
+            model_name='useragentrequestdailysummary',
+            name='endpoint_ref',
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='+',
+                to='djangouseragents.useragentendpoint',
+            ),
+        ),
+        migrations.RunPython(
+            intern_summary_endpoints,
+            migrations.RunPython.noop,
+        ),
+        migrations.RemoveField(
+            model_name='useragentrequestdailysummary',
+            name='endpoint',
+        ),
+        migrations.RenameField(
+            model_name='useragentrequestdailysummary',
+            old_name='endpoint_ref',
+            new_name='endpoint',
+        ),
+        migrations.AlterField(
+            model_name='useragentrequestdailysummary',
+            name='endpoint',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name='daily_summaries',
+                to='djangouseragents.useragentendpoint',
+                verbose_name='Endpoint',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='useragentrequestdailysummary',
+            name='method',
+            field=models.CharField(
+                blank=True,
+                default='',
+                max_length=64,
+                verbose_name='HTTP Method',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='useragentrequestdailysummary',
+            constraint=models.UniqueConstraint(
+                fields=(
+                    'uad',
+                    'day',
+                    'endpoint',
+                    'method',
+                    'response_status_code',
+                ),
+                name='uniq_uad_daily_summary',
+            ),
+        ),
+    ]
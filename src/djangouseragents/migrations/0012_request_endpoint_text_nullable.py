@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0011_daily_summary_endpoint_ref'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useragentrequest',
+            name='endpoint',
+            field=models.TextField(
+                blank=True,
+                editable=False,
+                null=True,
+                verbose_name='Endpoint Text',
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-17 19:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('djangouseragents', '0012_request_endpoint_text_nullable'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='useragentdevice',
+            name='ip',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=255,
+                null=True,
+                verbose_name='IP',
+            ),
+        ),
+        migrations.AlterField(
+            model_name='useragentdevice',
+            name='user_id',
+            field=models.CharField(
+                blank=True,
+                db_index=True,
+                max_length=255,
+                null=True,
+                verbose_name='User ID',
+            ),
+        ),
+    ]
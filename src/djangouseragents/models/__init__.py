@@ -1,2 +1,19 @@
 from .user_agent_device import UserAgentDevice as UserAgentDeviceModel
 from .user_agent_request import UserAgentRequest as UserAgentRequestModel
+from .user_agent_request_counter import (
+    UserAgentRequestCounter as UserAgentRequestCounterModel,
+)
+from .user_agent_request_daily_summary import (
+    UserAgentRequestDailySummary as UserAgentRequestDailySummaryModel,
+)
+from .user_agent_header_set import (
+    UserAgentHeaderSet as UserAgentHeaderSetModel,
+)
+from .user_agent_endpoint import UserAgentEndpoint as UserAgentEndpointModel
+from .user_agent_rollups import (
+    UserAgentEndpointRollup as UserAgentEndpointRollupModel,
+    UserAgentTrafficRollup as UserAgentTrafficRollupModel,
+)
+from .user_agent_request_spool_checkpoint import (
+    UserAgentRequestSpoolCheckpoint as UserAgentRequestSpoolCheckpointModel,
+)
@@ -1,11 +1,184 @@
-from django.db import models
+from asgiref.sync import sync_to_async
+from django.db import IntegrityError, connections, models, router, transaction
 from django.utils.translation import gettext_lazy as _
 
 from djangouniquetoolkit.services import get_unique_username
 
+from djangouseragents.conf import get_setting
+from djangouseragents.db import FixedBinaryField
+from djangouseragents.utils import key_to_digest
+
 
 def get_unique_name():
-    return get_unique_username()
+    # get_unique_username checks, then inserts, so concurrent callers can
+    # collide on the same candidate; a retry draws a new one.
+    for attempt in range(3):
+        try:
+            with transaction.atomic():
+                return get_unique_username()
+        except IntegrityError:
+            if attempt == 2:
+                raise
+
+
+class UserAgentDeviceManager(models.Manager):
+
+    def get_by_key(self, key: str) -> 'UserAgentDevice':
+        """
+        Fetch a device by key, through the unique key_digest index.
+        """
+        return self.get(key_digest=key_to_digest(key))
+
+    async def aget_by_key(self, key: str) -> 'UserAgentDevice':
+        return await self.aget(key_digest=key_to_digest(key))
+
+    def get_or_create_by_key(self, **fields) -> tuple['UserAgentDevice', bool]:
+        """
+        Return ``(device, created)`` for the device whose key is
+        ``fields['key']``, creating it from ``fields`` if it does not exist.
+        Safe against concurrent creation.
+
+        Reads first: a new row needs a generated unique name, which costs more
+        than the read that usually finds the device.
+        """
+        try:
+            return self.get_by_key(fields['key']), False
+        except self.model.DoesNotExist:
+            return self.upsert_by_key(**fields)
+
+    async def aget_or_create_by_key(
+        self, **fields,
+    ) -> tuple['UserAgentDevice', bool]:
+        return await sync_to_async(self.get_or_create_by_key)(**fields)
+
+    def upsert_by_key(self, **fields) -> tuple['UserAgentDevice', bool]:
+        """
+        Insert a device or return the existing row with the same key, in one
+        round trip on PostgreSQL and SQLite (INSERT ... ON CONFLICT ...
+        RETURNING), as ``(device, created)``. Other backends fall back to
+        create-then-get.
+        """
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        obj = self.model(**fields)
+        obj.fill_key_digest()
+
+        if (connection.vendor not in ('postgresql', 'sqlite')
+                or not connection.features.can_return_columns_from_insert):
+            return self._create_or_get(obj, using)
+
+        meta = self.model._meta
+        qn = connection.ops.quote_name
+        fields = [f for f in meta.concrete_fields if not f.primary_key]
+        digest_column = qn(meta.get_field('key_digest').column)
+        # The no-op update makes RETURNING yield the existing row on conflict
+        sql = (
+            'INSERT INTO {table} ({columns}) VALUES ({values}) '
+            'ON CONFLICT ({digest}) '
+            'DO UPDATE SET {digest} = EXCLUDED.{digest} '
+            'RETURNING {returning}'
+        ).format(
+            table=qn(meta.db_table),
+            columns=', '.join(qn(f.column) for f in fields),
+            values=', '.join(['%s'] * len(fields)),
+            digest=digest_column,
+            returning=', '.join(qn(f.column) for f in meta.concrete_fields),
+        )
+        params = [
+            f.get_db_prep_save(f.pre_save(obj, add=True), connection)
+            for f in fields
+        ]
+        with transaction.atomic(using=using, savepoint=False):
+            row = next(iter(self.db_manager(using).raw(sql, params)))
+            # Names are unique, so only the row just inserted has the one
+            # generated for obj
+            created = row.name == obj.name
+            if created:
+                self._count_created([row], using)
+        return row, created
+
+    def bulk_get_or_create_by_key(self, devices: list[dict]) -> dict[str, int]:
+        """
+        Return ``{key: pk}`` for the devices described by ``devices`` (dicts of
+        field values including the key), creating the missing ones with bulk
+        INSERTs. A ``created_dt`` given for a new device replaces its insert
+        time, for backfills. Safe against concurrent creation.
+        """
+        devices = {fields['key']: fields for fields in devices}
+        ids = self._ids_by_key(devices)
+        missing = []
+        for key, fields in devices.items():
+            if key not in ids:
+                obj = self.model(**{
+                    name: value for name, value in fields.items()
+                    if name != 'created_dt'
+                })
+                obj.fill_key_digest()
+                missing.append(obj)
+        if not missing:
+            return ids
+
+        using = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=using, savepoint=False):
+            self.bulk_create(missing, batch_size=500, ignore_conflicts=True)
+            rows = self._values_by_key(
+                [obj.key for obj in missing], 'pk', 'name')
+            created, backdated = [], []
+            for obj in missing:
+                obj.pk, name = rows[obj.key]
+                ids[obj.key] = obj.pk
+                # Rows a concurrent writer inserted first have another name
+                if name != obj.name:
+                    continue
+                created.append(obj)
+                created_dt = devices[obj.key].get('created_dt')
+                if created_dt is not None:
+                    obj.created_dt = created_dt
+                    backdated.append(obj)
+            if backdated:
+                self.bulk_update(backdated, ['created_dt'], batch_size=500)
+            self._count_created(created, using)
+        return ids
+
+    def _ids_by_key(self, keys) -> dict[str, int]:
+        return {
+            key: pk for key, (pk,) in self._values_by_key(keys, 'pk').items()
+        }
+
+    def _values_by_key(self, keys, *fields) -> dict[str, tuple]:
+        by_digest = {key_to_digest(key): key for key in keys}
+        digests = list(by_digest)
+        values = {}
+        for start in range(0, len(digests), 500):
+            rows = self.filter(
+                key_digest__in=digests[start:start + 500],
+            ).values_list('key_digest', *fields)
+            values.update(
+                (by_digest[bytes(digest)], tuple(row))
+                for digest, *row in rows)
+        return values
+
+    def _count_created(self, objs: list, using: str) -> None:
+        # New devices are counted in the hour they were created, whether or
+        # not any of their requests is ever logged
+        if not objs or not get_setting('ANALYTICS_ROLLUPS'):
+            return
+        # The rollups read device dimensions from this module
+        from .user_agent_rollups import add_new_devices
+
+        add_new_devices(objs, using=using)
+
+    def _create_or_get(
+        self, obj: 'UserAgentDevice', using: str,
+    ) -> tuple['UserAgentDevice', bool]:
+        try:
+            with transaction.atomic(using=using):
+                obj.save(force_insert=True, using=using)
+                self._count_created([obj], using)
+            return obj, True
+        except IntegrityError:
+            existing = self.db_manager(using).get(key_digest=obj.key_digest)
+            return existing, False
 
 
 class UserAgentDevice(models.Model):
@@ -27,14 +200,22 @@ class UserAgentDevice(models.Model):
         max_length=255,
         blank=True,
         null=True,
+    )
+    key_digest = FixedBinaryField(
+        verbose_name=_('Key Digest'),
+        max_length=64,
+        blank=True,
+        null=True,
         unique=True,
-        db_index=True,
+        editable=False,
+        help_text=_('Binary form of the key, devices are unique on it'),
     )
     user_id = models.CharField(
         verbose_name=_('User ID'),
         blank=True,
         null=True,
         max_length=255,
+        db_index=True,
     )
     is_mobile = models.BooleanField(
         verbose_name=_('Mobile'),
@@ -110,6 +291,14 @@ class UserAgentDevice(models.Model):
         max_length=255,
         blank=True,
         null=True,
+        db_index=True,
+    )
+
+    request_count = models.BigIntegerField(
+        verbose_name=_('Request Count'),
+        default=0,
+        editable=False,
+        help_text=_('Total request count, maintained incrementally'),
     )
 
     created_dt = models.DateTimeField(
@@ -118,9 +307,21 @@ class UserAgentDevice(models.Model):
         db_index=True,
     )
 
+    objects = UserAgentDeviceManager()
+
     def __str__(self):
         return self.name
 
+    def fill_key_digest(self) -> None:
+        self.key_digest = key_to_digest(self.key)
+
+    def save(self, **kwargs):
+        self.fill_key_digest()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'key' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'key_digest'}
+        super().save(**kwargs)
+
     class Meta:
         verbose_name = _('User Agent Device')
         verbose_name_plural = _('User Agent Devices')
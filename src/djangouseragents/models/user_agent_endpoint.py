@@ -0,0 +1,78 @@
+import hashlib
+from typing import Iterable
+
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+from djangouseragents.utils import LRUCache
+
+# endpoint -> pk of the rows known to be stored; filled only after commit and
+# expiring like the header-set hashes, since unused rows are pruned too
+_endpoint_ids = LRUCache(maxsize=10_000, ttl=3600)
+
+
+def hash_endpoint(endpoint: str) -> str:
+    return hashlib.blake2b(endpoint.encode(), digest_size=16).hexdigest()
+
+
+class UserAgentEndpointManager(models.Manager):
+
+    def intern(self, endpoints: Iterable[str]) -> dict[str, int]:
+        """
+        Return ``{endpoint: pk}`` for the given endpoints, creating the missing
+        rows. Endpoints seen before are answered from an in-process cache.
+        """
+        ids = {}
+        missing = {}
+        for endpoint in set(endpoints):
+            pk = _endpoint_ids.get(endpoint)
+            if pk is None:
+                missing[hash_endpoint(endpoint)] = endpoint
+            else:
+                ids[endpoint] = pk
+        if not missing:
+            return ids
+
+        self.bulk_create(
+            [
+                self.model(hash=h, path=endpoint)
+                for h, endpoint in missing.items()
+            ],
+            ignore_conflicts=True,
+        )
+        # ignore_conflicts does not return primary keys, so read them back
+        stored = self.filter(hash__in=list(missing)).values_list('hash', 'pk')
+        fetched = {missing[h]: pk for h, pk in stored}
+        ids.update(fetched)
+        transaction.on_commit(
+            lambda: [
+                _endpoint_ids.set(endpoint, pk)
+                for endpoint, pk in fetched.items()
+            ],
+            using=self.db)
+        return ids
+
+
+class UserAgentEndpoint(models.Model):
+    """
+    A distinct logged endpoint (a path or a route pattern, depending on
+    USERAGENTS_LOG_ENDPOINT_MODE), referenced by integer id from the log rows.
+    """
+    hash = models.CharField(
+        verbose_name=_('Hash'),
+        max_length=32,
+        unique=True,
+        editable=False,
+    )
+    path = models.TextField(
+        verbose_name=_('Endpoint'),
+    )
+
+    objects = UserAgentEndpointManager()
+
+    def __str__(self):
+        return self.path
+
+    class Meta:
+        verbose_name = _('User Agent Endpoint')
+        verbose_name_plural = _('User Agent Endpoints')
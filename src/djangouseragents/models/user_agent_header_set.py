@@ -0,0 +1,69 @@
+import hashlib
+import json
+
+from django.db import models, transaction
+from django.utils.translation import gettext_lazy as _
+
+from djangouseragents.utils import LRUCache
+
+# Hashes known to be stored, so repeated header sets skip the INSERT. Filled
+# only after commit, so a rolled-back row is never assumed to exist, and
+# forgotten after an hour, as prune_useragent_requests deletes the sets no
+# request uses any more.
+_stored_hashes = LRUCache(maxsize=10_000, ttl=3600)
+
+
+def hash_header_set(headers: dict) -> str:
+    data = json.dumps(
+        headers, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(data.encode(), digest_size=16).hexdigest()
+
+
+class UserAgentHeaderSetManager(models.Manager):
+
+    def intern(self, header_sets: dict[str, dict]) -> None:
+        """
+        Make sure every ``{hash: headers}`` given is stored. Existing rows are
+        left alone, so concurrent writers may intern the same set.
+        """
+        missing = {
+            h: headers for h, headers in header_sets.items()
+            if _stored_hashes.get(h) is None
+        }
+        if not missing:
+            return
+        self.bulk_create(
+            [
+                self.model(hash=h, headers=headers)
+                for h, headers in missing.items()
+            ],
+            ignore_conflicts=True,
+        )
+        transaction.on_commit(
+            lambda: [_stored_hashes.set(h, True) for h in missing],
+            using=self.db)
+
+
+class UserAgentHeaderSet(models.Model):
+    """
+    A distinct set of logged request headers, shared by every request that sent
+    it and referenced by the hash of its content.
+    """
+    hash = models.CharField(
+        verbose_name=_('Hash'),
+        max_length=32,
+        unique=True,
+        editable=False,
+    )
+    headers = models.JSONField(
+        verbose_name=_('Headers'),
+    )
+
+    objects = UserAgentHeaderSetManager()
+
+    def __str__(self):
+        return self.hash
+
+    class Meta:
+        verbose_name = _('User Agent Header Set')
+        verbose_name_plural = _('User Agent Header Sets')
@@ -1,6 +1,17 @@
-from django.db import models
+from collections import Counter, defaultdict
+from typing import Iterable
+
+from django.db import connections, models, transaction
 from django.utils.translation import gettext_lazy as _
-from django.utils.timezone import now as dj_now, timedelta
+from django.utils.timezone import now as dj_now
+
+from djangouseragents.conf import get_setting
+from djangouseragents.db.copy import copy_insert, supports_copy
+from djangouseragents.utils import compress_payload, decompress_payload
+from .user_agent_endpoint import UserAgentEndpoint
+from .user_agent_header_set import UserAgentHeaderSet, hash_header_set
+from .user_agent_request_counter import UserAgentRequestCounter, get_bucket
+from .user_agent_rollups import update_rollups
 
 
 class StatusChoices(models.TextChoices):
@@ -10,6 +21,151 @@ class StatusChoices(models.TextChoices):
     ABNORMAL = 'Abnormal', _('Abnormal')
 
 
+# (upper bound of requests per hour, status, color)
+STATUS_THRESHOLDS = (
+    (50, StatusChoices.NORMAL, '#06d6a0'),
+    (100, StatusChoices.BUSY, '#ffba08'),
+    (500, StatusChoices.VERY_BUSY, '#f48c06'),
+)
+
+
+def get_status(rn_ph: int) -> tuple[str, str]:
+    """
+    Map a requests-per-hour figure to its (status, status color) bucket.
+    """
+    for limit, status, color in STATUS_THRESHOLDS:
+        if rn_ph < limit:
+            return status, color
+    return StatusChoices.ABNORMAL, '#d00000'
+
+
+def assign_counters(
+    objs: list['UserAgentRequest'], using: str | None = None,
+) -> list['UserAgentRequest']:
+    """
+    Fill rn / rn_ph / rn_24h and the status of new requests from the
+    incremental device counters. Requests of the same device are counted in
+    one increment and numbered in created_dt order, so a batch gets the same
+    figures as saving the rows one by one would have produced. Returns the
+    requests whose device still exists.
+    """
+    by_device = defaultdict(list)
+    for obj in objs:
+        by_device[obj.uad_id].append(obj)
+
+    hits = {}
+    for uad_id, device_objs in by_device.items():
+        device_objs.sort(key=lambda o: o.created_dt)
+        buckets = Counter(get_bucket(o.created_dt) for o in device_objs)
+        hits[uad_id] = (buckets, device_objs[-1].created_dt)
+    counters = UserAgentRequestCounter.objects.db_manager(using)
+    all_counts = counters.increment_many(hits)
+
+    for uad_id, device_objs in by_device.items():
+        counts = all_counts.get(uad_id)
+        if counts is None:
+            continue
+        for later, obj in enumerate(reversed(device_objs)):
+            # ``later`` requests of this batch were counted after ``obj``
+            obj.rn = counts.rn - later
+            obj.rn_ph = max(counts.rn_ph - later, 1)
+            obj.rn_24h = max(counts.rn_24h - later, 1)
+            obj.status, obj.status_color = get_status(obj.rn_ph)
+    if len(all_counts) < len(by_device):
+        objs = [obj for obj in objs if obj.uad_id in all_counts]
+    return objs
+
+
+def split_headers(headers: dict, volatile: frozenset) -> tuple[dict, dict]:
+    """
+    Split logged headers into those shared through a header set and the
+    volatile ones (lower-cased names) that stay on the request row.
+    """
+    shared, own = {}, {}
+    for name, value in headers.items():
+        (own if name.lower() in volatile else shared)[name] = value
+    return shared, own
+
+
+def pack_payloads(
+    objs: list['UserAgentRequest'], using: str | None = None,
+) -> None:
+    """
+    Move the headers of new requests, but for USERAGENTS_LOG_VOLATILE_HEADERS,
+    into shared header sets and, with USERAGENTS_LOG_COMPRESS_PAYLOAD, the GET
+    and cookie data into the compressed ``payload`` column, as configured.
+    """
+    if get_setting('LOG_HEADER_SETS'):
+        volatile = frozenset(
+            name.lower() for name in get_setting('LOG_VOLATILE_HEADERS') or ())
+        header_sets = {}
+        for obj in objs:
+            if obj.headers is not None and obj.header_set_id is None:
+                shared, own = split_headers(obj.headers, volatile)
+                obj.header_set_id = hash_header_set(shared)
+                header_sets[obj.header_set_id] = shared
+                obj.headers = own or None
+        UserAgentHeaderSet.objects.db_manager(using).intern(header_sets)
+
+    if get_setting('LOG_COMPRESS_PAYLOAD'):
+        for obj in objs:
+            if obj.payload is not None:
+                continue
+            if obj.get is not None or obj.cookies is not None:
+                obj.payload = compress_payload(
+                    {'get': obj.get, 'cookies': obj.cookies})
+                obj.get = obj.cookies = None
+
+
+def assign_endpoints(
+    objs: list['UserAgentRequest'], using: str | None = None,
+) -> None:
+    """
+    Point new requests at the interned UserAgentEndpoint row of their
+    endpoint, which then replaces the endpoint text.
+    """
+    pending = [
+        obj for obj in objs if obj.endpoint_ref_id is None and obj.endpoint
+    ]
+    if not pending:
+        return
+    ids = UserAgentEndpoint.objects.db_manager(using).intern(
+        obj.endpoint for obj in pending)
+    for obj in pending:
+        obj.endpoint_ref_id = ids[obj.endpoint]
+        obj.endpoint = None
+
+
+class UserAgentRequestManager(models.Manager):
+
+    def create_from_entries(
+        self, entries: Iterable[dict], copy: bool = False,
+    ) -> list['UserAgentRequest']:
+        """
+        Insert a batch of request-log entries (dicts of model field values, as
+        produced by the middleware) with a single bulk INSERT. Entries of
+        devices deleted in the meantime are dropped rather than failing the
+        batch.
+
+        With ``copy``, the rows are streamed with COPY FROM STDIN where the
+        database supports it (see db.copy) and get no primary key.
+        """
+        objs = [self.model(**entry) for entry in entries]
+        if not objs:
+            return objs
+        using = self.db
+        with transaction.atomic(using=using, savepoint=False):
+            pack_payloads(objs, using=using)
+            assign_endpoints(objs, using=using)
+            objs = assign_counters(objs, using=using)
+            if get_setting('ANALYTICS_ROLLUPS'):
+                update_rollups(objs, using=using)
+            if copy and supports_copy(connections[using]):
+                copy_insert(self.model, objs, using)
+                return objs
+            return self.bulk_create(objs)
+
+
 class UserAgentRequest(models.Model):
     uad = models.ForeignKey(
         verbose_name=_('User Agent Device'),
@@ -17,8 +173,22 @@ class UserAgentRequest(models.Model):
         on_delete=models.CASCADE,
         related_name='requests',
     )
+    # Only filled on rows logged before endpoints were interned; new rows
+    # keep their endpoint in endpoint_ref alone
     endpoint = models.TextField(
-        verbose_name=_('Endpoint'),
+        verbose_name=_('Endpoint Text'),
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    endpoint_ref = models.ForeignKey(
+        verbose_name=_('Interned Endpoint'),
+        to='UserAgentEndpoint',
+        on_delete=models.PROTECT,
+        related_name='requests',
+        blank=True,
+        null=True,
+        editable=False,
     )
     response_status_code = models.IntegerField(
         verbose_name=_('Response Status Code'),
@@ -73,14 +243,60 @@ class UserAgentRequest(models.Model):
         blank=True,
         null=True,
     )
+    header_set = models.ForeignKey(
+        verbose_name=_('Header Set'),
+        to='UserAgentHeaderSet',
+        to_field='hash',
+        on_delete=models.PROTECT,
+        related_name='+',
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    payload = models.BinaryField(
+        verbose_name=_('Compressed Payload'),
+        help_text=_('GET and cookie data, zlib-compressed JSON'),
+        blank=True,
+        null=True,
+        editable=False,
+    )
     created_dt = models.DateTimeField(
         verbose_name=_('Created Datetime'),
-        auto_now_add=True,
+        # Not auto_now_add: queued log entries keep the time of the request
+        default=dj_now,
+        editable=False,
         db_index=True,
     )
 
+    objects = UserAgentRequestManager()
+
     def __str__(self):
-        return f'{self.endpoint} → {self.response_status_code}'
+        return f'{self.endpoint_path} → {self.response_status_code}'
+
+    # The logged request data, wherever it is stored
+    @property
+    def endpoint_path(self) -> str | None:
+        if self.endpoint_ref_id is not None:
+            return self.endpoint_ref.path
+        return self.endpoint
+
+    @property
+    def request_headers(self) -> dict | None:
+        if self.header_set_id is not None:
+            return {**self.header_set.headers, **(self.headers or {})}
+        return self.headers
+
+    @property
+    def request_get(self) -> dict | None:
+        if self.payload is not None:
+            return decompress_payload(self.payload).get('get')
+        return self.get
+
+    @property
+    def request_cookies(self) -> dict | None:
+        if self.payload is not None:
+            return decompress_payload(self.payload).get('cookies')
+        return self.cookies
 
     class Meta:
         verbose_name = _('User Agent Request')
@@ -90,23 +306,16 @@ class UserAgentRequest(models.Model):
         ]
 
     def save(self, **kwargs):
-        qs = self.uad.requests.all()
-        now = dj_now()
-        self.rn = qs.count() + 1
-        self.rn_ph = qs.filter(created_dt__gte=now - timedelta(hours=1)).count() + 1
-        self.rn_24h = qs.filter(created_dt__gte=now - timedelta(hours=24)).count() + 1
-
-        if self.rn_ph < 50:
-            self.status_color = '#06d6a0'
-            self.status = StatusChoices.NORMAL
-        elif self.rn_ph < 100:
-            self.status_color = '#ffba08'
-            self.status = StatusChoices.BUSY
-        elif self.rn_ph < 500:
-            self.status_color = '#f48c06'
-            self.status = StatusChoices.VERY_BUSY
-        else:
-            self.status_color = '#d00000'
-            self.status = StatusChoices.ABNORMAL
-
-        super().save(**kwargs)
+        if not self._state.adding:
+            return super().save(**kwargs)
+
+        # Counters are read from the incremental per-device counters instead of
+        # counting the request table, so the cost does not grow with history.
+        using = kwargs.get('using')
+        with transaction.atomic(using=using):
+            pack_payloads([self], using=using)
+            assign_endpoints([self], using=using)
+            assign_counters([self], using=using)
+            if get_setting('ANALYTICS_ROLLUPS'):
+                update_rollups([self], using=using)
+            super().save(**kwargs)
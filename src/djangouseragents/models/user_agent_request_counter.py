@@ -0,0 +1,237 @@
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import NamedTuple
+
+from django.db import DatabaseError, models, transaction
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils.timezone import now as dj_now, timedelta
+from django.utils.translation import gettext_lazy as _
+
+from djangouseragents.conf import get_setting
+from .user_agent_device import UserAgentDevice
+from .user_agent_rollups import RollupManager
+
+logger = logging.getLogger(__name__)
+
+HOUR_WINDOW = timedelta(hours=1)
+DAY_WINDOW = timedelta(hours=24)
+
+# time.monotonic() of this process's last prune of stale buckets
+_last_prune = None
+_prune_lock = threading.Lock()
+
+
+class RequestCounts(NamedTuple):
+    rn: int
+    rn_ph: int
+    rn_24h: int
+
+
+def _prune_due() -> bool:
+    global _last_prune
+    interval = get_setting('COUNTER_PRUNE_INTERVAL')
+    if not interval:
+        return False
+    with _prune_lock:
+        now = time.monotonic()
+        if _last_prune is not None and now - _last_prune < interval:
+            return False
+        _last_prune = now
+        return True
+
+
+def get_bucket(dt: datetime) -> datetime:
+    """
+    Floor a datetime to the start of its counter bucket.
+    """
+    size = get_setting('COUNTER_BUCKET_SECONDS')
+    ts = int(dt.timestamp())
+    return datetime.fromtimestamp(ts - ts % size, tz=dt.tzinfo)
+
+
+class UserAgentRequestCounterManager(RollupManager):
+
+    def increment(
+        self, uad_id: int, buckets: dict[datetime, int],
+        now: datetime | None = None,
+    ) -> RequestCounts:
+        """
+        Add hits to the device total and to the given buckets (bucket start
+        -> hits) and return the counts as seen right after the increment.
+        Runs a fixed number of queries regardless of how many requests the
+        device has.
+        """
+        counts = self.increment_many({uad_id: (buckets, now or dj_now())})
+        return counts[uad_id]
+
+    def increment_many(
+        self, hits: dict[int, tuple[dict[datetime, int], datetime]],
+    ) -> dict[int, RequestCounts]:
+        """
+        increment() for several devices at once: ``{uad_id: (buckets, now)}``.
+        The number of queries depends on the number of devices and buckets
+        (in 500s), not on how the hits are spread over them. Devices that no
+        longer exist are left out of the result.
+        """
+        devices = UserAgentDevice.objects.using(self.db)
+        # Devices with the same number of new hits share one UPDATE
+        by_total = defaultdict(list)
+        for uad_id, (buckets, _now) in hits.items():
+            by_total[sum(buckets.values())].append(uad_id)
+
+        with transaction.atomic(using=self.db, savepoint=False):
+            updated = 0
+            for total, uad_ids in sorted(by_total.items()):
+                for start in range(0, len(uad_ids), 500):
+                    chunk = uad_ids[start:start + 500]
+                    updated += devices.filter(pk__in=chunk).update(
+                        request_count=F('request_count') + total)
+            if updated < len(hits):
+                # Deleted since the request was logged, e.g. behind a signed
+                # cookie
+                ids = list(hits)
+                existing = set()
+                for start in range(0, len(ids), 500):
+                    existing.update(
+                        devices.filter(pk__in=ids[start:start + 500])
+                        .values_list('pk', flat=True))
+                hits = {
+                    uad_id: value for uad_id, value in hits.items()
+                    if uad_id in existing
+                }
+            self.add({
+                (uad_id, bucket): {'count': count}
+                for uad_id, (buckets, _now) in hits.items()
+                for bucket, count in buckets.items()
+            })
+            # Every USERAGENTS_COUNTER_PRUNE_INTERVAL seconds, after the
+            # commit, so the deletes hold no locks in the logging transaction
+            if _prune_due():
+                transaction.on_commit(self._prune_quietly, using=self.db)
+            return self.get_counts_many({
+                uad_id: now for uad_id, (_buckets, now) in hits.items()
+            })
+
+    def get_counts(
+        self, uad_id: int, now: datetime | None = None,
+    ) -> RequestCounts:
+        """
+        Read the total, last-hour and last-24h counts of a device in a single
+        query.
+        """
+        now = now or dj_now()
+        devices = UserAgentDevice.objects.using(self.db)
+        row = devices.filter(pk=uad_id).values_list(
+            'request_count',
+            self.window_count(HOUR_WINDOW, now),
+            self.window_count(DAY_WINDOW, now),
+        ).first()
+        return RequestCounts(*row) if row else RequestCounts(0, 0, 0)
+
+    def get_counts_many(
+        self, nows: dict[int, datetime],
+    ) -> dict[int, RequestCounts]:
+        """
+        get_counts() of several devices, each as of its own ``now``; two
+        queries per 500 devices. The windows are summed in Python.
+        """
+        ids = sorted(nows)
+        hour_start = {
+            uad_id: get_bucket(now - HOUR_WINDOW)
+            for uad_id, now in nows.items()
+        }
+        day_start = {
+            uad_id: get_bucket(now - DAY_WINDOW)
+            for uad_id, now in nows.items()
+        }
+        devices = UserAgentDevice.objects.using(self.db)
+        totals = {}
+        hour = defaultdict(int)
+        day = defaultdict(int)
+        for start in range(0, len(ids), 500):
+            chunk = ids[start:start + 500]
+            totals.update(devices.filter(pk__in=chunk).values_list(
+                'pk', 'request_count'))
+            rows = self.filter(
+                uad_id__in=chunk,
+                bucket__gte=min(day_start[i] for i in chunk),
+            ).values_list('uad_id', 'bucket', 'count')
+            for uad_id, bucket, count in rows:
+                if bucket >= day_start[uad_id]:
+                    day[uad_id] += count
+                    if bucket >= hour_start[uad_id]:
+                        hour[uad_id] += count
+        return {
+            uad_id: (
+                RequestCounts(totals[uad_id], hour[uad_id], day[uad_id])
+                if uad_id in totals else RequestCounts(0, 0, 0)
+            )
+            for uad_id in ids
+        }
+
+    def window_count(
+        self, window: timedelta, now: datetime | None = None,
+    ) -> Coalesce:
+        """
+        Expression counting the requests of the outer device
+        (``OuterRef('pk')``) over the last ``window``; usable in annotate()
+        on device querysets.
+        """
+        now = now or dj_now()
+        buckets = self.filter(
+            uad_id=OuterRef('pk'), bucket__gte=get_bucket(now - window),
+        ).values('uad')
+        return Coalesce(
+            Subquery(buckets.annotate(s=Sum('count')).values('s')), 0)
+
+    def prune(self, now: datetime | None = None) -> int:
+        """
+        Delete buckets that fell out of the 24h window.
+        """
+        now = now or dj_now()
+        return self.filter(bucket__lt=get_bucket(now - DAY_WINDOW)).delete()[0]
+
+    def _prune_quietly(self) -> None:
+        try:
+            self.prune()
+        except DatabaseError:
+            logger.exception('Failed to prune the request counter buckets')
+
+
+class UserAgentRequestCounter(models.Model):
+    dimensions = ('uad', 'bucket')
+    measures = ('count',)
+
+    uad = models.ForeignKey(
+        verbose_name=_('User Agent Device'),
+        to='UserAgentDevice',
+        on_delete=models.CASCADE,
+        related_name='request_counters',
+    )
+    bucket = models.DateTimeField(
+        verbose_name=_('Bucket Start'),
+    )
+    count = models.IntegerField(
+        verbose_name=_('Request Count'),
+        default=0,
+    )
+
+    objects = UserAgentRequestCounterManager()
+
+    def __str__(self):
+        return f'{self.uad_id} @ {self.bucket}: {self.count}'
+
+    class Meta:
+        verbose_name = _('User Agent Request Counter')
+        verbose_name_plural = _('User Agent Request Counters')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['uad', 'bucket'], name='uniq_uad_counter_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['bucket'], name='idx_counter_bucket'),
+        ]
@@ -0,0 +1,107 @@
+from collections import Counter
+
+from django.db import models
+from django.db.models import Count
+from django.db.models.functions import TruncDate
+from django.utils.translation import gettext_lazy as _
+
+from .user_agent_endpoint import UserAgentEndpoint
+from .user_agent_rollups import RollupManager
+
+
+class UserAgentRequestDailySummaryManager(RollupManager):
+
+    def add_requests(self, requests: models.QuerySet) -> int:
+        """
+        Count the given UserAgentRequest rows into the summaries, with one
+        GROUP BY query; returns the number of summary rows touched. Rows
+        logged before endpoints were interned are counted under the
+        interned form of their endpoint text.
+        """
+        rows = list(
+            requests.annotate(day=TruncDate('created_dt'))
+            .values(
+                'uad_id', 'day', 'endpoint_ref_id', 'endpoint', 'method',
+                'response_status_code',
+            )
+            .annotate(n=Count('pk'))
+            .order_by()
+        )
+        legacy = [
+            row['endpoint'] or '' for row in rows
+            if row['endpoint_ref_id'] is None
+        ]
+        endpoints = UserAgentEndpoint.objects.db_manager(self.db)
+        ids = endpoints.intern(legacy) if legacy else {}
+
+        counts = Counter()
+        for row in rows:
+            endpoint_id = row['endpoint_ref_id'] or ids[row['endpoint'] or '']
+            key = (
+                row['uad_id'], row['day'], endpoint_id, row['method'] or '',
+                row['response_status_code'],
+            )
+            counts[key] += row['n']
+        self.add({key: {'count': n} for key, n in counts.items()})
+        return len(counts)
+
+
+class UserAgentRequestDailySummary(models.Model):
+    """
+    Per-device, per-endpoint, per-day request counts that survive pruning of
+    the raw UserAgentRequest rows.
+    """
+    dimensions = ('uad', 'day', 'endpoint', 'method', 'response_status_code')
+    measures = ('count',)
+
+    uad = models.ForeignKey(
+        verbose_name=_('User Agent Device'),
+        to='UserAgentDevice',
+        on_delete=models.CASCADE,
+        related_name='daily_summaries',
+    )
+    day = models.DateField(
+        verbose_name=_('Day'),
+    )
+    endpoint = models.ForeignKey(
+        verbose_name=_('Endpoint'),
+        to='UserAgentEndpoint',
+        on_delete=models.PROTECT,
+        related_name='daily_summaries',
+    )
+    method = models.CharField(
+        verbose_name=_('HTTP Method'),
+        max_length=64,
+        blank=True,
+        default='',
+    )
+    response_status_code = models.IntegerField(
+        verbose_name=_('Response Status Code'),
+    )
+    count = models.IntegerField(
+        verbose_name=_('Request Count'),
+        default=0,
+    )
+
+    objects = UserAgentRequestDailySummaryManager()
+
+    def __str__(self):
+        return (
+            f'{self.day} {self.endpoint_id} → '
+            f'{self.response_status_code}: {self.count}'
+        )
+
+    class Meta:
+        verbose_name = _('User Agent Request Daily Summary')
+        verbose_name_plural = _('User Agent Request Daily Summaries')
+        constraints = [
+            models.UniqueConstraint(
+                fields=[
+                    'uad', 'day', 'endpoint', 'method', 'response_status_code',
+                ],
+                name='uniq_uad_daily_summary',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['day'], name='idx_daily_summary_day'),
+        ]
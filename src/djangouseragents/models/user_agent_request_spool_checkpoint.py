@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class UserAgentRequestSpoolCheckpoint(models.Model):
+    """
+    How far ingest_useragent_requests got in a spool file. Moved in the same
+    transaction as the rows it loaded, so an interrupted file is resumed
+    without loading any record twice.
+    """
+    name = models.CharField(
+        verbose_name=_('Spool File'),
+        max_length=255,
+        unique=True,
+    )
+    offset = models.BigIntegerField(
+        verbose_name=_('Offset'),
+        default=0,
+        help_text=_('Bytes of the file already loaded'),
+    )
+    updated_dt = models.DateTimeField(
+        verbose_name=_('Updated DateTime'),
+        auto_now=True,
+    )
+
+    def __str__(self):
+        return f'{self.name} @ {self.offset}'
+
+    class Meta:
+        verbose_name = _('User Agent Request Spool Checkpoint')
+        verbose_name_plural = _('User Agent Request Spool Checkpoints')
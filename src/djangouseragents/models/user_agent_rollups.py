@@ -0,0 +1,267 @@
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+
+from django.db import IntegrityError, connections, models, router, transaction
+from django.db.models import F
+from django.utils.translation import gettext_lazy as _
+
+from djangouseragents.utils import LRUCache
+from .user_agent_device import UserAgentDevice
+
+# uad_id -> (browser_family, os_family, is_bot); filled only after commit
+_device_dimensions = LRUCache(maxsize=10_000)
+
+
+def get_hour(dt: datetime) -> datetime:
+    """
+    Floor a datetime to the start of its (UTC) hour.
+    """
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+
+class RollupManager(models.Manager):
+    """
+    Manager of a counter table (the hourly rollups, the per-device request
+    buckets) whose rows are identified by ``model.dimensions`` and carry the
+    integer ``model.measures``.
+    """
+
+    def add(self, rows: dict[tuple, dict[str, int]]) -> None:
+        """
+        Add ``{dimension values: {measure: amount}}`` to the stored rows,
+        creating missing ones. One statement per 500 rows on PostgreSQL and
+        SQLite (INSERT ... ON CONFLICT DO UPDATE); other backends update or
+        create row by row.
+        """
+        if not rows:
+            return
+        using = self._db or router.db_for_write(self.model)
+        connection = connections[using]
+        # A stable order keeps concurrent writers from deadlocking on each
+        # other
+        items = sorted(
+            rows.items(), key=lambda item: tuple(str(v) for v in item[0]))
+        with transaction.atomic(using=using, savepoint=False):
+            if connection.vendor in ('postgresql', 'sqlite'):
+                for start in range(0, len(items), 500):
+                    self._upsert(connection, items[start:start + 500])
+            else:
+                for key, amounts in items:
+                    self._add_one(using, key, amounts)
+
+    def _upsert(self, connection, items) -> None:
+        meta = self.model._meta
+        qn = connection.ops.quote_name
+        dimensions = [meta.get_field(name) for name in self.model.dimensions]
+        measures = [meta.get_field(name) for name in self.model.measures]
+        fields = dimensions + measures
+        table = qn(meta.db_table)
+        row = '({})'.format(', '.join(['%s'] * len(fields)))
+        sql = (
+            'INSERT INTO {table} ({columns}) VALUES {values} '
+            'ON CONFLICT ({conflict}) DO UPDATE SET {updates}'
+        ).format(
+            table=table,
+            columns=', '.join(qn(f.column) for f in fields),
+            values=', '.join([row] * len(items)),
+            conflict=', '.join(qn(f.column) for f in dimensions),
+            updates=', '.join(
+                f'{qn(f.column)} = '
+                f'{table}.{qn(f.column)} + EXCLUDED.{qn(f.column)}'
+                for f in measures
+            ),
+        )
+        params = []
+        for key, amounts in items:
+            values = list(key) + [amounts.get(f.name, 0) for f in measures]
+            params += [
+                f.get_db_prep_save(value, connection)
+                for f, value in zip(fields, values)
+            ]
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+
+    def _add_one(
+        self, using: str, key: tuple, amounts: dict[str, int],
+    ) -> None:
+        # attnames, so foreign keys can be given as ids
+        lookup = {
+            self.model._meta.get_field(name).attname: value
+            for name, value in zip(self.model.dimensions, key)
+        }
+        qs = self.db_manager(using).filter(**lookup)
+        updates = {name: F(name) + amount for name, amount in amounts.items()}
+        if qs.update(**updates):
+            return
+        try:
+            with transaction.atomic(using=using):
+                self.db_manager(using).create(**lookup, **amounts)
+        except IntegrityError:
+            qs.update(**updates)
+
+
+class UserAgentTrafficRollup(models.Model):
+    """
+    Requests and created devices per hour, browser, OS and bot flag.
+    """
+    dimensions = ('hour', 'browser_family', 'os_family', 'is_bot')
+    measures = ('requests', 'new_devices')
+
+    hour = models.DateTimeField(
+        verbose_name=_('Hour'),
+    )
+    browser_family = models.CharField(
+        verbose_name=_('Browser Family'),
+        max_length=255,
+        default='',
+    )
+    os_family = models.CharField(
+        verbose_name=_('OS Family'),
+        max_length=255,
+        default='',
+    )
+    is_bot = models.BooleanField(
+        verbose_name=_('Is Bot'),
+        default=False,
+    )
+    requests = models.BigIntegerField(
+        verbose_name=_('Requests'),
+        default=0,
+    )
+    new_devices = models.IntegerField(
+        verbose_name=_('New Devices'),
+        default=0,
+    )
+
+    objects = RollupManager()
+
+    def __str__(self):
+        return (
+            f'{self.hour} {self.browser_family} / {self.os_family}: '
+            f'{self.requests}'
+        )
+
+    class Meta:
+        verbose_name = _('Traffic Rollup')
+        verbose_name_plural = _('Traffic Rollups')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hour', 'browser_family', 'os_family', 'is_bot'],
+                name='uniq_traffic_rollup',
+            ),
+        ]
+
+
+class UserAgentEndpointRollup(models.Model):
+    """
+    Requests per hour, endpoint and response status code.
+    """
+    dimensions = ('hour', 'endpoint', 'response_status_code')
+    measures = ('requests',)
+
+    hour = models.DateTimeField(
+        verbose_name=_('Hour'),
+    )
+    endpoint = models.ForeignKey(
+        verbose_name=_('Endpoint'),
+        to='UserAgentEndpoint',
+        on_delete=models.CASCADE,
+        related_name='rollups',
+    )
+    response_status_code = models.IntegerField(
+        verbose_name=_('Response Status Code'),
+    )
+    requests = models.BigIntegerField(
+        verbose_name=_('Requests'),
+        default=0,
+    )
+
+    objects = RollupManager()
+
+    def __str__(self):
+        return (
+            f'{self.hour} {self.endpoint_id} → {self.response_status_code}: '
+            f'{self.requests}'
+        )
+
+    class Meta:
+        verbose_name = _('Endpoint Rollup')
+        verbose_name_plural = _('Endpoint Rollups')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['hour', 'endpoint', 'response_status_code'],
+                name='uniq_endpoint_rollup',
+            ),
+        ]
+
+
+def get_device_dimensions(
+    uad_ids, using: str | None = None,
+) -> dict[int, tuple]:
+    """
+    (browser_family, os_family, is_bot) of the given devices, cached
+    in-process.
+    """
+    found = {}
+    missing = []
+    for uad_id in set(uad_ids):
+        dims = _device_dimensions.get(uad_id)
+        if dims is None:
+            missing.append(uad_id)
+        else:
+            found[uad_id] = dims
+    if missing:
+        devices = UserAgentDevice.objects.db_manager(using)
+        rows = devices.filter(pk__in=missing).values_list(
+            'pk', 'browser_family', 'os_family', 'is_bot')
+        fetched = {
+            pk: (browser or '', os or '', bool(is_bot))
+            for pk, browser, os, is_bot in rows
+        }
+        found.update(fetched)
+        transaction.on_commit(
+            lambda: [
+                _device_dimensions.set(pk, dims)
+                for pk, dims in fetched.items()
+            ],
+            using=using,
+        )
+    return found
+
+
+def add_new_devices(devices, using: str | None = None) -> None:
+    """
+    Count just created devices into the traffic rollups, in the hour of their
+    ``created_dt``.
+    """
+    traffic = defaultdict(Counter)
+    for obj in devices:
+        key = (
+            get_hour(obj.created_dt), obj.browser_family or '',
+            obj.os_family or '', bool(obj.is_bot),
+        )
+        traffic[key]['new_devices'] += 1
+    UserAgentTrafficRollup.objects.db_manager(using).add(traffic)
+
+
+def update_rollups(objs, using: str | None = None) -> None:
+    """
+    Add a batch of new requests to the hourly rollups.
+    """
+    dimensions = get_device_dimensions(
+        (obj.uad_id for obj in objs), using=using)
+    traffic = defaultdict(Counter)
+    endpoints = defaultdict(Counter)
+    for obj in objs:
+        hour = get_hour(obj.created_dt)
+        device = dimensions.get(obj.uad_id)
+        if device is not None:
+            traffic[(hour, *device)]['requests'] += 1
+        if obj.endpoint_ref_id is not None:
+            key = (hour, obj.endpoint_ref_id, obj.response_status_code)
+            endpoints[key]['requests'] += 1
+
+    UserAgentTrafficRollup.objects.db_manager(using).add(traffic)
+    UserAgentEndpointRollup.objects.db_manager(using).add(endpoints)
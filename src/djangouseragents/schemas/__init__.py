@@ -1 +1,2 @@
+from .uad_record import UADRecord
 from .uad_schema import UADSchema
@@ -0,0 +1,91 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from operator import attrgetter
+
+from django.http.request import HttpRequest
+
+from djangouseragents.models import UserAgentDeviceModel
+from .uad_schema import _UNSET, UADSchema, get_request_fields
+
+
+@dataclass(slots=True)
+class UADRecord:
+    """
+    Lightweight device record attached to requests as ``request.uad``.
+    Same attributes as UADSchema, without pydantic validation: the data comes
+    from our own DB or parser. Use UADSchema for API serialization.
+
+    ``rate`` / ``rate_status`` describe the current request (the client's
+    requests in the last hour and its status bucket, see the rate tracker) and
+    are not device fields. They are only set for clients identified by a
+    signed cookie: a per-IP rate is not the device's own.
+    """
+    id: int | None = None
+    user_id: str | None = None
+    is_mobile: bool | None = None
+    is_tablet: bool | None = None
+    is_touch_capable: bool | None = None
+    is_pc: bool | None = None
+    is_bot: bool | None = None
+    browser_family: str | None = None
+    browser_version: str | None = None
+    os_family: str | None = None
+    os_version: str | None = None
+    device_family: str | None = None
+    device_brand: str | None = None
+    device_model: str | None = None
+    ip: str | None = None
+    key: str | None = None
+    created_dt: datetime | None = None
+    rate: int | None = None
+    rate_status: str | None = None
+
+    @classmethod
+    def from_model(cls, model: UserAgentDeviceModel) -> 'UADRecord':
+        return cls(*_get_model_fields(model))
+
+    @classmethod
+    def from_request(
+        cls, request: HttpRequest, user_id: str | None = _UNSET,
+    ) -> 'UADRecord':
+        return cls(**get_request_fields(request, user_id))
+
+    def to_model(self) -> UserAgentDeviceModel:
+        """
+        Unsaved model instance carrying the record's values.
+        """
+        return UserAgentDeviceModel(
+            **{name: getattr(self, name) for name in UAD_RECORD_FIELDS})
+
+    def to_schema(self) -> UADSchema:
+        return UADSchema.from_record(self)
+
+    def to_dict(self) -> dict:
+        """
+        Same output as UADSchema.to_dict.
+        """
+        data = {}
+        for name in UAD_RECORD_FIELDS:
+            value = getattr(self, name)
+            if value is not None:
+                data[name] = value
+
+        if 'id' in data:
+            data['id'] = str(data['id'])
+        if 'user_id' in data:
+            data['user_id'] = str(data['user_id'])
+
+        if 'created_dt' in data:
+            data['created_dt'] = (
+                data['created_dt'].isoformat()
+                if isinstance(data['created_dt'], datetime)
+                else str(data['created_dt']))
+
+        return data
+
+
+UAD_RECORD_FIELDS = tuple(
+    f.name for f in fields(UADRecord)
+    if f.name not in ('rate', 'rate_status')
+)
+_get_model_fields = attrgetter(*UAD_RECORD_FIELDS)
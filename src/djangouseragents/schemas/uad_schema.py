@@ -1,10 +1,11 @@
 from datetime import datetime
-from hashlib import md5
 
 from django.http.request import HttpRequest
 from pydantic import BaseModel
 
 from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.utils import hash_device_key
+from .user_agent_parser import parse_user_agent
 
 
 def _user_agent_device_key_creator(**kwargs):
@@ -15,7 +16,7 @@ def _user_agent_device_key_creator(**kwargs):
         'device_brand', 'device_model', 'ip'
     ]
     str_ = '-'.join(str(kwargs.get(k) or '') for k in keys)
-    return md5(str_.encode('utf-8')).hexdigest()
+    return hash_device_key(str_.encode('utf-8'))
 
 
 def get_client_ip(request: HttpRequest) -> str | None:
@@ -27,6 +28,47 @@ def get_client_ip(request: HttpRequest) -> str | None:
     return ip
 
 
+def get_user_id(request: HttpRequest) -> str | None:
+    if hasattr(request, 'user') and request.user.is_authenticated:
+        return str(request.user.id)
+    return None
+
+
+# Marks an argument that was not passed, as opposed to an explicit None
+_UNSET = object()
+
+
+def get_request_fields(
+    request: HttpRequest, user_id: str | None = _UNSET,
+) -> dict:
+    """
+    Device fields (including the derived key) of a request that has no
+    device yet.
+    """
+    # Callers that already know the user (e.g. async code, where touching
+    # request.user may hit the DB) pass it in explicitly
+    return get_device_fields(
+        user_id=get_user_id(request) if user_id is _UNSET else user_id,
+        ip=get_client_ip(request),
+        parsed=parse_user_agent(request),
+    )
+
+
+def get_device_fields(
+    user_id: str | None, ip: str | None, parsed: dict | None,
+) -> dict:
+    """
+    Device fields and derived key from a user, client IP and parsed user agent,
+    wherever they come from (a request, an access log line).
+    """
+    kw = {'user_id': user_id, 'ip': ip}
+    if parsed is not None:
+        kw.update(parsed)
+
+    kw['key'] = _user_agent_device_key_creator(**{k: v or '' for k, v in kw.items()})
+    return kw
+
+
 class UADSchema(BaseModel):
     id: int | None = None
     user_id: str | None = None
@@ -69,32 +111,15 @@ class UADSchema(BaseModel):
         )
 
     @classmethod
-    def from_request(cls, request: HttpRequest) -> 'UADSchema':
-        kw = {
-            'user_id': str(request.user.id) if (
-                    hasattr(request, 'user') and request.user.is_authenticated) else None,
-            'ip': get_client_ip(request),
-        }
-
-        if hasattr(request, 'user_agent'):
-            ua = request.user_agent
-            kw.update({
-                'is_mobile': ua.is_mobile,
-                'is_tablet': ua.is_tablet,
-                'is_touch_capable': ua.is_touch_capable,
-                'is_pc': ua.is_pc,
-                'is_bot': ua.is_bot,
-                'browser_family': ua.browser.family,
-                'browser_version': ua.browser.version_string,
-                'os_family': ua.os.family,
-                'os_version': ua.os.version_string,
-                'device_family': ua.device.family,
-                'device_brand': ua.device.brand,
-                'device_model': ua.device.model,
-            })
-
-        kw['key'] = _user_agent_device_key_creator(**{k: v or '' for k, v in kw.items()})
-        return cls(**kw)
+    def from_request(
+        cls, request: HttpRequest, user_id: str | None = _UNSET,
+    ) -> 'UADSchema':
+        return cls(**get_request_fields(request, user_id))
+
+    @classmethod
+    def from_record(cls, record) -> 'UADSchema':
+        return cls(
+            **{name: getattr(record, name) for name in cls.model_fields})
 
     def to_dict(self) -> dict:
         data = self.model_dump(exclude_none=True)
@@ -0,0 +1,85 @@
+import threading
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http.request import HttpRequest
+
+from djangouseragents.conf import get_setting
+from djangouseragents.utils import LRUCache
+
+USER_AGENT_FIELDS = (
+    'is_mobile', 'is_tablet', 'is_touch_capable', 'is_pc', 'is_bot',
+    'browser_family', 'browser_version', 'os_family', 'os_version',
+    'device_family', 'device_brand', 'device_model',
+)
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_user_agent_cache() -> LRUCache:
+    """
+    Return the process-wide cache of parsed user agents, keyed on the raw
+    User-Agent header. Its ``stats()`` report the hit rate.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LRUCache(maxsize=get_setting('USER_AGENT_CACHE_SIZE'))
+    return _cache
+
+
+@receiver(setting_changed)
+def _reset_user_agent_cache(setting, **kwargs):
+    global _cache
+    if setting == 'USERAGENTS_USER_AGENT_CACHE_SIZE':
+        _cache = None
+
+
+def _read_user_agent(ua) -> tuple:
+    return (
+        ua.is_mobile,
+        ua.is_tablet,
+        ua.is_touch_capable,
+        ua.is_pc,
+        ua.is_bot,
+        ua.browser.family,
+        ua.browser.version_string,
+        ua.os.family,
+        ua.os.version_string,
+        ua.device.family,
+        ua.device.brand,
+        ua.device.model,
+    )
+
+
+def parse_user_agent(request: HttpRequest) -> dict | None:
+    """
+    Return the parsed user-agent fields of the request, or None when no
+    ``request.user_agent`` is available. The regex-based parse behind
+    ``request.user_agent`` only runs on a cache miss.
+    """
+    if not hasattr(request, 'user_agent'):
+        return None
+
+    ua_string = request.META.get('HTTP_USER_AGENT', '')
+    cache = get_user_agent_cache()
+    fields = cache.get(ua_string)
+    if fields is None:
+        fields = _read_user_agent(request.user_agent)
+        cache.set(ua_string, fields)
+    return dict(zip(USER_AGENT_FIELDS, fields))
+
+
+def parse_user_agent_strings(ua_strings: list[str]) -> list[tuple]:
+    """
+    Parse raw User-Agent strings outside a request, into tuples of
+    USER_AGENT_FIELDS values. Bypasses the cache: meant for batch jobs, which
+    deduplicate first and may run it in worker processes.
+    """
+    # Only batch jobs need the parser itself; requests read
+    # request.user_agent from django_user_agents
+    from user_agents import parse
+
+    return [_read_user_agent(parse(ua_string)) for ua_string in ua_strings]
@@ -0,0 +1,103 @@
+import gzip
+import re
+import sys
+from datetime import datetime
+from typing import IO, NamedTuple
+from urllib.parse import unquote
+
+from django.http import QueryDict
+from django.utils.timezone import is_naive, make_aware
+
+# The "combined" format of nginx and Apache, which is also gunicorn's default:
+# $remote_addr - $remote_user [$time_local] "$request" $status $body_bytes_sent
+# "$http_referer" "$http_user_agent"
+COMBINED_PATTERN = (
+    r'(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<target>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "(?P<referer>(?:[^"\\]|\\.)*)" "(?P<user_agent>(?:[^"\\]|\\.)*)")?'
+)
+TIME_FORMAT = '%d/%b/%Y:%H:%M:%S %z'
+
+
+class AccessLogLine(NamedTuple):
+    ip: str
+    created_dt: datetime
+    method: str
+    path: str
+    query: str
+    status: int
+    referer: str
+    user_agent: str
+
+
+class AccessLogParser:
+    """
+    Turns access-log lines into AccessLogLine tuples. ``pattern`` is a regex
+    with the named groups ``ip``, ``time``, ``method``, ``target`` (path and
+    query string) and ``status``, optionally ``referer`` and ``user_agent``;
+    ``time`` is read with ``time_format``, in the current time zone when it
+    has no offset.
+    """
+
+    def __init__(
+        self, pattern: str = COMBINED_PATTERN, time_format: str = TIME_FORMAT,
+    ):
+        self.regex = re.compile(pattern)
+        self.time_format = time_format
+        # Consecutive lines mostly share their timestamp; strptime is slow
+        self._last_time = (None, None)
+
+    def _parse_time(self, value: str) -> datetime:
+        if self._last_time[0] != value:
+            dt = datetime.strptime(value, self.time_format)
+            self._last_time = (value, make_aware(dt) if is_naive(dt) else dt)
+        return self._last_time[1]
+
+    def parse(self, line: str) -> AccessLogLine | None:
+        """
+        Parse one line, or return None when it does not match.
+        """
+        match = self.regex.match(line)
+        if match is None:
+            return None
+        groups = match.groupdict()
+        try:
+            created_dt = self._parse_time(groups['time'])
+        except ValueError:
+            return None
+        path, _, query = groups['target'].partition('?')
+        return AccessLogLine(
+            ip=groups['ip'],
+            created_dt=created_dt,
+            method=groups['method'],
+            path=unquote(path),
+            query=query,
+            status=int(groups['status']),
+            referer=_unescape(groups.get('referer') or ''),
+            user_agent=_unescape(groups.get('user_agent') or ''),
+        )
+
+
+def _unescape(value: str) -> str:
+    return value.replace('\\"', '"') if '\\' in value else value
+
+
+def parse_query(query: str) -> dict:
+    """
+    The query string as logged by the middleware (``dict(request.GET)``).
+    """
+    return dict(QueryDict(query).lists()) if query else {}
+
+
+def open_access_log(path: str) -> IO[str]:
+    """
+    Open a plain or gzip-compressed log file for reading text; ``-`` is stdin.
+    Compression is detected from the content, not the file name.
+    """
+    if path == '-':
+        return sys.stdin
+    with open(path, 'rb') as f:
+        is_gzip = f.read(2) == b'\x1f\x8b'
+    if is_gzip:
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, encoding='utf-8', errors='replace')
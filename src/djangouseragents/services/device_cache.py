@@ -0,0 +1,140 @@
+import copy
+import threading
+
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from djangouseragents.conf import get_setting
+from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.utils import LRUCache
+
+
+class DeviceCache:
+    """
+    Two-tier cache of UserAgentDeviceModel rows keyed on the device key: an
+    in-process LRU in front of a Django cache backend shared between processes.
+
+    Rows are invalidated on save/delete; the local tier of other processes may
+    still serve a stale row for up to ``local_timeout`` seconds.
+    """
+
+    key_prefix = 'djangouseragents:device:'
+
+    def __init__(
+            self,
+            alias: str | None = 'default',
+            timeout: int | None = 3600,
+            local_maxsize: int = 10_000,
+            local_timeout: float | None = 60,
+    ):
+        self.shared = caches[alias] if alias else None
+        self.timeout = timeout
+        self.local = LRUCache(maxsize=local_maxsize, ttl=local_timeout)
+        self.shared_hits = 0
+        self.shared_misses = 0
+
+    def _cache_key(self, key: str) -> str:
+        return self.key_prefix + key
+
+    def get(self, key: str) -> UserAgentDeviceModel | None:
+        obj = self.local.get(key)
+        if obj is None and self.shared is not None:
+            obj = self.shared.get(self._cache_key(key))
+            self._count_shared(obj)
+            if obj is not None:
+                self.local.set(key, obj)
+        # Callers get their own copy; the cached instance is shared by threads
+        return copy.copy(obj) if obj is not None else None
+
+    async def aget(self, key: str) -> UserAgentDeviceModel | None:
+        obj = self.local.get(key)
+        if obj is None and self.shared is not None:
+            obj = await self.shared.aget(self._cache_key(key))
+            self._count_shared(obj)
+            if obj is not None:
+                self.local.set(key, obj)
+        return copy.copy(obj) if obj is not None else None
+
+    def set(self, obj: UserAgentDeviceModel) -> None:
+        if not obj.key:
+            return
+        obj = copy.copy(obj)
+        self.local.set(obj.key, obj)
+        if self.shared is not None:
+            self.shared.set(self._cache_key(obj.key), obj, self.timeout)
+
+    async def aset(self, obj: UserAgentDeviceModel) -> None:
+        if not obj.key:
+            return
+        obj = copy.copy(obj)
+        self.local.set(obj.key, obj)
+        if self.shared is not None:
+            await self.shared.aset(self._cache_key(obj.key), obj, self.timeout)
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._cache_key(key))
+
+    def _count_shared(self, obj) -> None:
+        if obj is None:
+            self.shared_misses += 1
+        else:
+            self.shared_hits += 1
+
+    def stats(self) -> dict:
+        """
+        Hit/miss counters of this process. ``hit_rate`` counts a request as a
+        hit when either tier answered it.
+        """
+        local = self.local.stats()
+        lookups = local['hits'] + local['misses']
+        hits = local['hits'] + self.shared_hits
+        return {
+            'local_hits': local['hits'],
+            'shared_hits': self.shared_hits,
+            'misses': lookups - hits,
+            'local_size': local['size'],
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+
+_device_cache = None
+_device_cache_lock = threading.Lock()
+
+
+def get_device_cache() -> DeviceCache | None:
+    """
+    Return the process-wide device cache, or None when USERAGENTS_DEVICE_CACHE
+    is disabled.
+    """
+    global _device_cache
+    if not get_setting('DEVICE_CACHE'):
+        return None
+    if _device_cache is None:
+        with _device_cache_lock:
+            if _device_cache is None:
+                _device_cache = DeviceCache(
+                    alias=get_setting('DEVICE_CACHE_ALIAS'),
+                    timeout=get_setting('DEVICE_CACHE_TIMEOUT'),
+                    local_maxsize=get_setting('DEVICE_CACHE_LOCAL_MAXSIZE'),
+                    local_timeout=get_setting('DEVICE_CACHE_LOCAL_TIMEOUT'),
+                )
+    return _device_cache
+
+
+@receiver(setting_changed)
+def _reset_device_cache(setting, **kwargs):
+    global _device_cache
+    if setting.startswith('USERAGENTS_DEVICE_CACHE'):
+        _device_cache = None
+
+
+@receiver(post_save, sender=UserAgentDeviceModel)
+@receiver(post_delete, sender=UserAgentDeviceModel)
+def _invalidate_device(sender, instance, **kwargs):
+    cache = get_device_cache()
+    if cache is not None and instance.key:
+        cache.delete(instance.key)
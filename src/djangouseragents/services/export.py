@@ -0,0 +1,240 @@
+import csv
+import io
+import json
+from datetime import datetime, time
+from itertools import islice
+from typing import Iterable, Iterator
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.dateparse import parse_date, parse_datetime
+from django.utils.timezone import is_naive, make_aware
+
+from djangouseragents.models import UserAgentDeviceModel, UserAgentRequestModel
+from djangouseragents.utils import decompress_payload
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # optional dependency
+    pyarrow = None
+
+DEVICE_FIELDS = (
+    'id', 'name', 'key', 'user_id', 'is_mobile', 'is_tablet',
+    'is_touch_capable', 'is_pc', 'is_bot', 'browser_family',
+    'browser_version', 'os_family', 'os_version', 'device_family',
+    'device_brand', 'device_model', 'ip', 'request_count', 'created_dt',
+)
+REQUEST_FIELDS = (
+    'id', 'uad_id', 'endpoint', 'method', 'response_status_code', 'rn',
+    'rn_ph', 'rn_24h', 'status', 'created_dt', 'get', 'headers', 'cookies',
+)
+# JSON columns, written as JSON text by CSV and Parquet
+JSON_FIELDS = frozenset(('get', 'headers', 'cookies'))
+
+DATASETS = {
+    'devices': (UserAgentDeviceModel, DEVICE_FIELDS),
+    'requests': (UserAgentRequestModel, REQUEST_FIELDS),
+}
+FORMATS = {
+    'csv': 'text/csv',
+    'ndjson': 'application/x-ndjson',
+    'parquet': 'application/vnd.apache.parquet',
+}
+
+
+def parse_bound(value: str | None) -> datetime | None:
+    """
+    Parse a ``YYYY-MM-DD`` or ISO datetime filter bound; dates mean midnight.
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError(f'Invalid date: {value!r}')
+        dt = datetime.combine(day, time.min)
+    return make_aware(dt) if is_naive(dt) else dt
+
+
+def get_export_queryset(
+    dataset: str,
+    since: datetime | None = None,
+    until: datetime | None = None,
+    statuses: Iterable[str] = (),
+    device: int | None = None,
+    after_id: int | None = None,
+) -> models.QuerySet:
+    """
+    Rows of ``dataset`` (``'devices'`` or ``'requests'``) in primary-key
+    order, so an interrupted export can be resumed with ``after_id``.
+    """
+    if dataset not in DATASETS:
+        raise ValueError(
+            f'Unknown dataset {dataset!r}; '
+            f'choose from {", ".join(DATASETS)}.')
+    model, _ = DATASETS[dataset]
+    qs = model.objects.order_by('pk')
+    if since is not None:
+        qs = qs.filter(created_dt__gte=since)
+    if until is not None:
+        qs = qs.filter(created_dt__lt=until)
+    if after_id is not None:
+        qs = qs.filter(pk__gt=after_id)
+    statuses = list(statuses)
+    if dataset == 'requests':
+        if statuses:
+            qs = qs.filter(status__in=statuses)
+        if device is not None:
+            qs = qs.filter(uad_id=device)
+    else:
+        if statuses:
+            raise ValueError(
+                'Devices have no status; --status only applies to requests.')
+        if device is not None:
+            qs = qs.filter(pk=device)
+    return qs
+
+
+def iter_rows(
+    dataset: str, qs: models.QuerySet, chunk_size: int = 2000,
+) -> Iterator[dict]:
+    """
+    Stream the export rows of ``qs`` as dicts. ``iterator`` uses a
+    server-side cursor where the database supports it, so memory stays
+    bounded.
+    """
+    _, fields = DATASETS[dataset]
+    if dataset == 'devices':
+        yield from qs.values(*fields).iterator(chunk_size=chunk_size)
+        return
+
+    # The endpoint is interned, and headers and GET / cookie data may live in
+    # a header set or the compressed payload
+    columns = [*fields, 'endpoint_ref__path', 'header_set__headers', 'payload']
+    for row in qs.values(*columns).iterator(chunk_size=chunk_size):
+        path = row.pop('endpoint_ref__path')
+        if path is not None:
+            row['endpoint'] = path
+        shared_headers = row.pop('header_set__headers')
+        if shared_headers is not None:
+            row['headers'] = {**shared_headers, **(row['headers'] or {})}
+        payload = row.pop('payload')
+        if payload is not None:
+            data = decompress_payload(payload)
+            row['get'], row['cookies'] = data.get('get'), data.get('cookies')
+        yield {f: row[f] for f in fields}
+
+
+def _to_text(value) -> str | None:
+    return None if value is None else json.dumps(value, cls=DjangoJSONEncoder)
+
+
+def _cell(row: dict, field: str):
+    return _to_text(row[field]) if field in JSON_FIELDS else row[field]
+
+
+def _csv_chunks(fields, rows) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(fields)
+    for i, row in enumerate(rows, 1):
+        writer.writerow([_cell(row, f) for f in fields])
+        if i % 1000 == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ndjson_chunks(fields, rows) -> Iterator[str]:
+    encoder = DjangoJSONEncoder(separators=(',', ':'))
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def _parquet_schema(model, fields):
+    types = {
+        models.BooleanField: pyarrow.bool_(),
+        models.IntegerField: pyarrow.int64(),
+        models.BigIntegerField: pyarrow.int64(),
+        models.BigAutoField: pyarrow.int64(),
+        models.ForeignKey: pyarrow.int64(),
+        models.DateTimeField: pyarrow.timestamp('us', tz='UTC'),
+    }
+    schema = []
+    for name in fields:
+        field = model._meta.get_field(name)
+        schema.append((name, types.get(type(field), pyarrow.string())))
+    return pyarrow.schema(schema)
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Write-only file that hands its contents out in pieces. Unlike a truncated
+    BytesIO it keeps reporting the absolute position, which the Parquet
+    writer records in the file footer.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b''.join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def _parquet_chunks(
+    model, fields, rows, row_group_size: int,
+) -> Iterator[bytes]:
+    schema = _parquet_schema(model, fields)
+    sink = _ChunkSink()
+    with pyarrow.parquet.ParquetWriter(sink, schema) as writer:
+        rows = iter(rows)
+        while batch := list(islice(rows, row_group_size)):
+            columns = {f: [_cell(row, f) for row in batch] for f in fields}
+            writer.write_table(
+                pyarrow.Table.from_pydict(columns, schema=schema))
+            # Hand out each finished row group instead of keeping the file
+            # in memory
+            yield sink.drain()
+    yield sink.drain()
+
+
+def export(
+    dataset: str, rows: Iterable[dict], fmt: str, chunk_size: int = 2000,
+) -> Iterator[str | bytes]:
+    """
+    Serialize ``rows`` (from iter_rows) as ``fmt`` (``'csv'``, ``'ndjson'``
+    or ``'parquet'``), yielding text chunks (bytes for Parquet) as rows are
+    read.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(
+            f'Unknown format {fmt!r}; choose from {", ".join(FORMATS)}.')
+    if fmt == 'parquet' and pyarrow is None:
+        raise ImproperlyConfigured(
+            'Parquet export needs pyarrow: '
+            'pip install djangouseragents[parquet]')
+    model, fields = DATASETS[dataset]
+    if fmt == 'csv':
+        return _csv_chunks(fields, rows)
+    if fmt == 'ndjson':
+        return _ndjson_chunks(fields, rows)
+    return _parquet_chunks(model, fields, rows, row_group_size=chunk_size)
@@ -0,0 +1,207 @@
+import threading
+import time
+from contextlib import nullcontext
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from djangouseragents.conf import get_setting
+from djangouseragents.signals import metric_recorded
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5,
+)
+
+
+class SignalMetricsBackend:
+    """
+    Records nothing itself; sends ``metric_recorded`` for every value, when
+    it has receivers.
+    """
+
+    def increment(self, name: str, value: int = 1, **labels) -> None:
+        if metric_recorded.receivers:
+            metric_recorded.send(
+                sender=self.__class__, kind='counter', name=name,
+                value=value, labels=labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        if metric_recorded.receivers:
+            metric_recorded.send(
+                sender=self.__class__, kind='histogram', name=name,
+                value=value, labels=labels)
+
+
+class _Histogram:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: tuple, extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value) -> str:
+    return (
+        str(value).replace('\\', '\\\\').replace('"', '\\"')
+        .replace('\n', '\\n')
+    )
+
+
+class InProcessMetricsBackend(SignalMetricsBackend):
+    """
+    Keeps counters and histograms in memory and renders them in the
+    Prometheus text format (see views.metrics_view). Every worker process
+    has its own registry, so scrape each process or aggregate them.
+    """
+
+    def __init__(
+        self, namespace: str = 'useragents',
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.namespace = namespace
+        self.buckets = tuple(sorted(buckets))
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name: str, value: int = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        super().increment(name, value, **labels)
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+        super().observe(name, value, **labels)
+
+    def get_counter(self, name: str, **labels) -> int:
+        return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, (list(h.counts), h.sum, h.count))
+                for key, h in self._histograms.items()
+            )
+
+        lines = []
+        last_name = None
+        for (name, labels), value in counters:
+            full_name = f'{self.namespace}_{name}'
+            if name != last_name:
+                lines.append(f'# TYPE {full_name} counter')
+                last_name = name
+            lines.append(f'{full_name}{_format_labels(labels)} {value}')
+
+        last_name = None
+        for (name, labels), (counts, total, count) in histograms:
+            full_name = f'{self.namespace}_{name}'
+            if name != last_name:
+                lines.append(f'# TYPE {full_name} histogram')
+                last_name = name
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                bucket_labels = _format_labels(labels, 'le="%g"' % bound)
+                lines.append(f'{full_name}_bucket{bucket_labels} {cumulative}')
+            bucket_labels = _format_labels(labels, 'le="+Inf"')
+            lines.append(f'{full_name}_bucket{bucket_labels} {count}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {total}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+# None once resolved means metrics are disabled
+_UNRESOLVED = object()
+_backend = _UNRESOLVED
+_backend_lock = threading.Lock()
+
+
+def get_metrics_backend() -> SignalMetricsBackend | None:
+    """
+    Return the process-wide backend configured by USERAGENTS_METRICS_BACKEND,
+    or None when metrics are disabled. The setting is read once: the
+    middleware asks for the backend in every phase.
+    """
+    global _backend
+    if _backend is _UNRESOLVED:
+        with _backend_lock:
+            if _backend is _UNRESOLVED:
+                path = get_setting('METRICS_BACKEND')
+                options = get_setting('METRICS_BACKEND_OPTIONS')
+                _backend = import_string(path)(**options) if path else None
+    return _backend
+
+
+def increment(name: str, value: int = 1, **labels) -> None:
+    backend = get_metrics_backend()
+    if backend is not None:
+        backend.increment(name, value, **labels)
+
+
+class _PhaseTimer:
+    __slots__ = ('backend', 'phase', 'start')
+
+    def __init__(self, backend: SignalMetricsBackend, phase: str):
+        self.backend = backend
+        self.phase = phase
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.backend.observe(
+            'phase_seconds', time.perf_counter() - self.start,
+            phase=self.phase)
+
+
+_disabled_timer = nullcontext()
+
+
+def phase_timer(phase: str):
+    """
+    Context manager timing one phase of the middleware into the
+    ``phase_seconds`` histogram; a shared no-op when metrics are disabled.
+    """
+    backend = get_metrics_backend()
+    return _disabled_timer if backend is None else _PhaseTimer(backend, phase)
+
+
+@receiver(setting_changed)
+def _reset_metrics_backend(setting, **kwargs):
+    global _backend
+    if setting in (
+        'USERAGENTS_METRICS_BACKEND',
+        'USERAGENTS_METRICS_BACKEND_OPTIONS',
+    ):
+        _backend = _UNRESOLVED
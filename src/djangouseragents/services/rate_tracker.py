@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+
+from asgiref.sync import sync_to_async
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+
+from djangouseragents.conf import get_setting
+from djangouseragents.models.user_agent_request import get_status
+from .uad_cookie import read_uad_cookie
+
+
+class RateSnapshot(NamedTuple):
+    count: int  # requests in the sliding window, this one included
+    status: str
+
+
+def get_rate_client_ip(request: HttpRequest) -> str | None:
+    """
+    Client address to count requests by. X-Forwarded-For is written by the
+    client unless trusted proxies append to it, so it is only read with
+    USERAGENTS_RATE_TRUSTED_PROXIES set: the entry appended by the outermost
+    of those proxies. REMOTE_ADDR otherwise.
+    """
+    proxies = get_setting('RATE_TRUSTED_PROXIES')
+    if proxies:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+        ips = [ip.strip() for ip in forwarded.split(',') if ip.strip()]
+        if len(ips) >= proxies:
+            return ips[-proxies]
+    return request.META.get('REMOTE_ADDR') or None
+
+
+def get_rate_key(request: HttpRequest) -> str | None:
+    """
+    Identify the client before the device is resolved: the device key of a
+    signed UAD cookie whose signature checks out, the client IP otherwise.
+    Plain cookies are chosen by the client, who could dodge the limit by
+    sending a new key with every request. The verified cookie is kept on the
+    request for the middleware, and ``request._uad_rate_per_device`` tells
+    whether the rate is the device's own or shared by every device behind
+    the address.
+    """
+    cookie = request._uad_cookie = read_uad_cookie(request.COOKIES.get('UAD'))
+    request._uad_rate_per_device = cookie is not None and cookie.signed
+    if request._uad_rate_per_device:
+        return cookie.key
+    ip = get_rate_client_ip(request)
+    return f'ip:{ip}' if ip else None
+
+
+class BaseRateTracker:
+    """
+    Counts the requests of every client over a sliding ``window`` (in seconds),
+    approximated from the counts of the current and previous fixed windows.
+    The default window of one hour matches the request status thresholds.
+    """
+
+    def __init__(self, window: int = 3600):
+        self.window = window
+
+    def _split(self, now: float) -> tuple[int, float]:
+        index, offset = divmod(now, self.window)
+        return int(index), offset
+
+    def _snapshot(
+        self, previous: int, current: int, offset: float,
+    ) -> RateSnapshot:
+        count = int(previous * (1 - offset / self.window)) + current
+        return RateSnapshot(count, get_status(count)[0])
+
+    def hit(self, key: str) -> RateSnapshot:
+        """
+        Count one request of ``key`` and return its current rate.
+        """
+        raise NotImplementedError
+
+    async def ahit(self, key: str) -> RateSnapshot:
+        return await sync_to_async(self.hit, thread_sensitive=False)(key)
+
+
+class LocMemRateTracker(BaseRateTracker):
+    """
+    Per-process tracker; each worker process only sees its own share of the
+    traffic. The ``maxsize`` least recently seen clients are kept.
+    """
+
+    def __init__(self, window: int = 3600, maxsize: int = 100_000):
+        super().__init__(window)
+        self.maxsize = maxsize
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str) -> RateSnapshot:
+        index, offset = self._split(time.time())
+        with self._lock:
+            start, previous, current = self._windows.pop(key, (index, 0, 0))
+            if start != index:
+                previous = current if start == index - 1 else 0
+                current = 0
+            current += 1
+            self._windows[key] = (index, previous, current)
+            if len(self._windows) > self.maxsize:
+                self._windows.popitem(last=False)
+        return self._snapshot(previous, current, offset)
+
+    async def ahit(self, key: str) -> RateSnapshot:
+        # Never blocks on I/O
+        return self.hit(key)
+
+
+class CacheRateTracker(BaseRateTracker):
+    """
+    Tracker shared between processes through a Django cache backend
+    (Redis / Memcached in production, locmem in tests).
+    """
+
+    key_prefix = 'djangouseragents:rate:'
+
+    def __init__(self, window: int = 3600, alias: str = 'default'):
+        super().__init__(window)
+        self.cache = caches[alias]
+
+    def _keys(self, key: str, index: int) -> tuple[str, str]:
+        prefix = f'{self.key_prefix}{key}'
+        return f'{prefix}:{index}', f'{prefix}:{index - 1}'
+
+    def hit(self, key: str) -> RateSnapshot:
+        index, offset = self._split(time.time())
+        current_key, previous_key = self._keys(key, index)
+        try:
+            current = self.cache.incr(current_key)
+        except ValueError:
+            # add() loses the race when another process created the counter
+            # first
+            added = self.cache.add(current_key, 1, 2 * self.window)
+            current = 1 if added else self.cache.incr(current_key)
+        return self._snapshot(self.cache.get(previous_key, 0), current, offset)
+
+    async def ahit(self, key: str) -> RateSnapshot:
+        index, offset = self._split(time.time())
+        current_key, previous_key = self._keys(key, index)
+        try:
+            current = await self.cache.aincr(current_key)
+        except ValueError:
+            added = await self.cache.aadd(current_key, 1, 2 * self.window)
+            current = 1 if added else await self.cache.aincr(current_key)
+        previous = await self.cache.aget(previous_key, 0)
+        return self._snapshot(previous, current, offset)
+
+
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_rate_tracker() -> BaseRateTracker | None:
+    """
+    Return the process-wide tracker configured by USERAGENTS_RATE_TRACKER, or
+    None when it is disabled.
+    """
+    global _tracker
+    path = get_setting('RATE_TRACKER')
+    if not path:
+        return None
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                options = get_setting('RATE_TRACKER_OPTIONS')
+                _tracker = import_string(path)(**options)
+    return _tracker
+
+
+@receiver(setting_changed)
+def _reset_rate_tracker(setting, **kwargs):
+    global _tracker
+    if setting in (
+        'USERAGENTS_RATE_TRACKER', 'USERAGENTS_RATE_TRACKER_OPTIONS',
+    ):
+        _tracker = None
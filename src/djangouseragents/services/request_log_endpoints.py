@@ -0,0 +1,55 @@
+import threading
+from typing import Callable
+
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+
+from djangouseragents.conf import get_setting
+
+
+def path_endpoint(request: HttpRequest) -> str:
+    return request.path
+
+
+def route_endpoint(request: HttpRequest) -> str:
+    """
+    The URL pattern the request resolved to (``/orders/<int:pk>/``); requests
+    that did not resolve keep their path.
+    """
+    match = request.resolver_match
+    if match is None or match.route is None:
+        return request.path
+    return '/' + match.route.lstrip('^/')
+
+
+ENDPOINT_MODES = {
+    'path': path_endpoint,
+    'route': route_endpoint,
+}
+
+_normalizer = None
+_normalizer_lock = threading.Lock()
+
+
+def get_endpoint_normalizer() -> Callable[[HttpRequest], str]:
+    """
+    Return the function turning a request into its logged endpoint, from
+    USERAGENTS_LOG_ENDPOINT_MODE: ``'path'``, ``'route'`` or the dotted path
+    of a callable taking the request.
+    """
+    global _normalizer
+    if _normalizer is None:
+        with _normalizer_lock:
+            if _normalizer is None:
+                mode = get_setting('LOG_ENDPOINT_MODE')
+                _normalizer = ENDPOINT_MODES.get(mode) or import_string(mode)
+    return _normalizer
+
+
+@receiver(setting_changed)
+def _reset_endpoint_normalizer(setting, **kwargs):
+    global _normalizer
+    if setting == 'USERAGENTS_LOG_ENDPOINT_MODE':
+        _normalizer = None
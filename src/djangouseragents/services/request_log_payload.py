@@ -0,0 +1,94 @@
+import threading
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest
+
+from djangouseragents.conf import get_setting
+
+REDACTED = '[redacted]'
+
+
+def _lower_set(names) -> frozenset | None:
+    return None if names is None else frozenset(name.lower() for name in names)
+
+
+class RequestPayloadFilter:
+    """
+    Selects the headers and cookies written to the request log. ``headers`` /
+    ``cookies`` are allow-lists (None keeps everything); values of the
+    ``redacted_*`` keys are replaced by a marker. Names are case-insensitive.
+    """
+
+    def __init__(
+        self, headers=None, redacted_headers=(), cookies=None,
+        redacted_cookies=(),
+    ):
+        self.headers = _lower_set(headers)
+        self.redacted_headers = _lower_set(redacted_headers)
+        self.cookies = _lower_set(cookies)
+        self.redacted_cookies = _lower_set(redacted_cookies)
+
+    @classmethod
+    def from_settings(cls) -> 'RequestPayloadFilter':
+        redacted_cookies = get_setting('LOG_REDACTED_COOKIES')
+        if redacted_cookies is None:
+            redacted_cookies = (
+                settings.SESSION_COOKIE_NAME, settings.CSRF_COOKIE_NAME)
+        return cls(
+            headers=get_setting('LOG_HEADERS'),
+            redacted_headers=get_setting('LOG_REDACTED_HEADERS'),
+            cookies=get_setting('LOG_COOKIES'),
+            redacted_cookies=redacted_cookies,
+        )
+
+    @staticmethod
+    def _filter(items, allowed, redacted) -> dict:
+        data = {}
+        for name, value in items:
+            key = name.lower()
+            if allowed is not None and key not in allowed:
+                continue
+            data[name] = REDACTED if key in redacted else value
+        return data
+
+    def filter_headers(self, request: HttpRequest) -> dict:
+        return self.filter_header_items(request.headers.items())
+
+    def filter_header_items(self, items) -> dict:
+        """
+        Filter ``(name, value)`` header pairs that do not come from a request.
+        """
+        return self._filter(items, self.headers, self.redacted_headers)
+
+    def filter_cookies(self, request: HttpRequest) -> dict:
+        return self._filter(
+            request.COOKIES.items(), self.cookies, self.redacted_cookies)
+
+
+_payload_filter = None
+_payload_filter_lock = threading.Lock()
+
+
+def get_request_payload_filter() -> RequestPayloadFilter:
+    """
+    Return the process-wide filter, built once from the settings.
+    """
+    global _payload_filter
+    if _payload_filter is None:
+        with _payload_filter_lock:
+            if _payload_filter is None:
+                _payload_filter = RequestPayloadFilter.from_settings()
+    return _payload_filter
+
+
+@receiver(setting_changed)
+def _reset_request_payload_filter(setting, **kwargs):
+    global _payload_filter
+    if setting in (
+            'USERAGENTS_LOG_HEADERS', 'USERAGENTS_LOG_REDACTED_HEADERS',
+            'USERAGENTS_LOG_COOKIES', 'USERAGENTS_LOG_REDACTED_COOKIES',
+            'SESSION_COOKIE_NAME', 'CSRF_COOKIE_NAME',
+    ):
+        _payload_filter = None
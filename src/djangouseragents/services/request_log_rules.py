@@ -0,0 +1,153 @@
+import random
+import re
+import threading
+
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpRequest, HttpResponse
+
+from djangouseragents.conf import get_setting
+from djangouseragents.schemas.user_agent_parser import parse_user_agent
+
+
+def _sample(rate: float) -> bool:
+    return rate >= 1.0 or (rate > 0.0 and random.random() < rate)
+
+
+class RequestLogRule:
+    """
+    One entry of USERAGENTS_LOG_RULES. Every condition that is given must
+    match:
+
+    - ``paths``: path prefixes and ``regex``: patterns (a match of either
+      counts)
+    - ``methods``: HTTP methods
+    - ``status_codes``: codes such as ``404`` or classes such as ``'5xx'``
+    - ``bots``: True / False to match only bot / non-bot traffic
+
+    ``action`` is ``'include'`` (default) or ``'exclude'``; included requests
+    are kept with probability ``sample_rate``.
+    """
+
+    __slots__ = (
+        'prefixes', 'pattern', 'methods', 'status_codes', 'status_classes',
+        'bots', 'exclude', 'sample_rate',
+    )
+
+    def __init__(
+        self,
+        paths=(),
+        regex=(),
+        methods=(),
+        status_codes=(),
+        bots: bool | None = None,
+        action: str = 'include',
+        sample_rate: float = 1.0,
+    ):
+        if action not in ('include', 'exclude'):
+            raise ImproperlyConfigured(
+                f"USERAGENTS_LOG_RULES action must be 'include' or "
+                f"'exclude', not {action!r}.")
+        self.prefixes = tuple(paths)
+        self.pattern = (
+            re.compile('|'.join(f'(?:{r})' for r in regex)) if regex else None
+        )
+        self.methods = frozenset(m.upper() for m in methods)
+        self.status_codes = frozenset(
+            c for c in status_codes if isinstance(c, int))
+        self.status_classes = frozenset(
+            int(c[0]) for c in status_codes
+            if isinstance(c, str) and c.lower().endswith('xx'))
+        self.bots = bots
+        self.exclude = action == 'exclude'
+        self.sample_rate = sample_rate
+
+    def matches(self, request: HttpRequest, status_code: int) -> bool:
+        if self.prefixes or self.pattern:
+            path = request.path
+            by_prefix = self.prefixes and path.startswith(self.prefixes)
+            by_regex = self.pattern is not None and self.pattern.match(path)
+            if not (by_prefix or by_regex):
+                return False
+        if self.methods and request.method not in self.methods:
+            return False
+        if self.status_codes or self.status_classes:
+            if (status_code not in self.status_codes
+                    and status_code // 100 not in self.status_classes):
+                return False
+        if self.bots is not None and _is_bot(request) != self.bots:
+            return False
+        return True
+
+
+def _is_bot(request: HttpRequest) -> bool:
+    # Prefer the already-resolved device; otherwise the cached UA parse
+    data = getattr(request, '_uad_data', None)
+    if data is not None:
+        return bool(data[0].is_bot)
+    parsed = parse_user_agent(request)
+    return bool(parsed and parsed['is_bot'])
+
+
+class RequestLogPolicy:
+    """
+    Decides whether a request is written to the request log. Rules are checked
+    in order and the first match wins; unmatched requests are sampled at
+    ``default_sample_rate``. Responses with a status of ``error_status`` or
+    above are always logged when it is set.
+    """
+
+    def __init__(
+        self, rules: list[RequestLogRule], default_sample_rate: float = 1.0,
+        error_status: int | None = 500,
+    ):
+        self.rules = rules
+        self.default_sample_rate = default_sample_rate
+        self.error_status = error_status
+
+    @classmethod
+    def from_settings(cls) -> 'RequestLogPolicy':
+        return cls(
+            rules=[
+                RequestLogRule(**rule) for rule in get_setting('LOG_RULES')
+            ],
+            default_sample_rate=get_setting('LOG_SAMPLE_RATE'),
+            error_status=get_setting('LOG_ERROR_STATUS'),
+        )
+
+    def should_log(self, request: HttpRequest, response: HttpResponse) -> bool:
+        status_code = response.status_code
+        if self.error_status is not None and status_code >= self.error_status:
+            return True
+        for rule in self.rules:
+            if rule.matches(request, status_code):
+                return not rule.exclude and _sample(rule.sample_rate)
+        return _sample(self.default_sample_rate)
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_request_log_policy() -> RequestLogPolicy:
+    """
+    Return the process-wide policy, compiled once from the settings.
+    """
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = RequestLogPolicy.from_settings()
+    return _policy
+
+
+@receiver(setting_changed)
+def _reset_request_log_policy(setting, **kwargs):
+    global _policy
+    if setting in (
+        'USERAGENTS_LOG_RULES',
+        'USERAGENTS_LOG_SAMPLE_RATE',
+        'USERAGENTS_LOG_ERROR_STATUS',
+    ):
+        _policy = None
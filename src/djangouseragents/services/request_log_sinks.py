@@ -0,0 +1,248 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db import close_old_connections, connections
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+from djangouseragents.conf import get_setting
+from djangouseragents.models import UserAgentRequestModel
+from .metrics import increment
+from .request_log_spool import SpoolWriter, encode_entry
+
+logger = logging.getLogger(__name__)
+
+
+class BaseRequestLogSink:
+    """
+    Destination of the request-log entries produced by
+    UserAgentDeviceMiddleware. An entry is a dict of UserAgentRequestModel
+    field values.
+    """
+
+    def write(self, entry: dict) -> None:
+        raise NotImplementedError
+
+    async def awrite(self, entry: dict) -> None:
+        """
+        Async counterpart of write; sinks that never block should override it.
+        """
+        # Not thread-sensitive: the middleware awaits this from a detached
+        # task, which may outlive the request's thread-sensitive executor.
+        await sync_to_async(self.write, thread_sensitive=False)(entry)
+
+    def flush(self) -> None:
+        """
+        Persist everything written so far before returning.
+        """
+
+    def close(self) -> None:
+        """
+        Flush and release resources; called on interpreter shutdown.
+        """
+        self.flush()
+
+
+class SyncRequestLogSink(BaseRequestLogSink):
+    """
+    Writes every entry inside the response cycle. Meant for tests and
+    debugging.
+    """
+
+    def write(self, entry: dict) -> None:
+        UserAgentRequestModel.objects.create_from_entries([entry])
+
+
+class BufferedRequestLogSink(BaseRequestLogSink):
+    """
+    Queues entries in process memory and bulk-inserts them from a background
+    thread once ``batch_size`` entries are pending or ``flush_interval``
+    seconds have passed. When the queue is full, new entries are dropped
+    rather than blocking the response.
+    """
+
+    _FLUSH = object()
+    _STOP = object()
+
+    def __init__(
+        self, batch_size: int = 500, flush_interval: float = 1.0,
+        max_queue_size: int = 100_000,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def write(self, entry: dict) -> None:
+        self._ensure_worker()
+        try:
+            self.queue.put_nowait(entry)
+        except queue.Full:
+            self.dropped += 1
+            increment('log_dropped_total')
+            logger.warning(
+                'Request log queue is full; dropped %s entries so far',
+                self.dropped)
+
+    async def awrite(self, entry: dict) -> None:
+        # Only enqueues, so it is safe to call from the event loop
+        self.write(entry)
+
+    def flush(self) -> None:
+        if not self._worker_alive():
+            return
+        done = threading.Event()
+        self.queue.put((self._FLUSH, done))
+        done.wait()
+
+    def close(self) -> None:
+        if not self._worker_alive():
+            return
+        self.queue.put((self._STOP, None))
+        self._thread.join()
+
+    def _worker_alive(self) -> bool:
+        return (
+            self._thread is not None and self._pid == os.getpid()
+            and self._thread.is_alive()
+        )
+
+    def _ensure_worker(self) -> None:
+        if self._worker_alive():
+            return
+        with self._lock:
+            if self._worker_alive():
+                return
+            # A forked worker inherits the queue object but not the thread
+            if self._pid is not None and self._pid != os.getpid():
+                self.queue = queue.Queue(maxsize=self.queue.maxsize)
+            self._pid = os.getpid()
+            self._thread = threading.Thread(
+                target=self._run, name='useragents-request-log', daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self.queue.get(
+                        timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    item = None
+
+                if (isinstance(item, tuple)
+                        and item[0] in (self._FLUSH, self._STOP)):
+                    self._write_batch(batch)
+                    batch = []
+                    if item[0] is self._STOP:
+                        return
+                    item[1].set()
+                elif item is not None:
+                    batch.append(item)
+
+                if (len(batch) >= self.batch_size
+                        or time.monotonic() >= deadline):
+                    self._write_batch(batch)
+                    batch = []
+                    deadline = time.monotonic() + self.flush_interval
+        finally:
+            connections.close_all()
+
+    def _write_batch(self, batch: list[dict]) -> None:
+        if not batch:
+            return
+        close_old_connections()
+        try:
+            UserAgentRequestModel.objects.create_from_entries(batch)
+        except Exception:
+            increment('log_failures_total', len(batch))
+            logger.exception(
+                'Failed to write %s request log entries', len(batch))
+
+
+class SpoolRequestLogSink(BaseRequestLogSink):
+    """
+    Appends entries to local spool files (see services.request_log_spool),
+    which the ingest_useragent_requests command loads into the database.
+    An entry is on disk when write() returns, so it survives a crash of the
+    worker process; with ``fsync`` also a crash of the machine.
+    """
+
+    def __init__(
+        self, directory: str | None = None,
+        max_file_size: int = 16 * 1024 * 1024, max_file_age: float = 5.0,
+        fsync: bool = False,
+    ):
+        directory = directory or get_setting('LOG_SPOOL_DIR')
+        if not directory:
+            raise ImproperlyConfigured(
+                'SpoolRequestLogSink needs USERAGENTS_LOG_SPOOL_DIR or a '
+                'directory option.')
+        self.writer = SpoolWriter(
+            directory, max_file_size, max_file_age, fsync)
+
+    def write(self, entry: dict) -> None:
+        self.writer.append(encode_entry(entry))
+
+    async def awrite(self, entry: dict) -> None:
+        # A local append, cheap enough for the event loop
+        self.write(entry)
+
+    def flush(self) -> None:
+        """
+        Hand the current spool file over to the ingesters.
+        """
+        self.writer.rotate()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def get_request_log_sink() -> BaseRequestLogSink:
+    """
+    Return the process-wide sink configured by USERAGENTS_LOG_SINK.
+    """
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                sink_class = import_string(get_setting('LOG_SINK'))
+                _sink = sink_class(**get_setting('LOG_SINK_OPTIONS'))
+    return _sink
+
+
+def close_request_log_sink() -> None:
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+
+
+atexit.register(close_request_log_sink)
+
+
+@receiver(setting_changed)
+def _reset_request_log_sink(setting, **kwargs):
+    if setting in (
+        'USERAGENTS_LOG_SINK',
+        'USERAGENTS_LOG_SINK_OPTIONS',
+        'USERAGENTS_LOG_SPOOL_DIR',
+    ):
+        close_request_log_sink()
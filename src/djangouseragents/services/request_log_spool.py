@@ -0,0 +1,306 @@
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+import time
+import uuid
+import zlib
+from datetime import datetime
+from typing import BinaryIO, NamedTuple
+
+from django.core.exceptions import ImproperlyConfigured
+
+try:
+    import fcntl
+except ImportError:  # Windows: no flock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+# Every record is its payload length and CRC32, then the payload
+HEADER = struct.Struct('>II')
+
+# Life of a spool file: created as .tmp, written as .open (locked by its
+# writer), handed over as .spool, then renamed to .<token>.claimed (locked by
+# its ingester) while loaded, and deleted.
+TMP, OPEN, READY, CLAIMED = '.tmp', '.open', '.spool', '.claimed'
+
+# File names are split on dots
+_HOST = socket.gethostname().replace('.', '_')
+
+
+def encode_entry(entry: dict) -> bytes:
+    """
+    Compact JSON form of a request-log entry.
+    """
+    return json.dumps(
+        dict(entry, created_dt=entry['created_dt'].isoformat()),
+        separators=(',', ':'),
+        ensure_ascii=False,
+    ).encode('utf-8')
+
+
+def decode_entry(payload: bytes) -> dict:
+    entry = json.loads(payload)
+    entry['created_dt'] = datetime.fromisoformat(entry['created_dt'])
+    return entry
+
+
+def _check_platform() -> None:
+    # Writers and ingesters coordinate through flock
+    if fcntl is None:
+        raise ImproperlyConfigured(
+            'The request log spool needs fcntl.flock, which is not available '
+            'on Windows.')
+
+
+def _lock(f, blocking: bool = False) -> bool:
+    flags = fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB)
+    try:
+        fcntl.flock(f.fileno(), flags)
+    except BlockingIOError:
+        return False
+    return True
+
+
+class SpoolWriter:
+    """
+    Appends records to the current spool file of this process, and hands it
+    over to the ingesters (renames it to .spool) once it reaches
+    ``max_file_size`` bytes or ``max_file_age`` seconds. Every record goes
+    to the OS in a single write, so it survives a crash of the process;
+    ``fsync`` also makes it survive a crash of the machine.
+    """
+
+    def __init__(
+        self, directory: str, max_file_size: int = 16 * 1024 * 1024,
+        max_file_age: float = 5.0, fsync: bool = False,
+    ):
+        _check_platform()
+        self.directory = directory
+        self.max_file_size = max_file_size
+        self.max_file_age = max_file_age
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._file = None
+        self._path = None
+        self._opened = 0.0
+        self._size = 0
+        self._pid = None
+        self._stop = threading.Event()
+        os.makedirs(directory, exist_ok=True)
+
+    def append(self, payload: bytes) -> None:
+        record = HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._lock:
+            self._check_pid()
+            if self._file is None:
+                self._open()
+            os.write(self._file.fileno(), record)
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._size += len(record)
+            if self._size >= self.max_file_size:
+                self._rotate()
+
+    def rotate(self) -> None:
+        """
+        Hand the current file over, whatever its size and age.
+        """
+        with self._lock:
+            self._check_pid()
+            self._rotate()
+
+    def close(self) -> None:
+        self._stop.set()
+        self.rotate()
+
+    def _check_pid(self) -> None:
+        # A forked child shares the parent's file and lock; it must neither
+        # write to nor hand over the parent's file
+        if self._pid != os.getpid():
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self._pid = os.getpid()
+            self._stop = threading.Event()
+            threading.Thread(
+                target=self._rotate_periodically,
+                name='useragents-spool',
+                daemon=True,
+            ).start()
+
+    def _open(self) -> None:
+        name = (
+            f'{time.time_ns():020d}-{_HOST}-{os.getpid()}-'
+            f'{uuid.uuid4().hex[:8]}'
+        )
+        tmp_path = os.path.join(self.directory, name + TMP)
+        self._file = open(tmp_path, 'xb', buffering=0)
+        # Locked before it is visible as .open, so an ingester never takes
+        # it for the file of a dead writer
+        _lock(self._file, blocking=True)
+        self._path = os.path.join(self.directory, name + OPEN)
+        os.rename(tmp_path, self._path)
+        self._opened = time.monotonic()
+        self._size = 0
+
+    def _rotate(self) -> None:
+        if self._file is None:
+            return
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        os.rename(self._path, self._path[:-len(OPEN)] + READY)
+        self._file.close()
+        self._file = None
+
+    def _rotate_periodically(self) -> None:
+        # Idle processes would otherwise keep their last records to themselves
+        stop = self._stop
+        while not stop.wait(self.max_file_age):
+            with self._lock:
+                if self._pid != os.getpid():
+                    return
+                if self._file is None:
+                    continue
+                if time.monotonic() - self._opened >= self.max_file_age:
+                    try:
+                        self._rotate()
+                    except OSError:
+                        logger.exception(
+                            'Failed to rotate the request log spool file %s',
+                            self._path)
+
+
+class ClaimedFile(NamedTuple):
+    name: str  # the name it was written under, without suffix
+    path: str
+    file: BinaryIO
+
+
+class SpoolDirectory:
+    """
+    The ingesters' side of a spool directory. Files are claimed by renaming
+    them, so concurrent ingesters never load the same file; a claim whose
+    ingester died (its lock is gone) is taken over after ``claim_grace``
+    seconds.
+    """
+
+    def __init__(self, directory: str, claim_grace: float = 10.0):
+        _check_platform()
+        self.directory = directory
+        self.claim_grace = claim_grace
+        self.token = f'{_HOST}-{os.getpid()}-{uuid.uuid4().hex[:8]}'
+
+    def _names(self, suffix: str) -> list[str]:
+        try:
+            names = os.listdir(self.directory)
+            return sorted(name for name in names if name.endswith(suffix))
+        except FileNotFoundError:
+            return []
+
+    def release_abandoned(self) -> int:
+        """
+        Hand over the .open files of writers that died, and delete the empty
+        .tmp files of writers that died creating one; returns how many files
+        were handed over.
+        """
+        released = 0
+        for name in self._names(OPEN) + self._names(TMP):
+            path = os.path.join(self.directory, name)
+            try:
+                # A writer locks its .tmp file right after creating it
+                if name.endswith(TMP) and self._is_recent(path):
+                    continue
+                with open(path, 'rb') as f:
+                    if not _lock(f):
+                        continue
+                    if name.endswith(TMP):
+                        os.remove(path)
+                    else:
+                        os.rename(path, path[:-len(OPEN)] + READY)
+                        released += 1
+            except FileNotFoundError:
+                pass
+        return released
+
+    def claim(self) -> ClaimedFile | None:
+        """
+        Claim the oldest ready file, or else a claim abandoned by a dead
+        ingester; None when there is nothing to load.
+        """
+        for name in self._names(READY):
+            path = os.path.join(self.directory, name)
+            claimed = self._take(path, name.split('.', 1)[0])
+            if claimed is not None:
+                return claimed
+        for name in self._names(CLAIMED):
+            path = os.path.join(self.directory, name)
+            try:
+                if self._is_recent(path):
+                    continue
+            except FileNotFoundError:
+                continue
+            claimed = self._take(path, name.split('.', 1)[0], stale=True)
+            if claimed is not None:
+                return claimed
+        return None
+
+    def _is_recent(self, path: str) -> bool:
+        return time.time() - os.stat(path).st_ctime < self.claim_grace
+
+    def _take(
+        self, path: str, base: str, stale: bool = False,
+    ) -> ClaimedFile | None:
+        target = os.path.join(
+            self.directory, f'{base}.{self.token}{CLAIMED}')
+        if stale:
+            # Only a claim nobody holds a lock on may be taken over
+            try:
+                f = open(path, 'rb')
+            except FileNotFoundError:
+                return None
+            if not _lock(f):
+                f.close()
+                return None
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                f.close()
+                return None
+            return ClaimedFile(base, target, f)
+        try:
+            os.rename(path, target)
+        except FileNotFoundError:
+            # Claimed by another ingester first
+            return None
+        f = open(target, 'rb')
+        _lock(f, blocking=True)
+        return ClaimedFile(base, target, f)
+
+    @staticmethod
+    def read(f: BinaryIO, max_records: int) -> tuple[list[bytes], int]:
+        """
+        Up to ``max_records`` payloads from the current position, and the
+        offset after the last one. A torn or corrupt record ends the file:
+        it can only be the last write of a crashed writer.
+        """
+        payloads = []
+        end = f.tell()
+        while len(payloads) < max_records:
+            header = f.read(HEADER.size)
+            if len(header) < HEADER.size:
+                break
+            length, crc = HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                logger.warning(
+                    'Ignoring a torn record at offset %s of %s',
+                    end, getattr(f, 'name', f))
+                break
+            payloads.append(payload)
+            end = f.tell()
+        f.seek(end)
+        return payloads, end
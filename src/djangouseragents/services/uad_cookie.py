@@ -0,0 +1,85 @@
+import time
+from typing import NamedTuple
+
+from django.core import signing
+
+from djangouseragents.conf import get_setting
+
+SALT = 'djangouseragents.uad'
+
+
+class UADCookie(NamedTuple):
+    """
+    Value of the UAD cookie. Plain cookies only carry the device key; signed
+    ones also carry the device id, the bound user, when they were issued and
+    whether they were signed with a key of SECRET_KEY_FALLBACKS.
+    """
+    key: str
+    id: int | None = None
+    user_id: str | None = None
+    issued: int | None = None
+    rotated: bool = False
+
+    @property
+    def signed(self) -> bool:
+        return self.id is not None
+
+
+def _signer(fallback_keys: list | None = None) -> signing.TimestampSigner:
+    # Signs with SECRET_KEY and, by default, also accepts SECRET_KEY_FALLBACKS,
+    # so keys can be rotated without dropping every device's cookie
+    return signing.TimestampSigner(salt=SALT, fallback_keys=fallback_keys)
+
+
+def sign_uad_cookie(id: int, key: str, user_id: str | None) -> str:
+    """
+    Signed cookie value binding a device id, key and user:
+    ``<id>:<key>:<user_id>:<timestamp>:<signature>``, base62 numbers.
+    """
+    return _signer().sign(f'{signing.b62_encode(id)}:{key}:{user_id or ""}')
+
+
+def read_uad_cookie(value: str | None) -> UADCookie | None:
+    """
+    Parse a plain or signed cookie value. Signed values with a bad signature,
+    or older than USERAGENTS_COOKIE_MAX_AGE, are ignored (None).
+    """
+    if not value:
+        return None
+    if ':' not in value:
+        return UADCookie(key=value)
+    max_age = get_setting('COOKIE_MAX_AGE')
+    try:
+        try:
+            signer = _signer(fallback_keys=[])
+            payload, rotated = signer.unsign(value, max_age=max_age), False
+        except signing.SignatureExpired:
+            return None
+        except signing.BadSignature:
+            payload, rotated = _signer().unsign(value, max_age=max_age), True
+        id, key, user_id = payload.split(':', 2)
+        return UADCookie(
+            key=key,
+            id=signing.b62_decode(id),
+            user_id=user_id or None,
+            issued=signing.b62_decode(value.rsplit(':', 2)[1]),
+            rotated=rotated,
+        )
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def cookie_is_current(
+    cookie: UADCookie | None, id: int, key: str, user_id: str | None,
+) -> bool:
+    """
+    Whether a signed cookie already holds this identity, under the current
+    SECRET_KEY, and does not expire within
+    USERAGENTS_SIGNED_COOKIE_RENEW_WITHIN, so it need not be sent again.
+    """
+    if cookie is None or not cookie.signed or cookie.rotated:
+        return False
+    if (cookie.id, cookie.key, cookie.user_id) != (id, key, user_id):
+        return False
+    expires = cookie.issued + get_setting('COOKIE_MAX_AGE')
+    return expires - time.time() > get_setting('SIGNED_COOKIE_RENEW_WITHIN')
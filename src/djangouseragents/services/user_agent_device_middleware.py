@@ -1,104 +1,523 @@
-from django.utils.deprecation import MiddlewareMixin
+import asyncio
+
+from asgiref.sync import (
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from django.utils.functional import SimpleLazyObject
+from django.utils.timezone import now as dj_now
 from django.http import HttpRequest, HttpResponse
 
-from djangouseragents.models import UserAgentDeviceModel, UserAgentRequestModel
-from djangouseragents.schemas import UADSchema
+from djangouseragents.conf import get_setting
+from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.schemas import UADRecord
+from djangouseragents.schemas.uad_schema import get_user_id
+from .device_cache import get_device_cache
+from .metrics import get_metrics_backend, increment, phase_timer
+from .rate_tracker import RateSnapshot, get_rate_key, get_rate_tracker
+from .request_log_endpoints import get_endpoint_normalizer
+from .request_log_payload import get_request_payload_filter
+from .request_log_rules import get_request_log_policy
+from .request_log_sinks import get_request_log_sink
+from .uad_cookie import (
+    UADCookie,
+    cookie_is_current,
+    read_uad_cookie,
+    sign_uad_cookie,
+)
 
 
-class UserAgentDeviceMiddleware(MiddlewareMixin):
+class UserAgentDeviceMiddleware:
     """
     Middleware to detect and persist user agent and device information.
-    It attaches UADSchema (parsed info) and UAD object (DB model) to the request,
-    sets a cookie for identification, and logs the request metadata.
+    It attaches UADRecord (parsed info) and UAD object (DB model) to the
+    request, sets a cookie for identification, and logs the request metadata.
+
+    The middleware instance is shared between threads, so the resolved device
+    is kept on the request itself and never on ``self``.
+
+    Under WSGI ``request.uad`` and ``request.uad_obj`` are lazy: the device is
+    resolved on first access, or in the response phase when the request is
+    logged. Requests that do neither cost no device lookup and get no cookie.
+
+    Under ASGI the device is resolved before the view with the async ORM, as
+    a lazy attribute would query synchronously from the event loop, and the
+    request is logged from a background task, so the event loop never blocks
+    on the DB. ``await request.auad()`` is kept for async views.
+
+    With USERAGENTS_SIGNED_COOKIE a valid signed cookie is trusted as is: the
+    record is built from it and the User-Agent header, and (under WSGI)
+    ``request.uad_obj`` is only fetched when accessed.
     """
 
-    def process_request(self, request: HttpRequest) -> None:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        # Compile the logging rules at startup so bad settings fail early
+        get_request_log_policy()
+        if self.async_mode:
+            markcoroutinefunction(self)
+            self._log_tasks = set()
+            self._log_semaphore = asyncio.Semaphore(
+                get_setting('ASYNC_LOG_CONCURRENCY'))
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if self.async_mode:
+            return self.__acall__(request)
+        response = self.process_request(request)
+        if response is not None:
+            return response
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    async def __acall__(self, request: HttpRequest) -> HttpResponse:
+        response = await self.aprocess_request(request)
+        if response is not None:
+            return response
+        response = await self.get_response(request)
+        return await self.aprocess_response(request, response)
+
+    def process_request(self, request: HttpRequest) -> HttpResponse | None:
         """
-        Parse user-agent data from the request and attach it to the request object.
+        Track the client's request rate, then attach the lazily resolved
+        user-agent data to the request object. Throttled clients get a 429
+        before any database work.
         """
-        self._init_user_agent_data(request)
-        setattr(request, 'uad', self.uad_schema)  # UADSchema instance
-        setattr(request, 'uad_obj', self.uad_obj)  # UserAgentDeviceModel instance
+        tracker = get_rate_tracker()
+        key = get_rate_key(request) if tracker is not None else None
+        if key is not None:
+            request._uad_rate = tracker.hit(key)
+            if self._is_throttled(request._uad_rate):
+                increment('throttled_total')
+                return self._throttled_response()
+        self._attach_lazy_user_agent_data(request)
 
-    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+    def process_response(
+        self, request: HttpRequest, response: HttpResponse,
+    ) -> HttpResponse:
         """
-        Store a cookie for UAD identification and log the request metadata.
+        Store a cookie for UAD identification and log the request metadata,
+        unless the request is not logged and its device was never accessed.
         """
-        # Ensure request is parsed (in case process_request wasn't explicitly called)
-        self._init_user_agent_data(request)
+        should_log = get_request_log_policy().should_log(request, response)
+        increment('requests_total', logged='true' if should_log else 'false')
+        if not (should_log or self._is_resolved(request)):
+            return response
+        self._attach_user_agent_data(request)
+        with phase_timer('cookie_set'):
+            self._set_uad_cookie(request, response)
+        if should_log:
+            self._log_user_agent_request(request, response)
+        return response
 
-        if hasattr(request, 'uad') and request.uad.key:
-            response.set_cookie(
-                key='UAD',
-                value=request.uad.key,
-                max_age=60 * 60 * 24 * 365,  # 1 year
-                httponly=False,
-                secure=False
-            )
+    async def aprocess_request(
+        self, request: HttpRequest,
+    ) -> HttpResponse | None:
+        """
+        Async counterpart of process_request.
+        """
+        tracker = get_rate_tracker()
+        key = get_rate_key(request) if tracker is not None else None
+        if key is not None:
+            request._uad_rate = await tracker.ahit(key)
+            if self._is_throttled(request._uad_rate):
+                increment('throttled_total')
+                return self._throttled_response()
+        await self._aattach_user_agent_data(request)
+        request.auad = self._make_auad(request)
+
+    async def aprocess_response(
+        self, request: HttpRequest, response: HttpResponse,
+    ) -> HttpResponse:
+        """
+        Async counterpart of process_response; the log write is not awaited.
+        """
+        should_log = get_request_log_policy().should_log(request, response)
+        increment('requests_total', logged='true' if should_log else 'false')
+        if not (should_log or self._is_resolved(request)):
+            return response
+        await self._aattach_user_agent_data(request)
+        with phase_timer('cookie_set'):
+            self._set_uad_cookie(request, response)
+        if not should_log:
+            return response
 
-        self._log_user_agent_request(request, response)
+        try:
+            entry = self._build_log_entry(request, response)
+        except Exception:
+            increment('log_failures_total')
+            return response
+        task = asyncio.create_task(self._alog_user_agent_request(entry))
+        # Keep a reference so the task is not garbage collected mid-flight
+        self._log_tasks.add(task)
+        task.add_done_callback(self._log_tasks.discard)
         return response
 
-    def _init_user_agent_data(self, request: HttpRequest) -> None:
+    @staticmethod
+    def _is_throttled(rate: RateSnapshot) -> bool:
+        return rate.status in get_setting('RATE_THROTTLE_STATUSES')
+
+    @staticmethod
+    def _throttled_response() -> HttpResponse:
+        return HttpResponse(
+            'Too Many Requests', status=429, content_type='text/plain')
+
+    def _set_uad_cookie(
+        self, request: HttpRequest, response: HttpResponse,
+    ) -> None:
+        record = request.uad
+        if not record.key:
+            return
+        if get_setting('SIGNED_COOKIE'):
+            # Plain cookies are upgraded; a current signed one is not re-sent
+            cookie = getattr(request, '_uad_cookie', None)
+            if cookie_is_current(
+                cookie, record.id, record.key, record.user_id,
+            ):
+                return
+            value = sign_uad_cookie(record.id, record.key, record.user_id)
+        else:
+            value = record.key
+        response.set_cookie(
+            key='UAD',
+            value=value,
+            max_age=get_setting('COOKIE_MAX_AGE'),
+            httponly=False,
+            secure=False
+        )
+
+    @staticmethod
+    def _is_resolved(request: HttpRequest) -> bool:
+        return getattr(request, '_uad_data', None) is not None
+
+    def _attach_lazy_user_agent_data(self, request: HttpRequest) -> None:
+        """
+        Attach ``request.uad`` / ``request.uad_obj`` resolving the device on
+        first access.
+        """
+        request.uad = SimpleLazyObject(
+            lambda: self._resolve_user_agent_data(request)[0])
+        request.uad_obj = SimpleLazyObject(
+            lambda: self._resolve_user_agent_data(request)[1])
+
+    def _make_auad(self, request: HttpRequest):
+        async def auad() -> UADRecord:
+            await self._aattach_user_agent_data(request)
+            return request.uad
+        return auad
+
+    def _resolve_user_agent_data(
+        self, request: HttpRequest,
+    ) -> tuple[UADRecord, UserAgentDeviceModel]:
         """
-        Get or create a UserAgentDeviceModel instance based on request and cookie.
+        Resolve the device at most once per request.
         """
-        cookie_key = request.COOKIES.get('UAD')
-        user_id = request.user.id if hasattr(request, 'user') and request.user.is_authenticated else None
+        data = getattr(request, '_uad_data', None)
+        if data is None:
+            data = self._init_user_agent_data(request)
+            self._store_user_agent_data(request, data)
+        return data
+
+    def _attach_user_agent_data(self, request: HttpRequest) -> None:
+        self._set_request_attributes(
+            request, self._resolve_user_agent_data(request))
+
+    async def _aattach_user_agent_data(self, request: HttpRequest) -> None:
+        data = getattr(request, '_uad_data', None)
+        if data is None:
+            data = await self._ainit_user_agent_data(request)
+            self._store_user_agent_data(request, data)
+        self._set_request_attributes(request, data)
+
+    @staticmethod
+    def _store_user_agent_data(
+        request: HttpRequest, data: tuple[UADRecord, UserAgentDeviceModel],
+    ) -> None:
+        # A per-IP rate is shared by every device behind the address, so it
+        # throttles but is not reported as the device's own
+        rate = getattr(request, '_uad_rate', None)
+        if rate is not None and request._uad_rate_per_device:
+            data[0].rate, data[0].rate_status = rate
+        request._uad_data = data
+
+    @staticmethod
+    def _set_request_attributes(
+        request: HttpRequest, data: tuple[UADRecord, UserAgentDeviceModel],
+    ) -> None:
+        record, obj = data
+        setattr(request, 'uad', record)  # UADRecord instance
+        setattr(request, 'uad_obj', obj)  # UserAgentDeviceModel instance
+
+    @staticmethod
+    def _read_cookie(request: HttpRequest) -> UADCookie | None:
+        # Already read when the rate tracker identified the client
+        if not hasattr(request, '_uad_cookie'):
+            request._uad_cookie = read_uad_cookie(
+                request.COOKIES.get('UAD'))
+        return request._uad_cookie
+
+    def _init_user_agent_data(
+        self, request: HttpRequest,
+    ) -> tuple[UADRecord, UserAgentDeviceModel]:
+        """
+        Get or create a UserAgentDeviceModel instance based on request and
+        cookie.
+        """
+        with phase_timer('cookie_lookup'):
+            cookie = self._read_cookie(request)
+            user_id = get_user_id(request)
+
+        if self._trusts_cookie(cookie, user_id):
+            return self._from_signed_cookie(request, cookie)
 
         # Attempt to find existing UAD record
-        obj = self._get_existing_uad(cookie_key, user_id)
+        with phase_timer('device_lookup'):
+            obj = self._get_existing_uad(
+                cookie.key if cookie else None, user_id)
 
         # Fallback to creation if not found
         if not obj:
-            schema = UADSchema.from_request(request)
-            obj = self._get_or_create_uad(schema)
+            with phase_timer('ua_parse'):
+                record = UADRecord.from_request(request, user_id=user_id)
+            with phase_timer('device_create'):
+                obj, created = self._get_or_create_uad(record)
+            record.id = obj.pk
+            self._count_device(record, created=created)
         else:
-            schema = UADSchema.from_model(obj)
+            record = UADRecord.from_model(obj)
+            self._count_device(record, created=False)
+
+        return record, obj
+
+    async def _ainit_user_agent_data(
+        self, request: HttpRequest,
+    ) -> tuple[UADRecord, UserAgentDeviceModel]:
+        with phase_timer('cookie_lookup'):
+            cookie = self._read_cookie(request)
+            user_id = await self._aget_user_id(request)
+
+        if self._trusts_cookie(cookie, user_id):
+            # The row cannot be left lazy: async views would load it
+            # synchronously
+            record = self._record_from_signed_cookie(request, cookie)
+            return record, await self._aget_uad_by_key(cookie.key)
 
-        self.uad_schema = schema
-        self.uad_obj = obj
+        with phase_timer('device_lookup'):
+            obj = await self._aget_existing_uad(
+                cookie.key if cookie else None, user_id)
 
-    def _get_existing_uad(self, key: str | None, user_id: int | None) -> UserAgentDeviceModel | None:
+        if not obj:
+            with phase_timer('ua_parse'):
+                record = UADRecord.from_request(request, user_id=user_id)
+            with phase_timer('device_create'):
+                obj, created = await self._aget_or_create_uad(record)
+            record.id = obj.pk
+            self._count_device(record, created=created)
+        else:
+            record = UADRecord.from_model(obj)
+            self._count_device(record, created=False)
+
+        return record, obj
+
+    @staticmethod
+    def _trusts_cookie(
+        cookie: UADCookie | None, user_id: str | None,
+    ) -> bool:
+        """
+        Whether a signed cookie identifies the device on its own; like a
+        device found by key, an anonymous one is not reused by a logged-in
+        user.
+        """
+        return (
+            cookie is not None and cookie.signed
+            and get_setting('SIGNED_COOKIE')
+            and not (cookie.user_id is None and user_id is not None)
+        )
+
+    def _from_signed_cookie(
+        self, request: HttpRequest, cookie: UADCookie,
+    ) -> tuple[UADRecord, UserAgentDeviceModel]:
+        """
+        Device identity from a verified cookie, without a query; the row is
+        fetched on first access to ``request.uad_obj``.
+        """
+        record = self._record_from_signed_cookie(request, cookie)
+        return record, SimpleLazyObject(
+            lambda: self._get_uad_by_key(cookie.key))
+
+    def _record_from_signed_cookie(
+        self, request: HttpRequest, cookie: UADCookie,
+    ) -> UADRecord:
+        """
+        Record of a verified cookie's device. The other fields describe the
+        current request (its parsed User-Agent and IP).
+        """
+        with phase_timer('ua_parse'):
+            record = UADRecord.from_request(request, user_id=cookie.user_id)
+        record.id, record.key = cookie.id, cookie.key
+        self._count_device(record, created=False)
+        return record
+
+    @staticmethod
+    def _count_device(record: UADRecord, created: bool) -> None:
+        """
+        Count the resolved device as new or returning, and bot traffic.
+        """
+        metrics = get_metrics_backend()
+        if metrics is None:
+            return
+        metrics.increment(
+            'device_resolutions_total',
+            outcome='new' if created else 'returning',
+        )
+        if record.is_bot:
+            metrics.increment('bot_requests_total')
+
+    async def _aget_user_id(self, request: HttpRequest) -> str | None:
+        if hasattr(request, 'auser'):
+            user = await request.auser()
+            return str(user.id) if user.is_authenticated else None
+        # Django < 5.0: request.user is a lazy object that may hit the
+        # session store
+        return await sync_to_async(get_user_id)(request)
+
+    def _get_existing_uad(
+        self, key: str | None, user_id: str | None,
+    ) -> UserAgentDeviceModel | None:
         """
         Attempt to retrieve an existing UAD record from the database.
         Only return it if it's linked to a user or no user is expected.
         """
         if not key:
             return None
-        try:
-            obj = UserAgentDeviceModel.objects.get(key=key)
-            if obj.user_id is None and user_id is not None:
-                return None
-            return obj
-        except UserAgentDeviceModel.DoesNotExist:
+        obj = self._get_uad_by_key(key)
+        if obj is None or (obj.user_id is None and user_id is not None):
             return None
+        return obj
 
-    def _get_or_create_uad(self, schema: UADSchema) -> UserAgentDeviceModel:
+    async def _aget_existing_uad(
+        self, key: str | None, user_id: str | None,
+    ) -> UserAgentDeviceModel | None:
+        if not key:
+            return None
+        obj = await self._aget_uad_by_key(key)
+        if obj is None or (obj.user_id is None and user_id is not None):
+            return None
+        return obj
+
+    def _get_or_create_uad(
+        self, record: UADRecord,
+    ) -> tuple[UserAgentDeviceModel, bool]:
+        """
+        Retrieve an existing UAD record by key or create a new one; returns
+        ``(device, created)``.
+        """
+        cache = get_device_cache()
+        obj = cache.get(record.key) if cache is not None else None
+        if obj is not None:
+            return obj, False
+        obj, created = UserAgentDeviceModel.objects.get_or_create_by_key(
+            **record.to_dict())
+        self._cache_uad(obj)
+        return obj, created
+
+    async def _aget_or_create_uad(
+        self, record: UADRecord,
+    ) -> tuple[UserAgentDeviceModel, bool]:
+        cache = get_device_cache()
+        obj = await cache.aget(record.key) if cache is not None else None
+        if obj is not None:
+            return obj, False
+        obj, created = (
+            await UserAgentDeviceModel.objects.aget_or_create_by_key(
+                **record.to_dict())
+        )
+        await self._acache_uad(obj)
+        return obj, created
+
+    def _get_uad_by_key(self, key: str) -> UserAgentDeviceModel | None:
+        """
+        Look the device up in the device cache, then in the database.
         """
-        Retrieve an existing UAD record by key or create a new one.
+        cache = get_device_cache()
+        obj = cache.get(key) if cache is not None else None
+        if cache is not None:
+            increment(
+                'device_cache_total', result='miss' if obj is None else 'hit')
+        if obj is None:
+            try:
+                obj = UserAgentDeviceModel.objects.get_by_key(key)
+            except UserAgentDeviceModel.DoesNotExist:
+                return None
+            self._cache_uad(obj)
+        return obj
+
+    async def _aget_uad_by_key(self, key: str) -> UserAgentDeviceModel | None:
+        cache = get_device_cache()
+        obj = await cache.aget(key) if cache is not None else None
+        if cache is not None:
+            increment(
+                'device_cache_total', result='miss' if obj is None else 'hit')
+        if obj is None:
+            try:
+                obj = await UserAgentDeviceModel.objects.aget_by_key(key)
+            except UserAgentDeviceModel.DoesNotExist:
+                return None
+            await self._acache_uad(obj)
+        return obj
+
+    def _cache_uad(self, obj: UserAgentDeviceModel) -> None:
+        cache = get_device_cache()
+        if cache is not None:
+            cache.set(obj)
+
+    async def _acache_uad(self, obj: UserAgentDeviceModel) -> None:
+        cache = get_device_cache()
+        if cache is not None:
+            await cache.aset(obj)
+
+    def _build_log_entry(
+        self, request: HttpRequest, response: HttpResponse,
+    ) -> dict:
+        payload_filter = get_request_payload_filter()
+        return {
+            'uad_id': request.uad.id,
+            'endpoint': get_endpoint_normalizer()(request),
+            'response_status_code': response.status_code,
+            'method': request.method,
+            'get': dict(request.GET),
+            'headers': payload_filter.filter_headers(request),
+            'cookies': payload_filter.filter_cookies(request),
+            'created_dt': dj_now(),
+        }
+
+    def _log_user_agent_request(
+        self, request: HttpRequest, response: HttpResponse,
+    ) -> None:
+        """
+        Hand the request info over to the configured log sink, which stores it
+        as a UserAgentRequestModel record.
         """
         try:
-            return UserAgentDeviceModel.objects.get(key=schema.key)
-        except UserAgentDeviceModel.DoesNotExist:
-            return UserAgentDeviceModel.objects.create(**schema.to_dict())
-        except Exception as e:
-            raise e
+            with phase_timer('log_write'):
+                get_request_log_sink().write(
+                    self._build_log_entry(request, response))
+        except Exception:
+            # Never interrupt the response cycle; the failure is only counted
+            increment('log_failures_total')
 
-    def _log_user_agent_request(self, request: HttpRequest, response: HttpResponse) -> None:
+    async def _alog_user_agent_request(self, entry: dict) -> None:
         """
-        Create a record in UserAgentRequestModel to log the request info.
+        Background-task counterpart of _log_user_agent_request. At most
+        USERAGENTS_ASYNC_LOG_CONCURRENCY writes run at the same time.
         """
         try:
-            UserAgentRequestModel.objects.create(
-                uad=request.uad_obj,
-                endpoint=request.path,
-                response_status_code=response.status_code,
-                method=request.method,
-                get=dict(request.GET),
-                headers=dict(request.headers),
-                cookies=dict(request.COOKIES),
-            )
+            async with self._log_semaphore:
+                with phase_timer('log_write'):
+                    await get_request_log_sink().awrite(entry)
         except Exception:
-            # Silently fail to avoid interrupting the response cycle
-            pass
+            increment('log_failures_total')
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent by the metrics backend for every recorded value, with ``kind``
+# ('counter' or 'histogram'), ``name``, ``value`` and ``labels`` (a dict).
+# Use it to forward the middleware metrics to StatsD, OpenTelemetry, etc.
+metric_recorded = Signal()
@@ -0,0 +1,10 @@
+from django.urls import path
+
+from .views import export_view, metrics_view
+
+app_name = 'djangouseragents'
+
+urlpatterns = [
+    path('export/<str:dataset>/', export_view, name='export'),
+    path('metrics/', metrics_view, name='metrics'),
+]
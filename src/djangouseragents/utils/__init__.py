@@ -0,0 +1,3 @@
+from .lru import LRUCache
+from .hashing import hash_device_key, key_to_digest
+from .compression import compress_payload, decompress_payload
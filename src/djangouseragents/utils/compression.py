@@ -0,0 +1,16 @@
+import json
+import zlib
+
+
+def compress_payload(data: dict) -> bytes:
+    """
+    JSON-encode and zlib-compress a payload for a BinaryField.
+    """
+    text = json.dumps(data, separators=(',', ':'), default=str)
+    return zlib.compress(text.encode())
+
+
+def decompress_payload(data: bytes | memoryview | None) -> dict:
+    if not data:
+        return {}
+    return json.loads(zlib.decompress(bytes(data)))
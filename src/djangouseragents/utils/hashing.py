@@ -0,0 +1,61 @@
+from hashlib import blake2b, md5
+
+from django.core.exceptions import ImproperlyConfigured
+
+from djangouseragents.conf import get_setting
+
+try:
+    import xxhash
+except ImportError:  # optional dependency
+    xxhash = None
+
+
+def _md5(data: bytes) -> str:
+    return md5(data, usedforsecurity=False).hexdigest()
+
+
+def _blake2b(data: bytes) -> str:
+    digest_size = get_setting('KEY_DIGEST_SIZE')
+    return blake2b(data, digest_size=digest_size).hexdigest()
+
+
+def _xxhash(data: bytes) -> str:
+    if xxhash is None:
+        raise ImproperlyConfigured(
+            "USERAGENTS_KEY_HASHER = 'xxhash' requires the xxhash package.")
+    return xxhash.xxh3_128_hexdigest(data)
+
+
+KEY_HASHERS = {
+    'md5': _md5,
+    'blake2b': _blake2b,
+    'xxhash': _xxhash,
+}
+
+
+def hash_device_key(data: bytes) -> str:
+    """
+    Hex digest of ``data`` using the USERAGENTS_KEY_HASHER backend.
+    """
+    name = get_setting('KEY_HASHER')
+    try:
+        hasher = KEY_HASHERS[name]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"Unknown USERAGENTS_KEY_HASHER {name!r}; "
+            f"choose one of {', '.join(KEY_HASHERS)}.")
+    return hasher(data)
+
+
+def key_to_digest(key: str | None) -> bytes | None:
+    """
+    Binary form of a device key, the column devices are unique on. Hex keys
+    map to their bytes, whatever hasher produced them (so md5 keys issued
+    before a hasher change map too); any other key to its blake2b digest.
+    """
+    if not key:
+        return None
+    try:
+        return bytes.fromhex(key)
+    except ValueError:
+        return blake2b(key.encode(), digest_size=16).digest()
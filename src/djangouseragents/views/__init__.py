@@ -0,0 +1,2 @@
+from .export import export_view
+from .metrics import metrics_view
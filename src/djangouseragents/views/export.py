@@ -0,0 +1,57 @@
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.http import (
+    HttpRequest,
+    HttpResponseBadRequest,
+    StreamingHttpResponse,
+)
+from django.views.decorators.http import require_GET
+
+from djangouseragents.services.export import (
+    DATASETS,
+    FORMATS,
+    export,
+    get_export_queryset,
+    iter_rows,
+    parse_bound,
+)
+
+
+def _int_param(request: HttpRequest, name: str) -> int | None:
+    value = request.GET.get(name)
+    return int(value) if value else None
+
+
+@staff_member_required
+@require_GET
+def export_view(request: HttpRequest, dataset: str):
+    """
+    Stream devices or requests to staff users with view permission on them.
+    Takes the filters of the export_useragent_data command as query parameters:
+    ``format``, ``since``, ``until``, ``status`` (repeatable), ``device`` and
+    ``after_id``.
+    """
+    if dataset not in DATASETS:
+        return HttpResponseBadRequest(f'Unknown dataset {dataset!r}.')
+    opts = DATASETS[dataset][0]._meta
+    if not request.user.has_perm(f'{opts.app_label}.view_{opts.model_name}'):
+        raise PermissionDenied
+
+    fmt = request.GET.get('format', 'csv')
+    try:
+        qs = get_export_queryset(
+            dataset,
+            since=parse_bound(request.GET.get('since')),
+            until=parse_bound(request.GET.get('until')),
+            statuses=request.GET.getlist('status'),
+            device=_int_param(request, 'device'),
+            after_id=_int_param(request, 'after_id'),
+        )
+        chunks = export(dataset, iter_rows(dataset, qs), fmt)
+    except (ValueError, ImproperlyConfigured) as e:
+        return HttpResponseBadRequest(str(e))
+
+    response = StreamingHttpResponse(chunks, content_type=FORMATS[fmt])
+    response['Content-Disposition'] = (
+        f'attachment; filename="useragent-{dataset}.{fmt}"')
+    return response
@@ -0,0 +1,29 @@
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpRequest, HttpResponse
+from django.views.decorators.http import require_GET
+
+from djangouseragents.conf import get_setting
+from djangouseragents.services.metrics import get_metrics_backend
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+@require_GET
+def metrics_view(request: HttpRequest):
+    """
+    Serve the in-process metrics registry in the Prometheus text format to
+    staff users and scrapers connecting from USERAGENTS_METRICS_ALLOWED_IPS.
+    The peer address is used as is; proxies in front of the scraper are not
+    trusted.
+    """
+    user = getattr(request, 'user', None)
+    is_staff = user is not None and user.is_active and user.is_staff
+    allowed_ips = get_setting('METRICS_ALLOWED_IPS')
+    if not is_staff and request.META.get('REMOTE_ADDR') not in allowed_ips:
+        raise PermissionDenied
+
+    backend = get_metrics_backend()
+    if not hasattr(backend, 'render_prometheus'):
+        raise Http404('The configured metrics backend keeps no registry.')
+    return HttpResponse(
+        backend.render_prometheus(), content_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,47 @@
+import pytest
+from django.core.cache import caches
+
+from djangouseragents.models import user_agent_endpoint, user_agent_header_set
+from djangouseragents.schemas import user_agent_parser
+from djangouseragents.services import device_cache, rate_tracker
+
+
+@pytest.fixture(autouse=True)
+def _reset_process_state():
+    """
+    Every test starts from empty caches: rows cached by one test are rolled
+    back with its transaction.
+    """
+    caches['default'].clear()
+    device_cache._device_cache = None
+    rate_tracker._tracker = None
+    user_agent_parser._cache = None
+    user_agent_endpoint._endpoint_ids.clear()
+    user_agent_header_set._stored_hashes.clear()
+    yield
+
+
+@pytest.fixture
+def no_logging(settings):
+    """
+    Log no request, so only the device work of the middleware is left.
+    """
+    settings.USERAGENTS_LOG_SAMPLE_RATE = 0.0
+    settings.USERAGENTS_LOG_ERROR_STATUS = None
+
+
+@pytest.fixture
+def make_device(db):
+    """
+    Create a device; ``make_device(key=..., **fields)``.
+    """
+    from djangouseragents.models import UserAgentDeviceModel
+
+    counter = iter(range(1, 10_000))
+
+    def make(key=None, **fields):
+        key = key or f'{next(counter):032x}'
+        return UserAgentDeviceModel.objects.upsert_by_key(
+            key=key, **fields)[0]
+
+    return make
@@ -0,0 +1,73 @@
+import os
+import tempfile
+
+import django
+
+SECRET_KEY = 'tests'
+USE_TZ = True
+ALLOWED_HOSTS = ['*']
+
+INSTALLED_APPS = [
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.admin',
+    'django_user_agents',
+    'djangouniquetoolkit',
+    'djangouseragents',
+]
+
+# A file database, so threaded tests share it; writers queue up on
+# BEGIN IMMEDIATE (Django 5.1+) instead of failing to upgrade a read lock
+DATABASE_OPTIONS = {'timeout': 30}
+if django.VERSION >= (5, 1):
+    DATABASE_OPTIONS['transaction_mode'] = 'IMMEDIATE'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': DATABASE_OPTIONS,
+        'TEST': {
+            'NAME': os.path.join(
+                tempfile.gettempdir(),
+                f'djangouseragents-tests-{os.getpid()}.sqlite3',
+            ),
+        },
+    },
+}
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django_user_agents.middleware.UserAgentMiddleware',
+    'djangouseragents.services.UserAgentDeviceMiddleware',
+]
+
+ROOT_URLCONF = 'tests.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+CACHES = {
+    'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+}
+
+STATIC_URL = '/static/'
+
+USERAGENTS_LOG_SINK = (
+    'djangouseragents.services.request_log_sinks.SyncRequestLogSink'
+)
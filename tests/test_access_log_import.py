@@ -0,0 +1,122 @@
+import gzip
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.services.access_log import AccessLogParser
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+GOOGLEBOT = (
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+)
+LOG = '\n'.join([
+    f'10.0.0.1 - - [17/Oct/2026:10:00:00 +0000] "GET /orders/1/?page=2 '
+    f'HTTP/1.1" 200 512 "https://example.com/" "{FIREFOX}"',
+    f'10.0.0.1 - - [17/Oct/2026:10:00:05 +0000] "POST /orders/2/ HTTP/1.1" '
+    f'201 0 "-" "{FIREFOX}"',
+    'not an access log line',
+    f'10.0.0.2 - - [17/Oct/2026:10:01:00 +0000] "GET /robots.txt HTTP/1.1" '
+    f'404 0 "-" "{GOOGLEBOT}"',
+    f'10.0.0.1 - - [17/Oct/2026:11:00:00 +0000] "GET /orders/1/ HTTP/1.1" '
+    f'200 512 "-" "{FIREFOX}"',
+]) + '\n'
+START = datetime(2026, 10, 17, 10, tzinfo=timezone.utc)
+
+
+def test_parse_combined_line():
+    line = AccessLogParser().parse(
+        '10.0.0.1 - - [17/Oct/2026:10:00:00 +0200] "GET /a%20b/?q=1&q=2 '
+        'HTTP/1.1" 200 5 "-" "Agent \\"quoted\\""')
+
+    assert line.ip == '10.0.0.1'
+    assert line.created_dt == START - timedelta(hours=2)
+    assert (line.method, line.path, line.query) == ('GET', '/a b/', 'q=1&q=2')
+    assert line.status == 200
+    assert line.user_agent == 'Agent "quoted"'
+    assert AccessLogParser().parse('garbage') is None
+
+
+def test_custom_pattern_without_user_agent(settings):
+    # Times without an offset are in the current time zone
+    settings.TIME_ZONE = 'UTC'
+    parser = AccessLogParser(
+        r'(?P<time>\S+ \S+) (?P<ip>\S+) (?P<method>\S+) (?P<target>\S+) '
+        r'(?P<status>\d+)',
+        '%Y-%m-%d %H:%M:%S')
+
+    line = parser.parse('2026-10-17 10:00:00 10.0.0.1 GET /ok/ 200')
+
+    assert line.created_dt == START
+    assert line.user_agent == ''
+
+
+def _import(*args):
+    out = StringIO()
+    call_command('import_useragent_access_log', *args, stdout=out)
+    return out.getvalue()
+
+
+@pytest.fixture
+def log_files(tmp_path):
+    plain = tmp_path / 'access.log'
+    plain.write_text(LOG)
+    compressed = tmp_path / 'access.log.1'
+    with gzip.open(compressed, 'wt') as f:
+        f.write(LOG)
+    return plain, compressed
+
+
+@pytest.mark.django_db
+def test_import_creates_devices_and_requests(log_files):
+    out = _import(str(log_files[0]), '--workers', '1', '--chunk-size', '2')
+
+    assert '5 lines, 4 requests imported, 1 lines skipped' in out
+    devices = UserAgentDeviceModel.objects.order_by('created_dt')
+    assert [(d.ip, d.is_bot, d.created_dt) for d in devices] == [
+        ('10.0.0.1', False, START),
+        ('10.0.0.2', True, START + timedelta(minutes=1)),
+    ]
+    firefox = UserAgentRequestModel.objects.filter(
+        uad=devices[0]).order_by('created_dt')
+    assert [(r.rn, r.endpoint_path, r.response_status_code)
+            for r in firefox] == [
+        (1, '/orders/1/', 200), (2, '/orders/2/', 201),
+        (3, '/orders/1/', 200)]
+    assert firefox[0].request_get == {'page': ['2']}
+    assert firefox[0].request_headers['Referer'] == 'https://example.com/'
+
+
+@pytest.mark.django_db
+def test_gzip_and_rerun_reuse_the_devices(log_files, settings):
+    settings.USERAGENTS_LOG_ENDPOINT_MODE = 'route'
+
+    _import(*map(str, log_files), '--workers', '1')
+
+    assert UserAgentDeviceModel.objects.count() == 2
+    assert UserAgentRequestModel.objects.count() == 8
+    endpoints = set(
+        r.endpoint_path for r in UserAgentRequestModel.objects.all())
+    assert endpoints == {'/orders/<int:pk>/', '/robots.txt'}
+
+
+@pytest.mark.django_db(transaction=True)
+def test_user_agents_are_parsed_by_a_pool(log_files):
+    _import(str(log_files[0]), '--workers', '2')
+
+    assert UserAgentDeviceModel.objects.get(ip='10.0.0.2').browser_family == (
+        'Googlebot')
+
+
+def test_bad_arguments(tmp_path):
+    with pytest.raises(CommandError, match='pattern'):
+        _import(str(tmp_path), '--pattern', '(')
+    with pytest.raises(CommandError):
+        _import(str(tmp_path / 'missing.log'), '--workers', '1')
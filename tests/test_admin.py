@@ -0,0 +1,94 @@
+from datetime import timedelta
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from djangouseragents.models import UserAgentRequestModel
+
+pytestmark = pytest.mark.django_db
+
+DEVICES = '/admin/djangouseragents/useragentdevice/'
+REQUESTS = '/admin/djangouseragents/useragentrequest/'
+
+
+def _log(device, count=1, created_dt=None):
+    created_dt = created_dt or now()
+    UserAgentRequestModel.objects.create_from_entries([
+        {
+            'uad_id': device.pk, 'endpoint': '/ok/',
+            'response_status_code': 200,
+            'created_dt': created_dt - timedelta(seconds=i),
+        }
+        for i in range(count)
+    ])
+
+
+def _queries(client, url):
+    with CaptureQueriesContext(connection) as ctx:
+        response = client.get(url)
+    assert response.status_code == 200
+    return len(ctx)
+
+
+def test_device_changelist_queries_do_not_grow_with_rows(
+        admin_client, make_device, no_logging):
+    _log(make_device(), 3)
+    few = _queries(admin_client, DEVICES)
+
+    for _ in range(20):
+        _log(make_device(), 3)
+
+    assert _queries(admin_client, DEVICES) == few
+
+
+def test_device_changelist_sorts_by_request_counts(
+        admin_client, make_device, no_logging):
+    quiet, busy = make_device(), make_device()
+    _log(quiet, 1)
+    _log(busy, 5)
+
+    for column in (8, 9, 10):  # total, last 24h, last hour
+        response = admin_client.get(DEVICES, {'o': f'-{column}'})
+        names = [obj.name for obj in response.context['cl'].result_list]
+        assert names == [busy.name, quiet.name]
+
+
+def test_request_changelist_pages_by_keyset(
+        admin_client, make_device, no_logging):
+    device = make_device()
+    _log(device, 150)
+
+    first = admin_client.get(REQUESTS).context['cl']
+    assert len(first.result_list) == 100
+    assert first.next_cursor_url
+
+    url = REQUESTS + first.next_cursor_url
+    second = admin_client.get(url).context['cl']
+    ids = [obj.pk for obj in [*first.result_list, *second.result_list]]
+    assert len(ids) == len(set(ids)) == 150
+
+
+def test_request_changelist_searches_by_device(
+        admin_client, make_device, no_logging):
+    device, other = make_device(ip='10.0.0.1'), make_device(ip='10.0.0.2')
+    _log(device)
+    _log(other)
+
+    for term in (device.key, '10.0.0.1', str(device.pk)):
+        response = admin_client.get(REQUESTS, {'q': term})
+        found = [obj.uad_id for obj in response.context['cl'].result_list]
+        assert found == [device.pk], term
+
+
+def test_request_changelist_selects_devices_in_one_query(
+        admin_client, make_device, no_logging):
+    for _ in range(3):
+        _log(make_device())
+    few = _queries(admin_client, REQUESTS)
+
+    for _ in range(10):
+        _log(make_device())
+
+    assert _queries(admin_client, REQUESTS) == few
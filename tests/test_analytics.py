@@ -0,0 +1,165 @@
+from datetime import timedelta
+from io import StringIO
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from djangouseragents.analytics import (
+    new_devices_per_day,
+    requests_per_hour,
+    top_endpoints,
+)
+from djangouseragents.models import (
+    UserAgentDeviceModel,
+    UserAgentEndpointRollupModel,
+    UserAgentRequestModel,
+    UserAgentTrafficRollupModel,
+)
+from djangouseragents.models.user_agent_rollups import get_hour
+
+pytestmark = pytest.mark.django_db
+
+DASHBOARD = '/admin/djangouseragents/useragenttrafficrollup/'
+
+
+@pytest.fixture
+def hour():
+    return get_hour(now()) - timedelta(hours=2)
+
+
+@pytest.fixture
+def traffic(make_device, hour):
+    firefox = make_device(browser_family='Firefox', os_family='Linux')
+    bot = make_device(browser_family='Googlebot', os_family='', is_bot=True)
+    entries = [
+        (firefox, '/ok/', 200, hour),
+        (firefox, '/ok/', 200, hour + timedelta(minutes=5)),
+        (firefox, '/orders/1/', 404, hour + timedelta(hours=1)),
+        (bot, '/ok/', 200, hour + timedelta(hours=1, minutes=5)),
+    ]
+    UserAgentRequestModel.objects.create_from_entries([
+        {
+            'uad_id': device.pk, 'endpoint': endpoint, 'method': 'GET',
+            'response_status_code': status, 'created_dt': created_dt,
+        }
+        for device, endpoint, status, created_dt in entries
+    ])
+
+
+def _figures():
+    return (
+        requests_per_hour(),
+        requests_per_hour(by=('browser_family', 'is_bot')),
+        top_endpoints(),
+        new_devices_per_day(),
+    )
+
+
+def test_queries_read_the_rollups(traffic, hour):
+    assert requests_per_hour() == [
+        {'hour': hour, 'requests': 2},
+        {'hour': hour + timedelta(hours=1), 'requests': 2},
+    ]
+    assert requests_per_hour(by=('is_bot',)) == [
+        {'hour': hour, 'is_bot': False, 'requests': 2},
+        {'hour': hour + timedelta(hours=1), 'is_bot': False, 'requests': 1},
+        {'hour': hour + timedelta(hours=1), 'is_bot': True, 'requests': 1},
+    ]
+    assert top_endpoints() == [
+        {'endpoint__path': '/ok/', 'response_status_code': 200,
+         'requests': 3},
+        {'endpoint__path': '/orders/1/', 'response_status_code': 404,
+         'requests': 1},
+    ]
+    assert top_endpoints(status_code=404, limit=1)[0]['requests'] == 1
+    assert sum(row['new_devices'] for row in new_devices_per_day()) == 2
+    assert requests_per_hour(until=hour) == []
+    with pytest.raises(ValueError):
+        requests_per_hour(by=('device_model',))
+
+
+def test_devices_are_new_in_the_hour_they_are_created(make_device, hour):
+    device = make_device()
+    today = get_hour(now()).date()
+
+    assert new_devices_per_day() == [{'day': today, 'new_devices': 1}]
+    assert requests_per_hour() == []
+
+    # Its first logged request does not make it new again
+    UserAgentRequestModel.objects.create_from_entries([{
+        'uad_id': device.pk, 'endpoint': '/ok/', 'method': 'GET',
+        'response_status_code': 200, 'created_dt': hour,
+    }])
+    assert sum(row['new_devices'] for row in new_devices_per_day()) == 1
+
+
+def test_bulk_created_devices_are_new_when_backdated(db, hour):
+    devices = UserAgentDeviceModel.objects
+    devices.bulk_get_or_create_by_key([
+        {'key': 'a' * 32, 'created_dt': hour},
+        {'key': 'b' * 32, 'created_dt': hour},
+    ])
+    devices.bulk_get_or_create_by_key([{'key': 'a' * 32}])
+
+    assert new_devices_per_day(since=hour) == [
+        {'day': hour.date(), 'new_devices': 2}]
+
+
+def test_rebuild_matches_the_incremental_rollups(traffic):
+    incremental = _figures()
+    UserAgentTrafficRollupModel.objects.all().delete()
+    UserAgentEndpointRollupModel.objects.all().delete()
+
+    call_command('rebuild_useragent_rollups', stdout=StringIO())
+
+    assert _figures() == incremental
+
+
+def test_rollups_can_be_disabled(make_device, settings):
+    settings.USERAGENTS_ANALYTICS_ROLLUPS = False
+    UserAgentRequestModel.objects.create_from_entries([{
+        'uad_id': make_device().pk, 'endpoint': '/ok/', 'method': 'GET',
+        'response_status_code': 200,
+    }])
+
+    assert not UserAgentTrafficRollupModel.objects.exists()
+    assert not UserAgentEndpointRollupModel.objects.exists()
+
+
+def test_dashboard_needs_view_permission(client, traffic, no_logging):
+    user = User.objects.create_user('staff', is_staff=True)
+    client.force_login(user)
+    assert client.get(DASHBOARD).status_code == 403
+
+    user.user_permissions.add(
+        Permission.objects.get(codename='view_useragenttrafficrollup'))
+    response = client.get(DASHBOARD)
+    assert response.status_code == 200
+    assert response.context['top_endpoints'][0]['requests'] == 3
+
+
+def test_dashboard_queries_do_not_grow(
+        client, admin_user, traffic, make_device, no_logging):
+    client.force_login(admin_user)
+
+    def count_queries():
+        with CaptureQueriesContext(connection) as queries:
+            assert client.get(DASHBOARD, {'hours': 48}).status_code == 200
+        return len(queries)
+
+    before = count_queries()
+    device = make_device(browser_family='Safari', os_family='iOS')
+    UserAgentRequestModel.objects.create_from_entries([
+        {
+            'uad_id': device.pk, 'endpoint': f'/orders/{n}/',
+            'method': 'GET', 'response_status_code': 200,
+            'created_dt': now() - timedelta(hours=n),
+        }
+        for n in range(20)
+    ])
+
+    assert count_queries() == before
@@ -0,0 +1,76 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+BENCHMARKS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks')
+
+# Tiny runs, only to catch scripts broken by changes to the code they drive
+SMOKE_RUNS = {
+    'bench_middleware.py': [
+        '--requests', '40', '--clients', '5', '--threads', '1', '2',
+        '--warmup', '5', '--allocation-sample', '5'],
+    'bench_request_save.py': [
+        '--sizes', '0', '50', '--number', '10', '--batch-size', '5',
+        '--devices', '5'],
+    'bench_admin.py': ['--sizes', '20', '--number', '1', '--devices', '5'],
+    'bench_access_log_import.py': [
+        '--lines', '200', '--clients', '10', '--workers', '1',
+        '--chunk-size', '50'],
+}
+
+
+def _run(script, *args):
+    # Every script configures Django itself, so each gets its own process
+    env = {k: v for k, v in os.environ.items()
+           if k not in ('DJANGO_SETTINGS_MODULE', 'BENCH_DATABASE_URL')}
+    return subprocess.run(
+        [sys.executable, script, *args], cwd=BENCHMARKS, env=env,
+        capture_output=True, text=True, timeout=300,
+    )
+
+
+@pytest.mark.parametrize('script', SMOKE_RUNS)
+def test_benchmark_writes_json_results(script, tmp_path):
+    path = tmp_path / 'results.json'
+
+    run = _run(script, *SMOKE_RUNS[script], '--json', str(path))
+
+    assert run.returncode == 0, run.stderr
+    results = json.loads(path.read_text())
+    assert results['meta']['database'] == 'sqlite'
+    assert results['results']
+    assert all(results['results'].values())
+
+
+def test_uad_record_benchmark():
+    run = _run('bench_uad_record.py', '--number', '100')
+
+    assert run.returncode == 0, run.stderr
+    assert 'UADRecord.from_model' in run.stdout
+
+
+def test_compare_flags_regressions(tmp_path):
+    def write(name, p50, rps):
+        path = tmp_path / name
+        path.write_text(json.dumps({
+            'benchmark': 'bench_middleware',
+            'meta': {'revision': name, 'database': 'sqlite',
+                     'django': '5.2', 'timestamp': ''},
+            'results': {'sync-1-threads': {'p50_ms': p50, 'rps': rps}},
+        }))
+        return str(path)
+
+    baseline = write('baseline.json', 1.0, 1000.0)
+
+    assert _run('compare.py', baseline, write('same.json', 1.05, 990.0)
+                ).returncode == 0
+    slower = _run('compare.py', baseline, write('slower.json', 1.5, 1000.0))
+    assert slower.returncode == 1
+    assert [line.split()[1] for line in slower.stdout.splitlines()
+            if line.endswith('REGRESSION')] == ['p50_ms']
+    fewer = _run('compare.py', baseline, write('fewer.json', 1.0, 500.0))
+    assert fewer.returncode == 1
@@ -0,0 +1,67 @@
+from unittest import mock
+
+import pytest
+
+from djangouseragents.services.device_cache import (
+    DeviceCache,
+    get_device_cache,
+)
+from djangouseragents.utils import LRUCache
+
+pytestmark = pytest.mark.django_db
+
+
+def test_local_tier_answers_repeated_lookups(make_device):
+    cache = DeviceCache()
+    device = make_device()
+    cache.set(device)
+
+    assert cache.get(device.key).pk == device.pk
+    assert cache.get(device.key) is not cache.get(device.key)
+    assert cache.stats()['local_hits'] == 3
+
+
+def test_shared_tier_fills_the_local_tier(make_device):
+    device = make_device()
+    DeviceCache().set(device)
+    other_process = DeviceCache()
+
+    assert other_process.get(device.key).pk == device.pk
+    assert other_process.get(device.key).pk == device.pk
+    stats = other_process.stats()
+    assert (stats['shared_hits'], stats['local_hits']) == (1, 1)
+    assert stats['hit_rate'] == 1.0
+
+
+def test_miss(make_device):
+    cache = DeviceCache()
+
+    assert cache.get('f' * 32) is None
+    assert cache.stats()['misses'] == 1
+
+
+@pytest.mark.parametrize('change', ['save', 'delete'])
+def test_signals_invalidate_the_cached_row(make_device, change):
+    cache = get_device_cache()
+    device = make_device()
+    cache.set(device)
+
+    getattr(device, change)()
+
+    assert cache.get(device.key) is None
+
+
+def test_local_entries_expire():
+    lru = LRUCache(ttl=10)
+    with mock.patch('time.monotonic', return_value=100.0):
+        lru.set('a', 1)
+    with mock.patch('time.monotonic', return_value=109.0):
+        assert lru.get('a') == 1
+    with mock.patch('time.monotonic', return_value=111.0):
+        assert lru.get('a') is None
+
+
+def test_disabled(settings):
+    settings.USERAGENTS_DEVICE_CACHE = False
+
+    assert get_device_cache() is None
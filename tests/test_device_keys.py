@@ -0,0 +1,79 @@
+import hashlib
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+
+from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.utils import hash_device_key, key_to_digest
+from djangouseragents.utils.hashing import xxhash
+
+
+def test_md5_keys_stay_compatible():
+    assert hash_device_key(b'data') == hashlib.md5(b'data').hexdigest()
+
+
+def test_blake2b_digest_size(settings):
+    settings.USERAGENTS_KEY_HASHER = 'blake2b'
+    settings.USERAGENTS_KEY_DIGEST_SIZE = 8
+
+    assert len(hash_device_key(b'data')) == 16
+
+
+@pytest.mark.skipif(xxhash is None, reason='xxhash is not installed')
+def test_xxhash(settings):
+    settings.USERAGENTS_KEY_HASHER = 'xxhash'
+
+    assert len(hash_device_key(b'data')) == 32
+
+
+def test_unknown_hasher(settings):
+    settings.USERAGENTS_KEY_HASHER = 'sha1'
+
+    with pytest.raises(ImproperlyConfigured):
+        hash_device_key(b'data')
+
+
+def test_key_digests():
+    assert key_to_digest('00ff' * 8) == bytes.fromhex('00ff' * 8)
+    assert len(key_to_digest('not-a-hex-key')) == 16
+    assert key_to_digest('not-a-hex-key') == key_to_digest('not-a-hex-key')
+    assert key_to_digest('') is None
+
+
+@pytest.mark.django_db
+def test_old_md5_keys_resolve_after_a_hasher_change(make_device, settings):
+    device = make_device(key=hashlib.md5(b'old').hexdigest())
+    settings.USERAGENTS_KEY_HASHER = 'blake2b'
+
+    assert UserAgentDeviceModel.objects.get_by_key(device.key).pk == device.pk
+
+
+@pytest.mark.django_db
+def test_devices_are_unique_on_the_digest_only():
+    table = UserAgentDeviceModel._meta.db_table
+    with connection.cursor() as cursor:
+        constraints = connection.introspection.get_constraints(cursor, table)
+
+    unique = [c['columns'] for c in constraints.values() if c['unique']]
+    assert ['key_digest'] in unique
+    assert not any('key' in columns for columns in unique)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_fills_missing_digests():
+    app = 'djangouseragents'
+    executor = MigrationExecutor(connection)
+    executor.migrate([(app, '0009_request_spool_checkpoint')])
+    old_apps = executor.loader.project_state(
+        (app, '0009_request_spool_checkpoint')).apps
+    Device = old_apps.get_model(app, 'UserAgentDevice')
+    Device.objects.create(name='old', key='ab' * 16)
+
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes(app))
+
+    device = UserAgentDeviceModel.objects.get(name='old')
+    assert bytes(device.key_digest) == bytes.fromhex('ab' * 16)
@@ -0,0 +1,104 @@
+import threading
+
+import pytest
+from django.db import connections
+
+from djangouseragents.models import UserAgentDeviceModel
+
+THREADS = 16
+
+
+def _fields(key='0123456789abcdef0123456789abcdef'):
+    return {'key': key, 'browser_family': 'Firefox', 'ip': '10.0.0.1'}
+
+
+def _hammer(target, threads=THREADS):
+    """
+    Call ``target(i)`` from many threads released at the same moment;
+    returns the results, re-raising the first error.
+    """
+    barrier = threading.Barrier(threads)
+    results, errors = [None] * threads, []
+
+    def run(i):
+        try:
+            barrier.wait()
+            results[i] = target(i)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            connections.close_all()
+
+    workers = [
+        threading.Thread(target=run, args=(i,)) for i in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+@pytest.mark.django_db
+def test_upsert_returns_the_existing_row():
+    created, is_new = UserAgentDeviceModel.objects.upsert_by_key(**_fields())
+
+    existing, again = UserAgentDeviceModel.objects.upsert_by_key(**_fields())
+
+    assert (is_new, again) == (True, False)
+    assert existing.pk == created.pk
+    assert existing.name == created.name
+
+
+@pytest.mark.django_db
+def test_create_then_get_fallback():
+    manager = UserAgentDeviceModel.objects
+    first = manager.model(**_fields())
+    first.fill_key_digest()
+    second = manager.model(**_fields())
+    second.fill_key_digest()
+
+    created, is_new = manager._create_or_get(first, 'default')
+    existing, again = manager._create_or_get(second, 'default')
+
+    assert (is_new, again) == (True, False)
+    assert existing.pk == created.pk
+
+
+@pytest.mark.django_db
+def test_existing_device_costs_one_read(django_assert_num_queries):
+    created, _ = UserAgentDeviceModel.objects.upsert_by_key(**_fields())
+
+    with django_assert_num_queries(1):
+        existing, is_new = UserAgentDeviceModel.objects.get_or_create_by_key(
+            **_fields())
+
+    assert existing.pk == created.pk
+    assert not is_new
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize('method', ['upsert_by_key', 'get_or_create_by_key'])
+def test_concurrent_first_visits_create_one_device(method):
+    manager = UserAgentDeviceModel.objects
+
+    results = _hammer(lambda i: getattr(manager, method)(**_fields()))
+
+    assert len({obj.pk for obj, _ in results}) == 1
+    assert [created for _, created in results].count(True) == 1
+    assert manager.count() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_visits_of_many_devices():
+    keys = [f'{i:032x}' for i in range(4)]
+
+    def visit(i):
+        return UserAgentDeviceModel.objects.get_or_create_by_key(
+            **_fields(keys[i % len(keys)]))[0].key
+
+    results = _hammer(visit)
+
+    assert sorted(set(results)) == keys
+    assert UserAgentDeviceModel.objects.count() == len(keys)
@@ -0,0 +1,128 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth.models import Permission, User
+from django.core.management import CommandError, call_command
+from django.utils.timezone import now
+
+from djangouseragents.models import UserAgentRequestModel
+from djangouseragents.services.export import (
+    get_export_queryset,
+    iter_rows,
+    pyarrow,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def requests_log(make_device):
+    devices = [make_device(), make_device()]
+    start = now() - timedelta(days=3)
+    return UserAgentRequestModel.objects.create_from_entries([
+        {
+            'uad_id': devices[n % 2].pk, 'endpoint': f'/orders/{n}/',
+            'method': 'GET', 'response_status_code': 200,
+            'created_dt': start + timedelta(hours=n),
+            'headers': {'Accept': 'text/html', 'X-Request-Id': str(n)},
+            'get': {'page': str(n)},
+        }
+        for n in range(5)
+    ])
+
+
+def _export(*args):
+    err = io.StringIO()
+    call_command('export_useragent_data', *args, stderr=err)
+    return err.getvalue()
+
+
+def test_csv_export(requests_log, capsys):
+    err = _export('requests')
+    out = capsys.readouterr().out
+
+    rows = list(csv.DictReader(io.StringIO(out)))
+    assert [row['endpoint'] for row in rows] == [
+        f'/orders/{n}/' for n in range(5)]
+    assert json.loads(rows[2]['headers']) == {
+        'Accept': 'text/html', 'X-Request-Id': '2'}
+    assert json.loads(rows[2]['get']) == {'page': '2'}
+    assert 'Exported 5 requests' in err
+
+
+def test_ndjson_export_resumes_after_the_last_id(requests_log, tmp_path):
+    output = tmp_path / 'requests.ndjson'
+    last = UserAgentRequestModel.objects.order_by('pk')[1].pk
+
+    err = _export(
+        'requests', '--format', 'ndjson', '-o', str(output),
+        '--after-id', str(last))
+
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [row['endpoint'] for row in rows] == [
+        '/orders/2/', '/orders/3/', '/orders/4/']
+    assert err.strip().endswith(f'last id: {rows[-1]["id"]}')
+
+
+def test_filters(requests_log):
+    device = requests_log[0].uad_id
+    since = requests_log[1].created_dt
+
+    qs = get_export_queryset(
+        'requests', since=since, until=since + timedelta(hours=3),
+        device=device, statuses=['Normal'])
+
+    assert [row['endpoint'] for row in iter_rows('requests', qs)] == [
+        '/orders/2/']
+    with pytest.raises(CommandError):
+        _export('devices', '--status', 'Normal')
+    with pytest.raises(CommandError):
+        _export('requests', '--since', 'yesterday')
+
+
+def test_rows_are_read_in_one_query(requests_log, django_assert_num_queries):
+    qs = get_export_queryset('requests')
+
+    with django_assert_num_queries(1):
+        assert len(list(iter_rows('requests', qs, chunk_size=2))) == 5
+
+
+@pytest.mark.skipif(pyarrow is not None, reason='pyarrow is installed')
+def test_parquet_needs_pyarrow(requests_log):
+    with pytest.raises(CommandError, match='pyarrow'):
+        _export('requests', '--format', 'parquet')
+
+
+@pytest.mark.skipif(pyarrow is None, reason='needs pyarrow')
+def test_parquet_export(requests_log, tmp_path):
+    output = tmp_path / 'requests.parquet'
+
+    _export('requests', '--format', 'parquet', '-o', str(output))
+
+    table = pyarrow.parquet.read_table(output)
+    assert table.column('endpoint').to_pylist() == [
+        f'/orders/{n}/' for n in range(5)]
+
+
+def test_view_is_for_staff_with_view_permission(
+        client, requests_log, no_logging):
+    url = '/uad/export/requests/'
+    assert client.get(url).status_code == 302
+
+    user = User.objects.create_user('staff', is_staff=True)
+    client.force_login(user)
+    assert client.get(url).status_code == 403
+
+    user.user_permissions.add(
+        Permission.objects.get(codename='view_useragentrequest'))
+    response = client.get(url, {'format': 'ndjson', 'status': 'Normal'})
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+    body = b''.join(response.streaming_content).decode()
+    assert len(body.splitlines()) == 5
+
+    assert client.get('/uad/export/nothing/').status_code == 400
+    assert client.get(url, {'since': 'yesterday'}).status_code == 400
@@ -0,0 +1,120 @@
+import pytest
+from django.contrib.auth.models import User
+
+from djangouseragents.services.metrics import (
+    InProcessMetricsBackend,
+    get_metrics_backend,
+    phase_timer,
+)
+from djangouseragents.services.request_log_sinks import (
+    BufferedRequestLogSink,
+)
+from djangouseragents.signals import metric_recorded
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+
+
+@pytest.fixture
+def metrics(settings):
+    settings.USERAGENTS_METRICS_BACKEND = (
+        'djangouseragents.services.metrics.InProcessMetricsBackend')
+    return get_metrics_backend()
+
+
+def test_render_prometheus():
+    backend = InProcessMetricsBackend(buckets=(0.1, 1.0))
+    backend.increment('requests_total', logged='true')
+    backend.increment('requests_total', 2, logged='true')
+    backend.observe('phase_seconds', 0.5, phase='ua_parse')
+
+    assert backend.render_prometheus().splitlines() == [
+        '# TYPE useragents_requests_total counter',
+        'useragents_requests_total{logged="true"} 3',
+        '# TYPE useragents_phase_seconds histogram',
+        'useragents_phase_seconds_bucket{phase="ua_parse",le="0.1"} 0',
+        'useragents_phase_seconds_bucket{phase="ua_parse",le="1"} 1',
+        'useragents_phase_seconds_bucket{phase="ua_parse",le="+Inf"} 1',
+        'useragents_phase_seconds_sum{phase="ua_parse"} 0.5',
+        'useragents_phase_seconds_count{phase="ua_parse"} 1',
+    ]
+
+
+def test_signal_backend(settings):
+    settings.USERAGENTS_METRICS_BACKEND = (
+        'djangouseragents.services.metrics.SignalMetricsBackend')
+    recorded = []
+
+    def receiver(sender, kind, name, value, labels, **kwargs):
+        recorded.append((kind, name, labels))
+
+    metric_recorded.connect(receiver)
+    try:
+        with phase_timer('cookie_set'):
+            pass
+    finally:
+        metric_recorded.disconnect(receiver)
+
+    assert recorded == [
+        ('histogram', 'phase_seconds', {'phase': 'cookie_set'})]
+
+
+@pytest.mark.django_db
+def test_device_resolutions(client, metrics, settings, no_logging):
+    settings.USERAGENTS_DEVICE_CACHE = False
+    client.get('/device/', HTTP_USER_AGENT=FIREFOX)
+    client.get('/device/', HTTP_USER_AGENT=FIREFOX)
+    # Without its cookie the device is found again by the key derived from
+    # the request, through get_or_create_by_key
+    client.cookies.clear()
+    client.get('/device/', HTTP_USER_AGENT=FIREFOX)
+
+    assert metrics.get_counter(
+        'device_resolutions_total', outcome='new') == 1
+    assert metrics.get_counter(
+        'device_resolutions_total', outcome='returning') == 2
+    assert metrics.get_counter('requests_total', logged='false') == 3
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_batches_count_every_entry(metrics):
+    sink = BufferedRequestLogSink(batch_size=1000, flush_interval=60)
+    try:
+        for _ in range(3):
+            sink.write({'no_such_field': 1})
+        sink.flush()
+    finally:
+        sink.close()
+
+    assert metrics.get_counter('log_failures_total') == 3
+
+
+def test_dropped_entries_are_counted(metrics):
+    sink = BufferedRequestLogSink(max_queue_size=1)
+    sink._ensure_worker = lambda: None
+
+    for _ in range(4):
+        sink.write({})
+
+    assert metrics.get_counter('log_dropped_total') == 3
+
+
+@pytest.mark.django_db
+def test_metrics_view_access(client, metrics, settings, no_logging):
+    metrics.increment('throttled_total')
+
+    assert client.get('/uad/metrics/').status_code == 403
+
+    settings.USERAGENTS_METRICS_ALLOWED_IPS = ['127.0.0.1']
+    response = client.get('/uad/metrics/')
+    assert response.status_code == 200
+    assert b'useragents_throttled_total 1' in response.content
+
+    settings.USERAGENTS_METRICS_ALLOWED_IPS = []
+    client.force_login(User.objects.create_user('staff', is_staff=True))
+    assert client.get('/uad/metrics/').status_code == 200
+
+    settings.USERAGENTS_METRICS_BACKEND = (
+        'djangouseragents.services.metrics.SignalMetricsBackend')
+    assert client.get('/uad/metrics/').status_code == 404
@@ -0,0 +1,93 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from djangouseragents.models import UserAgentDeviceModel, UserAgentRequestModel
+from djangouseragents.services import UserAgentDeviceMiddleware
+
+pytestmark = pytest.mark.django_db
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+
+
+@pytest.fixture
+def num_queries(django_assert_num_queries):
+    return django_assert_num_queries
+
+
+def _visit(client, path='/device/', **extra):
+    return client.get(path, HTTP_USER_AGENT=FIREFOX, **extra)
+
+
+def test_new_device(client, no_logging, num_queries):
+    # Key lookup, unique name (savepoint, check, insert, release), insert,
+    # new-device rollup
+    with num_queries(7):
+        response = _visit(client)
+
+    obj = UserAgentDeviceModel.objects.get()
+    assert response.json() == {'id': obj.pk, 'key': obj.key}
+    assert response.cookies['UAD'].value == obj.key
+
+
+def test_returning_device_hits_the_cache(client, no_logging, num_queries):
+    _visit(client)
+
+    with num_queries(0):
+        response = _visit(client)
+
+    assert response.json()['id'] == UserAgentDeviceModel.objects.get().pk
+
+
+def test_returning_device_is_read_once(client, no_logging, settings,
+                                       num_queries):
+    settings.USERAGENTS_DEVICE_CACHE = False
+    _visit(client)
+
+    with num_queries(1):
+        _visit(client)
+
+
+def test_untouched_device_is_not_resolved(client, no_logging, num_queries):
+    with num_queries(0):
+        response = _visit(client, '/ok/')
+
+    assert 'UAD' not in response.cookies
+    assert not UserAgentDeviceModel.objects.exists()
+
+
+def test_signed_cookie_row_is_loaded_on_access(client, no_logging, settings,
+                                               num_queries):
+    settings.USERAGENTS_SIGNED_COOKIE = True
+    settings.USERAGENTS_DEVICE_CACHE = False
+    _visit(client)
+
+    with num_queries(0):
+        response = _visit(client)
+
+    assert response.json()['id'] == UserAgentDeviceModel.objects.get().pk
+
+
+def test_logged_request_reuses_the_resolved_device(client):
+    _visit(client)
+
+    response = _visit(client)
+
+    obj = UserAgentDeviceModel.objects.get()
+    assert response.json()['id'] == obj.pk
+    logged = UserAgentRequestModel.objects.values_list('uad_id', flat=True)
+    assert list(logged) == [obj.pk, obj.pk]
+
+
+def test_device_is_kept_on_the_request_not_the_middleware():
+    middleware = UserAgentDeviceMiddleware(
+        lambda request: HttpResponse(str(request.uad.id)))
+    state = set(vars(middleware))
+    request = RequestFactory().get('/ok/', HTTP_USER_AGENT=FIREFOX)
+
+    middleware(request)
+
+    assert set(vars(middleware)) == state
+    assert request.uad.id == UserAgentDeviceModel.objects.get().pk
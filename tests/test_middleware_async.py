@@ -0,0 +1,114 @@
+import asyncio
+import threading
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.core.cache import caches
+from django.test import AsyncClient
+
+from djangouseragents.models import UserAgentDeviceModel, UserAgentRequestModel
+from djangouseragents.services import device_cache
+from djangouseragents.services.request_log_sinks import BaseRequestLogSink
+
+pytestmark = pytest.mark.django_db(transaction=True)
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+
+
+async def _wait_for_requests(count: int) -> None:
+    # Requests are logged from a background task after the response
+    for _ in range(100):
+        if await UserAgentRequestModel.objects.acount() >= count:
+            return
+        await asyncio.sleep(0.02)
+    raise AssertionError(f'{count} requests were not logged')
+
+
+class SlowSink(BaseRequestLogSink):
+    written = threading.Event()
+
+    async def awrite(self, entry):
+        await asyncio.sleep(0.2)
+        self.written.set()
+
+
+def _run(scenario):
+    return async_to_sync(scenario)()
+
+
+def test_new_device_is_created_and_logged():
+    async def scenario():
+        client = AsyncClient(HTTP_USER_AGENT=FIREFOX)
+        response = await client.get('/adevice/')
+        await _wait_for_requests(1)
+        return response
+
+    response = _run(scenario)
+
+    obj = UserAgentDeviceModel.objects.get()
+    assert response.json() == {'id': obj.pk, 'key': obj.key}
+    assert response.cookies['UAD'].value == obj.key
+    assert UserAgentRequestModel.objects.get().uad_id == obj.pk
+
+
+def test_returning_device_is_found_by_its_cookie():
+    async def scenario():
+        client = AsyncClient(HTTP_USER_AGENT=FIREFOX)
+        first = await client.get('/adevice/')
+        second = await client.get('/adevice/')
+        await _wait_for_requests(2)
+        return first, second
+
+    first, second = _run(scenario)
+
+    assert first.json() == second.json()
+    assert UserAgentDeviceModel.objects.count() == 1
+    assert UserAgentRequestModel.objects.get(rn=2).uad_id == first.json()['id']
+
+
+@pytest.mark.parametrize('signed', [False, True])
+def test_async_view_reads_the_attributes_on_a_cache_miss(settings, signed):
+    settings.USERAGENTS_SIGNED_COOKIE = signed
+
+    async def scenario():
+        client = AsyncClient(HTTP_USER_AGENT=FIREFOX)
+        first = await client.get('/adevice/attributes/')
+        await sync_to_async(caches['default'].clear)()
+        device_cache._device_cache = None
+        second = await client.get('/adevice/attributes/')
+        await _wait_for_requests(2)
+        return first, second
+
+    first, second = _run(scenario)
+
+    obj = UserAgentDeviceModel.objects.get()
+    assert first.json() == second.json() == {'id': obj.pk, 'obj': obj.pk}
+
+
+def test_sync_view_under_asgi():
+    async def scenario():
+        response = await AsyncClient(HTTP_USER_AGENT=FIREFOX).get('/device/')
+        await _wait_for_requests(1)
+        return response
+
+    response = _run(scenario)
+
+    assert response.json()['id'] == UserAgentDeviceModel.objects.get().pk
+
+
+def test_logging_does_not_block_the_response(settings):
+    settings.USERAGENTS_LOG_SINK = 'tests.test_middleware_async.SlowSink'
+
+    async def scenario():
+        response = await AsyncClient(HTTP_USER_AGENT=FIREFOX).get('/aok/')
+        written = SlowSink.written.is_set()
+        await sync_to_async(SlowSink.written.wait)(5)
+        return response, written
+
+    response, written_before_response = _run(scenario)
+
+    assert response.status_code == 200
+    assert not written_before_response
+    assert SlowSink.written.is_set()
@@ -0,0 +1,141 @@
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.migrations.state import ProjectState
+from django.utils.timezone import now
+
+from djangouseragents.db import partitioning
+from djangouseragents.models import (
+    UserAgentRequestDailySummaryModel,
+    UserAgentRequestModel,
+)
+
+pytestmark = pytest.mark.django_db
+
+COMMAND = 'djangouseragents.management.commands.' \
+    'maintain_useragent_request_partitions'
+
+
+def _utc(*args):
+    return datetime(*args, tzinfo=timezone.utc)
+
+
+def test_periods():
+    dt = _utc(2024, 1, 31, 15, 30)
+
+    assert partitioning.period_start(dt, 'day') == _utc(2024, 1, 31)
+    assert partitioning.period_start(dt, 'month') == _utc(2024, 1, 1)
+    assert partitioning.next_period(_utc(2024, 1, 1), 'month') == \
+        _utc(2024, 2, 1)
+    assert partitioning.next_period(_utc(2024, 1, 31), 'day') == \
+        _utc(2024, 2, 1)
+
+
+def test_bad_interval(settings):
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'week'
+
+    with pytest.raises(ImproperlyConfigured):
+        partitioning.get_interval()
+
+
+def test_command_needs_a_partitioned_table(settings):
+    with pytest.raises(CommandError):
+        call_command('maintain_useragent_request_partitions')
+
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'month'
+    with pytest.raises(CommandError, match='not partitioned'):
+        call_command('maintain_useragent_request_partitions')
+
+
+def _old_partition(make_device):
+    """
+    A stand-in for a partition whose range ended 60 days ago, holding one
+    request; the other requests are newer.
+    """
+    table = UserAgentRequestModel._meta.db_table
+    name = f'{table}_old'
+    with connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {name} (id integer)')
+    upper = now() - timedelta(days=60)
+    device = make_device()
+    UserAgentRequestModel.objects.create_from_entries([
+        {
+            'uad_id': device.pk, 'endpoint': '/ok/', 'method': 'GET',
+            'response_status_code': 200, 'created_dt': created_dt,
+        }
+        for created_dt in (upper - timedelta(days=1), now())
+    ])
+    return name, upper
+
+
+def _maintain(partitions, *args):
+    patch = mock.patch.multiple(
+        COMMAND, is_partitioned=mock.Mock(return_value=True),
+        list_partitions=mock.Mock(return_value=partitions),
+        create_partition=mock.Mock(return_value=None))
+    with patch:
+        call_command(
+            'maintain_useragent_request_partitions', '--older-than-days',
+            '30', *args, stdout=StringIO())
+
+
+def _tables():
+    return connection.introspection.table_names()
+
+
+def test_old_partitions_are_rolled_up_before_the_drop(make_device, settings):
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'month'
+    name, upper = _old_partition(make_device)
+
+    _maintain([(name, None, upper)])
+
+    assert name not in _tables()
+    summary = UserAgentRequestDailySummaryModel.objects.get()
+    assert (summary.endpoint.path, summary.count) == ('/ok/', 1)
+
+
+def test_no_rollup(make_device, settings):
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'month'
+    name, upper = _old_partition(make_device)
+
+    _maintain([(name, upper - timedelta(days=30), upper)], '--no-rollup')
+
+    assert name not in _tables()
+    assert not UserAgentRequestDailySummaryModel.objects.exists()
+
+
+def test_dry_run_keeps_the_partition(make_device, settings):
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'month'
+    name, upper = _old_partition(make_device)
+
+    _maintain([(name, None, upper)], '--dry-run')
+
+    assert name in _tables()
+    assert not UserAgentRequestDailySummaryModel.objects.exists()
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql', reason='partitioning needs PostgreSQL')
+def test_partitioned_table_keeps_model_behaviour(make_device, settings):
+    settings.USERAGENTS_REQUEST_LOG_PARTITIONING = 'day'
+    with connection.schema_editor() as editor:
+        partitioning.PartitionRequestLog().database_forwards(
+            'djangouseragents', editor, None,
+            ProjectState.from_apps(apps))
+    call_command('maintain_useragent_request_partitions', stdout=StringIO())
+    device = make_device()
+
+    obj, = UserAgentRequestModel.objects.create_from_entries([{
+        'uad_id': device.pk, 'endpoint': '/ok/',
+        'response_status_code': 200, 'created_dt': now(),
+    }])
+
+    table = UserAgentRequestModel._meta.db_table
+    assert partitioning.is_partitioned(connection, table)
+    assert UserAgentRequestModel.objects.get(pk=obj.pk).rn == 1
@@ -0,0 +1,196 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from django.db import IntegrityError, connection
+from django.db.models import QuerySet
+from django.db.migrations.executor import MigrationExecutor
+from django.utils.timezone import now
+
+from djangouseragents.models import (
+    UserAgentEndpointModel,
+    UserAgentHeaderSetModel,
+    UserAgentRequestDailySummaryModel,
+    UserAgentRequestModel,
+    UserAgentTrafficRollupModel,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def _log(device, days_ago, endpoint='/ok/', count=1, **fields):
+    created_dt = now() - timedelta(days=days_ago)
+    return UserAgentRequestModel.objects.create_from_entries([
+        dict({
+            'uad_id': device.pk, 'endpoint': endpoint, 'method': 'GET',
+            'response_status_code': 200, 'created_dt': created_dt,
+        }, **fields)
+        for _ in range(count)
+    ])
+
+
+def _prune(*args):
+    out = StringIO()
+    call_command('prune_useragent_requests', *args, stdout=out)
+    return out.getvalue()
+
+
+def _summaries():
+    return sorted(
+        UserAgentRequestDailySummaryModel.objects.values_list(
+            'endpoint__path', 'method', 'response_status_code', 'count'))
+
+
+def test_old_rows_are_rolled_up_and_deleted(make_device):
+    device = make_device()
+    _log(device, 100, count=3)
+    _log(device, 100, endpoint='/orders/1/', response_status_code=404)
+    recent = _log(device, 1)
+
+    _prune('--older-than-days', '90', '--batch-size', '2')
+
+    assert list(UserAgentRequestModel.objects.all()) == recent
+    assert _summaries() == [
+        ('/ok/', 'GET', 200, 3),
+        ('/orders/1/', 'GET', 404, 1),
+    ]
+
+
+def test_batches_skip_gaps_in_the_keys(make_device):
+    device = make_device()
+    rows = _log(device, 100, count=10)
+    UserAgentRequestModel.objects.filter(
+        pk__in=[obj.pk for obj in rows[1:9]]).delete()
+
+    out = _prune('--older-than-days', '90', '--batch-size', '1')
+
+    assert not UserAgentRequestModel.objects.exists()
+    assert out.count('Pruned') == 2
+
+
+def test_reruns_add_to_the_summaries(make_device):
+    device = make_device()
+    _log(device, 100, count=2)
+    _prune('--older-than-days', '90')
+
+    _log(device, 100, count=3)
+    _prune('--older-than-days', '90')
+
+    assert _summaries() == [('/ok/', 'GET', 200, 5)]
+
+
+def test_rows_logged_before_endpoint_interning(make_device):
+    device = make_device()
+    _log(device, 100)
+    UserAgentRequestModel.objects.update(
+        endpoint='/legacy/', endpoint_ref=None)
+
+    _prune('--older-than-days', '90')
+
+    assert _summaries() == [('/legacy/', 'GET', 200, 1)]
+
+
+def test_status_filter_dry_run_and_no_rollup(make_device):
+    device = make_device()
+    _log(device, 100, count=2)
+    UserAgentRequestModel.objects.filter(
+        pk=UserAgentRequestModel.objects.first().pk).update(status='Abnormal')
+
+    assert 'Would prune 1 rows' in _prune(
+        '--older-than-days', '90', '--status', 'Abnormal', '--dry-run')
+    assert UserAgentRequestModel.objects.count() == 2
+
+    _prune('--older-than-days', '90', '--status', 'Abnormal', '--no-rollup')
+
+    assert UserAgentRequestModel.objects.get().status == 'Normal'
+    assert _summaries() == []
+
+
+def test_orphaned_header_sets_and_endpoints_are_deleted(
+        make_device, settings):
+    settings.USERAGENTS_ANALYTICS_ROLLUPS = False
+    device = make_device()
+    _log(device, 100, endpoint='/gone/', headers={'Accept': 'text/gone'})
+    _log(device, 100, endpoint='/kept/', headers={'Accept': 'text/kept'})
+    _log(device, 1, endpoint='/kept/', headers={'Accept': 'text/kept'})
+    _log(device, 1, endpoint='/recent/', headers={'Accept': 'text/kept'})
+
+    out = _prune('--older-than-days', '90', '--no-rollup')
+
+    assert '1 header sets and 1 endpoints removed' in out
+    assert sorted(UserAgentEndpointModel.objects.values_list(
+        'path', flat=True)) == ['/kept/', '/recent/']
+    assert list(UserAgentHeaderSetModel.objects.values_list(
+        'headers', flat=True)) == [{'Accept': 'text/kept'}]
+
+
+def test_endpoints_of_summaries_are_kept(make_device, settings):
+    settings.USERAGENTS_ANALYTICS_ROLLUPS = False
+    _log(make_device(), 100, endpoint='/summed/')
+
+    _prune('--older-than-days', '90')
+
+    assert UserAgentRequestModel.objects.count() == 0
+    assert list(UserAgentEndpointModel.objects.values_list(
+        'path', flat=True)) == ['/summed/']
+
+
+def test_orphans_referenced_meanwhile_are_skipped(settings):
+    settings.USERAGENTS_ANALYTICS_ROLLUPS = False
+    UserAgentEndpointModel.objects.intern(['/a/', '/b/'])
+    delete = QuerySet.delete
+    failed = []
+
+    # A request logged between the PROTECT check and the DELETE
+    def delete_racing_a_request(qs):
+        if qs.model is UserAgentEndpointModel and not failed:
+            failed.append(qs)
+            raise IntegrityError('FOREIGN KEY constraint failed')
+        return delete(qs)
+
+    with mock.patch.object(QuerySet, 'delete', delete_racing_a_request):
+        out = _prune('--older-than-days', '90', '--batch-size', '1')
+
+    assert '1 endpoints removed' in out
+    assert UserAgentEndpointModel.objects.count() == 1
+
+
+def test_old_rollups_and_their_endpoints_are_deleted(make_device):
+    device = make_device()
+    _log(device, 400, endpoint='/old/')
+    _log(device, 100, endpoint='/ok/')
+
+    assert '4 rollup rows' in _prune(
+        '--older-than-days', '90', '--rollup-older-than-days', '50',
+        '--dry-run')
+    out = _prune('--older-than-days', '90', '--no-rollup')
+
+    assert '2 rollup rows' in out
+    assert list(UserAgentEndpointModel.objects.values_list(
+        'path', flat=True)) == ['/ok/']
+    hours = UserAgentTrafficRollupModel.objects.values_list('hour', flat=True)
+    assert min(hours) > now() - timedelta(days=101)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_migration_interns_summary_endpoints(make_device):
+    app = 'djangouseragents'
+    before = (app, '0010_device_unique_key_digest')
+    device = make_device()
+    executor = MigrationExecutor(connection)
+    executor.migrate([before])
+    Summary = executor.loader.project_state(before).apps.get_model(
+        app, 'UserAgentRequestDailySummary')
+    day = now().date()
+    for method, count in ((None, 2), ('', 3), ('GET', 4)):
+        Summary.objects.create(
+            uad_id=device.pk, day=day, endpoint='/ok/', method=method,
+            response_status_code=200, count=count)
+
+    executor = MigrationExecutor(connection)
+    executor.loader.build_graph()
+    executor.migrate(executor.loader.graph.leaf_nodes(app))
+
+    assert _summaries() == [('/ok/', '', 200, 5), ('/ok/', 'GET', 200, 4)]
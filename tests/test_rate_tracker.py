@@ -0,0 +1,108 @@
+from unittest import mock
+
+import pytest
+from django.test import RequestFactory
+
+from djangouseragents.services.rate_tracker import (
+    CacheRateTracker,
+    LocMemRateTracker,
+    get_rate_key,
+)
+from djangouseragents.services.uad_cookie import sign_uad_cookie
+
+KEY = 'a' * 32
+
+
+def _rate_key(cookie=None, **meta):
+    request = RequestFactory().get('/', REMOTE_ADDR='203.0.113.7', **meta)
+    if cookie is not None:
+        request.COOKIES['UAD'] = cookie
+    return get_rate_key(request)
+
+
+def test_rate_key_trusts_only_verified_cookies():
+    signed = sign_uad_cookie(7, KEY, None)
+
+    assert _rate_key(signed) == KEY
+    assert _rate_key() == 'ip:203.0.113.7'
+    assert _rate_key(KEY) == 'ip:203.0.113.7'
+    assert _rate_key(signed[:-1] + 'x') == 'ip:203.0.113.7'
+    assert _rate_key(signed.replace(KEY, 'b' * 32)) == 'ip:203.0.113.7'
+
+
+def test_rate_key_trusts_forwarded_for_only_behind_proxies(settings):
+    forwarded = {'HTTP_X_FORWARDED_FOR': '198.51.100.1, 192.0.2.9'}
+
+    assert _rate_key(**forwarded) == 'ip:203.0.113.7'
+    settings.USERAGENTS_RATE_TRUSTED_PROXIES = 1
+    assert _rate_key(**forwarded) == 'ip:192.0.2.9'
+    settings.USERAGENTS_RATE_TRUSTED_PROXIES = 2
+    assert _rate_key(**forwarded) == 'ip:198.51.100.1'
+    settings.USERAGENTS_RATE_TRUSTED_PROXIES = 3
+    assert _rate_key(**forwarded) == 'ip:203.0.113.7'
+
+
+@pytest.mark.parametrize('tracker', [
+    LocMemRateTracker(window=100),
+    CacheRateTracker(window=100),
+], ids=['locmem', 'cache'])
+def test_sliding_window(tracker):
+    with mock.patch('time.time', return_value=1_000.0):
+        assert [tracker.hit('k').count for _ in range(4)] == [1, 2, 3, 4]
+        assert tracker.hit('other').count == 1
+    # A quarter into the next window, 3/4 of the previous one still counts
+    with mock.patch('time.time', return_value=1_125.0):
+        assert tracker.hit('k').count == 4
+    with mock.patch('time.time', return_value=1_300.0):
+        assert tracker.hit('k').count == 1
+
+
+def test_locmem_tracker_is_bounded():
+    tracker = LocMemRateTracker(maxsize=2)
+    for key in ('a', 'b', 'c'):
+        tracker.hit(key)
+
+    assert list(tracker._windows) == ['b', 'c']
+
+
+@pytest.mark.django_db
+def test_throttled_clients_get_429(client, settings, no_logging):
+    settings.USERAGENTS_RATE_THROTTLE_STATUSES = ['Busy']
+
+    statuses = [client.get('/ok/').status_code for _ in range(55)]
+
+    assert statuses == [200] * 49 + [429] * 6
+
+
+@pytest.mark.django_db
+def test_new_plain_cookies_do_not_reset_the_rate(
+        client, settings, no_logging):
+    settings.USERAGENTS_RATE_THROTTLE_STATUSES = ['Busy']
+
+    statuses = []
+    for n in range(55):
+        client.cookies['UAD'] = f'{n:032x}'
+        statuses.append(client.get('/ok/').status_code)
+
+    assert statuses[-1] == 429
+
+
+@pytest.mark.django_db
+def test_signed_cookie_clients_are_counted_apart(
+        client, settings, no_logging):
+    settings.USERAGENTS_RATE_THROTTLE_STATUSES = ['Busy']
+    for _ in range(49):
+        client.get('/ok/')
+
+    client.cookies['UAD'] = sign_uad_cookie(7, KEY, None)
+
+    assert client.get('/ok/').status_code == 200
+
+
+@pytest.mark.django_db
+def test_only_device_rates_are_reported(client, settings, no_logging):
+    settings.USERAGENTS_SIGNED_COOKIE = True
+
+    assert client.get('/device/rate/').json()['rate'] is None
+    # The response signed the device's cookie
+    assert client.get('/device/rate/').json()['rate'] == 1
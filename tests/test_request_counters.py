@@ -0,0 +1,131 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.timezone import now
+
+from djangouseragents.models import (
+    UserAgentRequestCounterModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.models import user_agent_request_counter
+from djangouseragents.models.user_agent_request import (
+    StatusChoices,
+    get_status,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def _log(device, created_dt, **fields):
+    obj = UserAgentRequestModel(
+        uad=device, endpoint='/ok/', response_status_code=200,
+        created_dt=created_dt, **fields)
+    obj.save()
+    return obj
+
+
+def _entry(device, created_dt):
+    return {
+        'uad_id': device.pk, 'endpoint': '/ok/',
+        'response_status_code': 200, 'created_dt': created_dt,
+    }
+
+
+def test_save_counts_totals_and_windows(make_device):
+    device = make_device()
+    t = now()
+
+    objs = [
+        _log(device, t - timedelta(hours=30)),
+        _log(device, t - timedelta(hours=2)),
+        _log(device, t - timedelta(minutes=5)),
+        _log(device, t),
+    ]
+
+    last = objs[-1]
+    assert (last.rn, last.rn_ph, last.rn_24h) == (4, 2, 3)
+    assert [o.rn for o in objs] == [1, 2, 3, 4]
+    device.refresh_from_db()
+    assert device.request_count == 4
+
+
+def test_save_cost_does_not_grow_with_history(make_device):
+    device = make_device()
+    t = now()
+
+    def queries_of_save():
+        with CaptureQueriesContext(connection) as ctx:
+            _log(device, t)
+        return len(ctx)
+
+    first = queries_of_save()
+    for _ in range(20):
+        _log(device, t)
+
+    assert queries_of_save() == first
+
+
+@pytest.mark.parametrize('rn_ph, status', [
+    (1, StatusChoices.NORMAL),
+    (50, StatusChoices.BUSY),
+    (100, StatusChoices.VERY_BUSY),
+    (500, StatusChoices.ABNORMAL),
+])
+def test_status_buckets(rn_ph, status):
+    assert get_status(rn_ph)[0] == status
+
+
+def test_batch_numbers_requests_like_single_saves(make_device):
+    # A batch is flushed within seconds of its first request
+    device, other = make_device(), make_device()
+    t = now()
+    _log(device, t - timedelta(minutes=90))
+    _log(other, t - timedelta(minutes=90))
+    times = [t - timedelta(seconds=s) for s in (2, 1, 0)]
+    for created_dt in times:
+        _log(other, created_dt)
+
+    objs = UserAgentRequestModel.objects.create_from_entries(
+        [_entry(device, dt) for dt in reversed(times)])
+
+    batch = sorted((o.created_dt, o.rn, o.rn_ph, o.rn_24h) for o in objs)
+    single = sorted(
+        (o.created_dt, o.rn, o.rn_ph, o.rn_24h)
+        for o in UserAgentRequestModel.objects.filter(
+            uad=other, created_dt__in=times))
+    assert batch == single
+
+
+def test_rebuild_restores_the_counters(make_device):
+    device = make_device()
+    t = now()
+    for minutes in (120, 10, 0):
+        _log(device, t - timedelta(minutes=minutes))
+    expected = UserAgentRequestCounterModel.objects.get_counts(device.pk, t)
+    UserAgentRequestCounterModel.objects.all().delete()
+    device.request_count = 0
+    device.save(update_fields=['request_count'])
+
+    call_command('rebuild_useragent_counters', stdout=open('/dev/null', 'w'))
+
+    got = UserAgentRequestCounterModel.objects.get_counts(device.pk, t)
+    assert got == expected == (3, 2, 3)
+
+
+def test_logging_prunes_stale_buckets(
+        make_device, monkeypatch, django_capture_on_commit_callbacks):
+    monkeypatch.setattr(user_agent_request_counter, '_last_prune', None)
+    device = make_device()
+    counters = UserAgentRequestCounterModel.objects
+    counters.add({(device.pk, now() - timedelta(days=2)): {'count': 1}})
+
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        _log(device, now())
+        _log(device, now())
+
+    prunes = [cb for cb in callbacks if cb.__name__ == '_prune_quietly']
+    assert len(prunes) == 1
+    assert list(counters.values_list('count', flat=True)) == [2]
@@ -0,0 +1,69 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+from djangouseragents.models import (
+    UserAgentEndpointModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.services.export import iter_rows
+
+pytestmark = pytest.mark.django_db
+
+
+def _paths():
+    return sorted(
+        UserAgentEndpointModel.objects.values_list('path', flat=True))
+
+
+def test_rows_reference_the_interned_endpoint(client):
+    client.get('/orders/1/')
+    client.get('/orders/1/')
+    client.get('/orders/2/')
+
+    assert _paths() == ['/orders/1/', '/orders/2/']
+    rows = UserAgentRequestModel.objects.order_by('pk')
+    assert [row.endpoint for row in rows] == [None, None, None]
+    assert [row.endpoint_path for row in rows] == [
+        '/orders/1/', '/orders/1/', '/orders/2/']
+    assert str(rows[0]) == '/orders/1/ → 200'
+
+
+def test_route_mode_groups_by_url_pattern(client, settings):
+    settings.USERAGENTS_LOG_ENDPOINT_MODE = 'route'
+    client.get('/orders/1/')
+    client.get('/orders/2/')
+    client.get('/missing/')
+
+    assert _paths() == ['/missing/', '/orders/<int:pk>/']
+
+
+def test_backfill_interns_legacy_endpoint_text(make_device):
+    device = make_device()
+    UserAgentRequestModel.objects.create_from_entries([{
+        'uad_id': device.pk, 'endpoint': '/ok/', 'method': 'GET',
+        'response_status_code': 200,
+    }])
+    UserAgentRequestModel.objects.update(
+        endpoint='/legacy/', endpoint_ref=None)
+
+    call_command('backfill_useragent_endpoints', stdout=StringIO())
+
+    row = UserAgentRequestModel.objects.get()
+    assert row.endpoint is None
+    assert row.endpoint_ref.path == '/legacy/'
+
+
+def test_export_reads_the_interned_endpoint(client, make_device):
+    client.get('/orders/1/')
+    UserAgentRequestModel.objects.create_from_entries([{
+        'uad_id': make_device().pk, 'endpoint': '/ok/', 'method': 'GET',
+        'response_status_code': 200,
+    }])
+    UserAgentRequestModel.objects.filter(endpoint_ref__path='/ok/').update(
+        endpoint='/legacy/', endpoint_ref=None)
+
+    rows = iter_rows('requests', UserAgentRequestModel.objects.order_by('pk'))
+
+    assert [row['endpoint'] for row in rows] == ['/orders/1/', '/legacy/']
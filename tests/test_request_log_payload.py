@@ -0,0 +1,99 @@
+import zlib
+
+import pytest
+
+from djangouseragents.models import (
+    UserAgentHeaderSetModel,
+    UserAgentRequestModel,
+)
+from djangouseragents.services.export import iter_rows
+from djangouseragents.services.request_log_payload import (
+    REDACTED,
+    RequestPayloadFilter,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def _log(device, **fields):
+    return UserAgentRequestModel.objects.create_from_entries([dict({
+        'uad_id': device.pk, 'endpoint': '/ok/', 'method': 'GET',
+        'response_status_code': 200,
+    }, **fields)])[0]
+
+
+def test_filter_allow_lists_and_redaction():
+    payload_filter = RequestPayloadFilter(
+        headers=['Accept', 'authorization'],
+        redacted_headers=['Authorization'],
+    )
+
+    assert payload_filter.filter_header_items([
+        ('Accept', 'text/html'),
+        ('Authorization', 'Bearer secret'),
+        ('X-Other', '1'),
+    ]) == {'Accept': 'text/html', 'Authorization': REDACTED}
+
+
+def test_identical_headers_share_one_set(make_device):
+    device = make_device()
+    headers = {'Accept': 'text/html', 'User-Agent': 'Firefox'}
+    first = _log(device, headers=headers)
+    second = _log(device, headers=dict(headers))
+
+    assert UserAgentHeaderSetModel.objects.count() == 1
+    assert first.header_set_id == second.header_set_id
+    assert first.headers is None
+
+
+def test_volatile_headers_stay_on_the_row(make_device):
+    device = make_device()
+    rows = [
+        _log(device, headers={
+            'Accept': 'text/html', 'X-Request-Id': request_id,
+            'traceparent': f'00-{request_id}-01',
+        })
+        for request_id in ('a1', 'b2', 'c3')
+    ]
+
+    assert UserAgentHeaderSetModel.objects.get().headers == {
+        'Accept': 'text/html'}
+    row = UserAgentRequestModel.objects.get(pk=rows[1].pk)
+    assert row.headers == {
+        'X-Request-Id': 'b2', 'traceparent': '00-b2-01'}
+    assert row.request_headers == {
+        'Accept': 'text/html', 'X-Request-Id': 'b2',
+        'traceparent': '00-b2-01'}
+    exported = list(iter_rows(
+        'requests', UserAgentRequestModel.objects.order_by('pk')))
+    assert [r['headers']['X-Request-Id'] for r in exported] == [
+        'a1', 'b2', 'c3']
+
+
+def test_volatile_headers_can_be_shared(make_device, settings):
+    settings.USERAGENTS_LOG_VOLATILE_HEADERS = []
+    device = make_device()
+    _log(device, headers={'X-Request-Id': 'a1'})
+    _log(device, headers={'X-Request-Id': 'b2'})
+
+    assert UserAgentHeaderSetModel.objects.count() == 2
+
+
+def test_header_sets_disabled(make_device, settings):
+    settings.USERAGENTS_LOG_HEADER_SETS = False
+    obj = _log(make_device(), headers={'X-Request-Id': 'a1'})
+
+    row = UserAgentRequestModel.objects.get(pk=obj.pk)
+    assert row.header_set_id is None
+    assert row.request_headers == {'X-Request-Id': 'a1'}
+
+
+def test_compressed_payload(make_device, settings):
+    settings.USERAGENTS_LOG_COMPRESS_PAYLOAD = True
+    obj = _log(make_device(), get={'q': 'x' * 500}, cookies={'theme': 'dark'})
+
+    row = UserAgentRequestModel.objects.get(pk=obj.pk)
+    assert row.get is None and row.cookies is None
+    assert len(zlib.decompress(bytes(row.payload))) > len(row.payload)
+    assert row.request_get == {'q': 'x' * 500}
+    assert row.request_cookies == {'theme': 'dark'}
@@ -0,0 +1,87 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django_user_agents.utils import get_user_agent
+
+from djangouseragents.models import UserAgentRequestModel
+from djangouseragents.services.request_log_rules import (
+    RequestLogPolicy,
+    RequestLogRule,
+)
+
+GOOGLEBOT = (
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+)
+
+
+def _should_log(policy, path='/', status=200, method='get', **extra):
+    request = getattr(RequestFactory(), method)(path, **extra)
+    return policy.should_log(request, HttpResponse(status=status))
+
+
+def test_first_matching_rule_wins():
+    policy = RequestLogPolicy([
+        RequestLogRule(paths=['/static/admin/'], action='include'),
+        RequestLogRule(paths=['/static/'], action='exclude'),
+    ])
+
+    assert _should_log(policy, '/static/admin/base.css')
+    assert not _should_log(policy, '/static/app.css')
+    assert _should_log(policy, '/orders/')
+
+
+def test_regex_method_and_status_conditions():
+    policy = RequestLogPolicy([
+        RequestLogRule(regex=[r'/health/?$'], action='exclude'),
+        RequestLogRule(methods=['post'], status_codes=['4xx', 302]),
+    ], default_sample_rate=0.0)
+
+    assert not _should_log(policy, '/health')
+    assert _should_log(policy, '/login/', status=403, method='post')
+    assert _should_log(policy, '/login/', status=302, method='post')
+    assert not _should_log(policy, '/login/', status=200, method='post')
+    assert not _should_log(policy, '/login/', status=403)
+
+
+def test_errors_are_always_logged():
+    policy = RequestLogPolicy(
+        [RequestLogRule(paths=['/'], action='exclude')], error_status=500)
+
+    assert _should_log(policy, '/boom/', status=503)
+    assert not _should_log(policy, '/boom/', status=404)
+
+
+def test_sampling():
+    assert not _should_log(RequestLogPolicy([], default_sample_rate=0.0))
+    assert _should_log(RequestLogPolicy([], default_sample_rate=1.0))
+    sampled = RequestLogPolicy([RequestLogRule(paths=['/'], sample_rate=0.5)])
+    hits = sum(_should_log(sampled) for _ in range(1000))
+    assert 350 < hits < 650
+
+
+def test_bot_rule():
+    policy = RequestLogPolicy([RequestLogRule(bots=True, action='exclude')])
+    request = RequestFactory().get('/', HTTP_USER_AGENT=GOOGLEBOT)
+    request.user_agent = get_user_agent(request)
+
+    assert not policy.should_log(request, HttpResponse())
+
+
+def test_bad_action():
+    with pytest.raises(ImproperlyConfigured):
+        RequestLogRule(action='drop')
+
+
+@pytest.mark.django_db
+def test_excluded_requests_skip_the_device(client, settings,
+                                           django_assert_num_queries):
+    settings.USERAGENTS_LOG_RULES = [
+        {'paths': ['/ok/'], 'action': 'exclude'},
+    ]
+
+    with django_assert_num_queries(0):
+        client.get('/ok/')
+    client.get('/orders/1/')
+
+    assert UserAgentRequestModel.objects.get().endpoint_path == '/orders/1/'
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+from django.utils.timezone import now
+
+from djangouseragents.models import UserAgentRequestModel
+from djangouseragents.services.request_log_sinks import (
+    BufferedRequestLogSink,
+    SyncRequestLogSink,
+    get_request_log_sink,
+)
+
+
+def _entry(device, **fields):
+    return dict({
+        'uad_id': device.pk, 'endpoint': '/ok/',
+        'response_status_code': 200, 'method': 'GET',
+        'created_dt': now(),
+    }, **fields)
+
+
+@pytest.mark.django_db
+def test_sync_sink_writes_inside_the_call(make_device):
+    device = make_device()
+
+    SyncRequestLogSink().write(_entry(device))
+
+    assert UserAgentRequestModel.objects.get().rn == 1
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_sink_writes_on_flush(make_device):
+    device = make_device()
+    sink = BufferedRequestLogSink(batch_size=1000, flush_interval=60)
+    try:
+        for _ in range(5):
+            sink.write(_entry(device))
+        assert not UserAgentRequestModel.objects.exists()
+
+        sink.flush()
+
+        rns = UserAgentRequestModel.objects.values_list('rn', flat=True)
+        assert sorted(rns) == [1, 2, 3, 4, 5]
+    finally:
+        sink.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_sink_writes_full_batches(make_device):
+    device = make_device()
+    sink = BufferedRequestLogSink(batch_size=3, flush_interval=60)
+    try:
+        for _ in range(3):
+            sink.write(_entry(device))
+
+        deadline = time.monotonic() + 5
+        while UserAgentRequestModel.objects.count() < 3:
+            assert time.monotonic() < deadline, 'batch not written'
+            time.sleep(0.05)
+    finally:
+        sink.close()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_buffered_sink_drains_on_close(make_device):
+    device = make_device()
+    sink = BufferedRequestLogSink(batch_size=1000, flush_interval=60)
+    for _ in range(4):
+        sink.write(_entry(device))
+
+    sink.close()
+
+    assert UserAgentRequestModel.objects.count() == 4
+
+
+def test_buffered_sink_drops_entries_when_full():
+    sink = BufferedRequestLogSink(max_queue_size=2)
+    # No worker: the queue is only filled
+    sink._ensure_worker = lambda: None
+
+    for _ in range(5):
+        sink.write({})
+
+    assert sink.dropped == 3
+    assert sink.queue.qsize() == 2
+
+
+def test_sink_is_configured_by_settings(settings):
+    settings.USERAGENTS_LOG_SINK = (
+        'djangouseragents.services.request_log_sinks.BufferedRequestLogSink')
+    settings.USERAGENTS_LOG_SINK_OPTIONS = {'batch_size': 7}
+
+    sink = get_request_log_sink()
+
+    assert isinstance(sink, BufferedRequestLogSink)
+    assert sink.batch_size == 7
@@ -0,0 +1,180 @@
+import logging
+import os
+from io import StringIO
+from unittest import mock
+
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.utils.timezone import now
+
+from djangouseragents.db.copy import supports_copy
+from djangouseragents.models import (
+    UserAgentRequestModel,
+    UserAgentRequestSpoolCheckpointModel,
+)
+from djangouseragents.services import request_log_spool
+from djangouseragents.services.request_log_sinks import (
+    SpoolRequestLogSink,
+    close_request_log_sink,
+)
+from djangouseragents.services.request_log_spool import (
+    HEADER,
+    SpoolDirectory,
+    SpoolWriter,
+    decode_entry,
+    encode_entry,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = SpoolWriter(str(tmp_path), max_file_age=60)
+    yield writer
+    writer.close()
+
+
+def _entry(device, n=0):
+    return {
+        'uad_id': device.pk, 'endpoint': f'/orders/{n}/', 'method': 'GET',
+        'response_status_code': 200, 'created_dt': now(),
+    }
+
+
+def _files(directory, suffix):
+    return [name for name in os.listdir(directory) if name.endswith(suffix)]
+
+
+def _ingest(directory):
+    out = StringIO()
+    call_command(
+        'ingest_useragent_requests', '--directory', str(directory), '--once',
+        stdout=out)
+    return out.getvalue()
+
+
+def test_entries_round_trip(make_device):
+    entry = _entry(make_device())
+
+    assert decode_entry(encode_entry(entry)) == entry
+
+
+def test_spooled_entries_are_ingested(writer, tmp_path, make_device):
+    device = make_device()
+    for n in range(3):
+        writer.append(encode_entry(_entry(device, n)))
+    assert _files(tmp_path, '.open')
+
+    writer.rotate()
+    out = _ingest(tmp_path)
+
+    assert 'Done: 3 requests from 1 spool files' in out
+    assert sorted(UserAgentRequestModel.objects.values_list(
+        'rn', flat=True)) == [1, 2, 3]
+    assert os.listdir(tmp_path) == []
+    assert not UserAgentRequestSpoolCheckpointModel.objects.exists()
+
+
+def test_crashed_writers_files_are_ingested(writer, tmp_path, make_device):
+    writer.append(encode_entry(_entry(make_device())))
+    # The writer process dies: its lock goes away, the file stays .open
+    writer._stop.set()
+    writer._file.close()
+    writer._file = None
+
+    assert SpoolDirectory(str(tmp_path)).release_abandoned() == 1
+    _ingest(tmp_path)
+
+    assert UserAgentRequestModel.objects.count() == 1
+
+
+def test_open_files_of_live_writers_are_left_alone(writer, tmp_path,
+                                                   make_device):
+    writer.append(encode_entry(_entry(make_device())))
+
+    assert SpoolDirectory(str(tmp_path)).release_abandoned() == 0
+    assert SpoolDirectory(str(tmp_path)).claim() is None
+
+
+def test_torn_record_ends_the_file(writer, tmp_path, make_device, caplog):
+    device = make_device()
+    writer.append(encode_entry(_entry(device, 1)))
+    payload = encode_entry(_entry(device, 2))
+    record = HEADER.pack(len(payload), 0) + payload
+    # A crash in the middle of the last write
+    os.write(writer._file.fileno(), record[:len(record) // 2])
+    writer.rotate()
+
+    with caplog.at_level(logging.WARNING):
+        _ingest(tmp_path)
+
+    assert UserAgentRequestModel.objects.get().endpoint_path == '/orders/1/'
+    assert 'torn record' in caplog.text
+
+
+def test_ingest_resumes_from_the_checkpoint(writer, tmp_path, make_device):
+    device = make_device()
+    payloads = [encode_entry(_entry(device, n)) for n in range(3)]
+    for payload in payloads:
+        writer.append(payload)
+    name = os.path.basename(writer._path).split('.', 1)[0]
+    writer.rotate()
+    # An earlier ingester loaded the first record, then was killed
+    UserAgentRequestSpoolCheckpointModel.objects.create(
+        name=name, offset=HEADER.size + len(payloads[0]))
+
+    _ingest(tmp_path)
+
+    assert sorted(
+        r.endpoint_path for r in UserAgentRequestModel.objects.all()
+    ) == ['/orders/1/', '/orders/2/']
+
+
+def test_a_file_is_claimed_once(writer, tmp_path, make_device):
+    writer.append(encode_entry(_entry(make_device())))
+    writer.rotate()
+    first = SpoolDirectory(str(tmp_path))
+    second = SpoolDirectory(str(tmp_path))
+
+    claimed = first.claim()
+    try:
+        assert claimed is not None
+        assert second.claim() is None
+    finally:
+        claimed.file.close()
+
+
+def test_copy_is_skipped_without_psycopg3(make_device):
+    assert not supports_copy(connection)
+
+    objs = UserAgentRequestModel.objects.create_from_entries(
+        [_entry(make_device())], copy=True)
+
+    assert objs[0].pk is not None
+
+
+def test_sink_writes_to_the_spool(settings, tmp_path, client):
+    settings.USERAGENTS_LOG_SINK = (
+        'djangouseragents.services.request_log_sinks.SpoolRequestLogSink')
+    settings.USERAGENTS_LOG_SPOOL_DIR = str(tmp_path)
+
+    client.get('/orders/1/')
+    call_command('ingest_useragent_requests', '--once', stdout=StringIO())
+
+    # Nothing handed over yet: the file is still open
+    assert not UserAgentRequestModel.objects.exists()
+    close_request_log_sink()
+    _ingest(tmp_path)
+
+    assert UserAgentRequestModel.objects.get().endpoint_path == '/orders/1/'
+
+
+def test_spool_needs_flock(tmp_path):
+    with mock.patch.object(request_log_spool, 'fcntl', None):
+        with pytest.raises(ImproperlyConfigured):
+            SpoolRequestLogSink(directory=str(tmp_path))
+        with pytest.raises(CommandError, match='flock'):
+            _ingest(tmp_path)
@@ -0,0 +1,146 @@
+import time
+from unittest import mock
+
+import pytest
+from django.contrib.auth.models import User
+from django.core import signing
+
+from djangouseragents.models import UserAgentDeviceModel
+from djangouseragents.services.uad_cookie import (
+    UADCookie,
+    cookie_is_current,
+    read_uad_cookie,
+    sign_uad_cookie,
+)
+
+KEY = 'a' * 32
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+
+
+def test_signed_cookie_round_trip():
+    cookie = read_uad_cookie(sign_uad_cookie(1234, KEY, '42'))
+
+    assert (cookie.id, cookie.key, cookie.user_id) == (1234, KEY, '42')
+    assert cookie.signed and not cookie.rotated
+    assert abs(cookie.issued - time.time()) < 5
+
+
+def test_plain_and_invalid_cookies():
+    signed = sign_uad_cookie(1, KEY, None)
+
+    assert read_uad_cookie(KEY) == UADCookie(key=KEY)
+    assert not read_uad_cookie(KEY).signed
+    assert read_uad_cookie(None) is None
+    assert read_uad_cookie(signed[:-2] + 'xx') is None
+    assert read_uad_cookie(signed.replace(KEY, 'b' * 32)) is None
+    assert read_uad_cookie('1:2:3') is None
+
+
+def test_expired_cookie(settings):
+    signed = sign_uad_cookie(1, KEY, None)
+    settings.USERAGENTS_COOKIE_MAX_AGE = 60
+
+    with mock.patch('time.time', return_value=time.time() + 61):
+        assert read_uad_cookie(signed) is None
+
+
+def test_rotated_secret_key(settings):
+    signed = sign_uad_cookie(1, KEY, None)
+    settings.SECRET_KEY_FALLBACKS = [settings.SECRET_KEY]
+    settings.SECRET_KEY = 'a-new-secret-key'
+
+    cookie = read_uad_cookie(signed)
+
+    assert cookie.key == KEY and cookie.rotated
+    assert not cookie_is_current(cookie, 1, KEY, None)
+
+    settings.SECRET_KEY_FALLBACKS = []
+    assert read_uad_cookie(signed) is None
+
+
+def test_cookie_is_current(settings):
+    cookie = read_uad_cookie(sign_uad_cookie(1, KEY, None))
+
+    assert cookie_is_current(cookie, 1, KEY, None)
+    assert not cookie_is_current(cookie, 1, KEY, '42')
+    assert not cookie_is_current(read_uad_cookie(KEY), 1, KEY, None)
+    # Longer than the default max age of a year: due for renewal
+    settings.USERAGENTS_SIGNED_COOKIE_RENEW_WITHIN = 60 * 60 * 24 * 366
+    assert not cookie_is_current(cookie, 1, KEY, None)
+
+
+@pytest.fixture
+def signed(settings, no_logging):
+    settings.USERAGENTS_SIGNED_COOKIE = True
+
+
+def _visit(client, path='/device/'):
+    return client.get(path, HTTP_USER_AGENT=FIREFOX)
+
+
+@pytest.mark.django_db
+def test_plain_cookie_is_upgraded(client, settings, no_logging):
+    _visit(client)
+    plain = client.cookies['UAD'].value
+    settings.USERAGENTS_SIGNED_COOKIE = True
+
+    response = _visit(client)
+
+    cookie = read_uad_cookie(response.cookies['UAD'].value)
+    obj = UserAgentDeviceModel.objects.get()
+    assert (cookie.id, cookie.key) == (obj.pk, plain)
+
+
+@pytest.mark.django_db
+def test_current_cookie_is_not_sent_again(client, signed):
+    _visit(client)
+
+    response = _visit(client)
+
+    assert 'UAD' not in response.cookies
+    assert response.json()['id'] == UserAgentDeviceModel.objects.get().pk
+
+
+@pytest.mark.django_db
+def test_cookie_is_renewed_before_it_expires(client, signed, settings):
+    _visit(client)
+    settings.USERAGENTS_SIGNED_COOKIE_RENEW_WITHIN = 60 * 60 * 24 * 366
+
+    assert 'UAD' in _visit(client).cookies
+
+
+@pytest.mark.django_db
+def test_tampered_cookie_is_ignored(client, signed, make_device):
+    _visit(client)
+    obj = UserAgentDeviceModel.objects.get()
+    other = make_device()
+    client.cookies['UAD'] = sign_uad_cookie(obj.pk, obj.key, None).replace(
+        f':{obj.key}:', f':{other.key}:')
+
+    response = _visit(client)
+
+    assert response.json()['id'] == obj.pk
+    assert read_uad_cookie(response.cookies['UAD'].value).id == obj.pk
+
+
+@pytest.mark.django_db
+def test_login_binds_a_new_signed_cookie(client, signed):
+    _visit(client)
+    user = User.objects.create_user('visitor')
+    client.force_login(user)
+
+    response = _visit(client)
+
+    cookie = read_uad_cookie(response.cookies['UAD'].value)
+    assert cookie.user_id == str(user.pk)
+    assert UserAgentDeviceModel.objects.get(pk=cookie.id).user_id == str(
+        user.pk)
+
+
+def test_signature_uses_the_salt():
+    signed = sign_uad_cookie(1, KEY, None)
+
+    with pytest.raises(signing.BadSignature):
+        signing.TimestampSigner().unsign(signed)
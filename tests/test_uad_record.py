@@ -0,0 +1,38 @@
+import pytest
+from django.test import RequestFactory
+from django_user_agents.utils import get_user_agent
+
+from djangouseragents.schemas import UADRecord, UADSchema
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+
+
+def test_record_has_no_instance_dict():
+    assert not hasattr(UADRecord(), '__dict__')
+
+
+def test_request_record_matches_the_schema():
+    request = RequestFactory().get(
+        '/', HTTP_USER_AGENT=FIREFOX, REMOTE_ADDR='10.0.0.1')
+    request.user_agent = get_user_agent(request)
+
+    record = UADRecord.from_request(request, user_id=None)
+
+    schema = UADSchema.from_request(request, user_id=None)
+    assert record.to_dict() == schema.to_dict()
+    assert record.browser_family == 'Firefox'
+    assert record.ip == '10.0.0.1'
+
+
+@pytest.mark.django_db
+def test_model_round_trip(make_device):
+    device = make_device(browser_family='Firefox', ip='10.0.0.1', user_id='7')
+
+    record = UADRecord.from_model(device)
+
+    assert record.to_dict() == UADSchema.from_model(device).to_dict()
+    assert record.to_schema() == UADSchema.from_model(device)
+    assert record.to_model().key == device.key
+    assert (record.id, record.user_id) == (device.pk, '7')
@@ -0,0 +1,68 @@
+import pytest
+from django.test import RequestFactory
+from django_user_agents.utils import get_user_agent
+
+from djangouseragents.schemas.user_agent_parser import (
+    get_user_agent_cache,
+    parse_user_agent,
+    parse_user_agent_strings,
+)
+
+FIREFOX = (
+    'Mozilla/5.0 (X11; Linux x86_64; rv:120.0) Gecko/20100101 Firefox/120.0'
+)
+GOOGLEBOT = (
+    'Mozilla/5.0 (compatible; Googlebot/2.1; +http://www.google.com/bot.html)'
+)
+
+
+def _request(ua):
+    request = RequestFactory().get('/', HTTP_USER_AGENT=ua)
+    request.user_agent = get_user_agent(request)
+    return request
+
+
+def test_parsed_fields():
+    fields = parse_user_agent(_request(FIREFOX))
+
+    assert fields['browser_family'] == 'Firefox'
+    assert fields['os_family'] == 'Linux'
+    assert fields['is_pc'] and not fields['is_bot']
+    assert parse_user_agent(_request(GOOGLEBOT))['is_bot']
+
+
+def test_repeated_user_agents_are_parsed_once():
+    for _ in range(3):
+        parse_user_agent(_request(FIREFOX))
+
+    stats = get_user_agent_cache().stats()
+    assert (stats['hits'], stats['misses']) == (2, 1)
+
+
+def test_cache_is_bounded(settings):
+    settings.USERAGENTS_USER_AGENT_CACHE_SIZE = 2
+
+    for version in range(5):
+        parse_user_agent(_request(f'{FIREFOX}.{version}'))
+
+    assert len(get_user_agent_cache()) == 2
+
+
+def test_without_user_agent_middleware():
+    assert parse_user_agent(RequestFactory().get('/')) is None
+
+
+def test_batch_parsing_matches_request_parsing():
+    fields = parse_user_agent(_request(FIREFOX))
+
+    assert parse_user_agent_strings([FIREFOX]) == [tuple(fields.values())]
+
+
+@pytest.mark.django_db
+def test_returning_device_is_not_parsed(client, no_logging):
+    client.get('/device/', HTTP_USER_AGENT=FIREFOX)
+    before = get_user_agent_cache().stats()
+
+    client.get('/device/', HTTP_USER_AGENT=FIREFOX)
+
+    assert get_user_agent_cache().stats() == before
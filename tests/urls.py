@@ -0,0 +1,41 @@
+from django.contrib import admin
+from django.http import HttpResponse, JsonResponse
+from django.urls import include, path
+
+
+def ok(request, pk=None):
+    return HttpResponse('ok')
+
+
+def device(request):
+    return JsonResponse({'id': request.uad.id, 'key': request.uad.key})
+
+
+def device_rate(request):
+    return JsonResponse({'rate': request.uad.rate})
+
+
+async def adevice(request):
+    uad = await request.auad()
+    return JsonResponse({'id': uad.id, 'key': uad.key})
+
+
+async def adevice_attributes(request):
+    return JsonResponse({'id': request.uad.id, 'obj': request.uad_obj.pk})
+
+
+async def aok(request):
+    return HttpResponse('ok')
+
+
+urlpatterns = [
+    path('admin/', admin.site.urls),
+    path('ok/', ok),
+    path('orders/<int:pk>/', ok),
+    path('device/', device),
+    path('device/rate/', device_rate),
+    path('adevice/', adevice),
+    path('adevice/attributes/', adevice_attributes),
+    path('aok/', aok),
+    path('uad/', include('djangouseragents.urls')),
+]